@@ -0,0 +1 @@
+from .backtestMetrics import BacktestMetrics, EquityCurveWriter, load_equity_curve
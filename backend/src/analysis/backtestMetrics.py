@@ -0,0 +1,291 @@
+import struct
+from math import sqrt
+from typing import Iterator, Optional
+
+import numpy as np
+from pandas import DataFrame, to_datetime
+
+SECONDS_PER_YEAR: int = 365 * 24 * 60 * 60
+
+
+class EquityCurveWriter:
+    """
+    Streams an equity curve to a compact columnar file.
+
+    The file is a sequence of blocks. Every block starts with the amount of rows as little endian uint32,
+    followed by the timestamp column (int64, unix milliseconds) and the equity column (float64).
+    Only one block is held in memory at any time.
+    """
+
+    def __init__(self, path: str, block_size: int = 4096):
+        """
+        :param path: The path of the file to write, an existing file is overwritten.
+        :param block_size: The amount of rows buffered before they are written as one block.
+        """
+        self.path: str = path
+        self.block_size: int = block_size
+
+        self._timestamps: np.ndarray = np.empty(block_size, dtype="<i8")
+        self._equity: np.ndarray = np.empty(block_size, dtype="<f8")
+        self._rows: int = 0
+        self._file = open(path, "wb")
+
+    def append(self, timestamp: int, equity: float) -> None:
+        self._timestamps[self._rows] = timestamp
+        self._equity[self._rows] = equity
+        self._rows += 1
+
+        if self._rows == self.block_size:
+            self.flush()
+
+    def extend(self, timestamps: np.ndarray, equity: np.ndarray) -> None:
+        """
+        Appends many rows at once, e.g. a block of another equity curve.
+        """
+        self.flush()
+        if len(timestamps) == 0:
+            return
+
+        self._file.write(struct.pack("<I", len(timestamps)))
+        self._file.write(np.asarray(timestamps, dtype="<i8").tobytes())
+        self._file.write(np.asarray(equity, dtype="<f8").tobytes())
+
+    def flush(self) -> None:
+        if self._rows == 0:
+            return
+
+        self._file.write(struct.pack("<I", self._rows))
+        self._file.write(self._timestamps[:self._rows].tobytes())
+        self._file.write(self._equity[:self._rows].tobytes())
+        self._file.flush()
+        self._rows = 0
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+
+        self.flush()
+        self._file.close()
+
+
+def iter_equity_curve_blocks(path: str) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """
+    Iterates over the blocks of a file written by `EquityCurveWriter` without loading the whole file.
+
+    :param path: The path of the equity curve file.
+
+    :return: An iterator of (timestamps, equity) column pairs.
+    """
+    with open(path, "rb") as f:
+        while header := f.read(4):
+            rows: int = struct.unpack("<I", header)[0]
+            timestamps: np.ndarray = np.frombuffer(f.read(rows * 8), dtype="<i8")
+            equity: np.ndarray = np.frombuffer(f.read(rows * 8), dtype="<f8")
+            yield timestamps, equity
+
+
+def load_equity_curve(path: str) -> DataFrame:
+    """
+    Loads a file written by `EquityCurveWriter`.
+
+    :param path: The path of the equity curve file.
+
+    :return: A DataFrame with an `Equity` column indexed by the UTC timestamp.
+    """
+    blocks: list[tuple[np.ndarray, np.ndarray]] = list(iter_equity_curve_blocks(path))
+    timestamps: np.ndarray = np.concatenate([b[0] for b in blocks]) if blocks else np.empty(0, dtype="<i8")
+    equity: np.ndarray = np.concatenate([b[1] for b in blocks]) if blocks else np.empty(0, dtype="<f8")
+
+    return DataFrame({"Equity": equity}, index=to_datetime(timestamps, unit="ms", utc=True))
+
+
+class BacktestMetrics:
+    """
+    Accumulates risk and performance metrics of a backtest online.
+
+    Every update is O(1) in time and memory, the equity curve is only kept when asked for.
+    Returns are measured per step, Sharpe and Sortino ratios assume a risk-free rate of 0
+    and are annualized with the amount of steps per year.
+    """
+
+    _STATE_FIELDS: tuple[str, ...] = (
+        "periods_per_year", "steps", "return_count", "start_equity", "last_equity", "peak_equity", "max_drawdown",
+        "return_mean", "return_m2", "downside_sum_sq", "exposure_sum", "equity_sum",
+        "traded_value", "closed_trades", "winning_trades", "positions",
+    )
+
+    def __init__(
+            self,
+            periods_per_year: float,
+            keep_equity_curve: bool = False,
+            equity_curve_path: Optional[str] = None,
+            equity_curve_block_size: int = 4096
+    ):
+        """
+        :param periods_per_year: The amount of steps per year, used to annualize the ratios.
+        :param keep_equity_curve: Whether to keep the equity curve in memory, see `equity_curve`.
+        :param equity_curve_path: If given, the equity curve is streamed to this file, see `EquityCurveWriter`.
+        :param equity_curve_block_size: The amount of rows per block of the equity curve file.
+        """
+        self.periods_per_year: float = periods_per_year
+
+        self.steps: int = 0
+        self.start_equity: Optional[float] = None
+        self.last_equity: Optional[float] = None
+        self.peak_equity: float = 0
+        self.max_drawdown: float = 0
+
+        # Welford's online mean and variance of the step returns
+        self.return_count: int = 0
+        self.return_mean: float = 0
+        self.return_m2: float = 0
+        self.downside_sum_sq: float = 0
+
+        self.exposure_sum: float = 0
+        self.equity_sum: float = 0
+        self.traded_value: float = 0
+
+        self.closed_trades: int = 0
+        self.winning_trades: int = 0
+        # {ticker: [quantity, average cost]}
+        self.positions: dict[str, list[float]] = {}
+
+        self.equity_curve: Optional[list[tuple[int, float]]] = [] if keep_equity_curve else None
+        self._writer: Optional[EquityCurveWriter] = (
+            EquityCurveWriter(equity_curve_path, block_size=equity_curve_block_size)
+            if equity_curve_path is not None else None
+        )
+
+    @classmethod
+    def for_interval(cls, interval_seconds: int, **kwargs) -> 'BacktestMetrics':
+        """
+        Creates the accumulator for a backtest which steps once per interval.
+
+        :param interval_seconds: The length of one step in seconds.
+        :param kwargs: The remaining arguments of `__init__`, e.g. `equity_curve_block_size`.
+        """
+        return cls(periods_per_year=SECONDS_PER_YEAR / interval_seconds, **kwargs)
+
+    def update(self, timestamp: int, equity: float, position_value: float) -> None:
+        """
+        Records the state of the portfolio after a step.
+
+        :param timestamp: The timestamp of the step as unix milliseconds.
+        :param equity: The total value of the portfolio (balance + positions).
+        :param position_value: The value of the open positions.
+        """
+        if self.last_equity is None:
+            self.start_equity = equity
+        elif self.last_equity > 0:
+            step_return: float = equity / self.last_equity - 1
+            self.return_count += 1
+            delta: float = step_return - self.return_mean
+            self.return_mean += delta / self.return_count
+            self.return_m2 += delta * (step_return - self.return_mean)
+
+            if step_return < 0:
+                self.downside_sum_sq += step_return ** 2
+
+        self.steps += 1
+        self.last_equity = equity
+        self.equity_sum += equity
+        self.exposure_sum += position_value / equity if equity > 0 else 0
+
+        self.peak_equity = max(self.peak_equity, equity)
+        if self.peak_equity > 0:
+            self.max_drawdown = max(self.max_drawdown, 1 - equity / self.peak_equity)
+
+        if self.equity_curve is not None:
+            self.equity_curve.append((timestamp, equity))
+        if self._writer is not None:
+            self._writer.append(timestamp, equity)
+
+    def record_fill(self, ticker: str, side: str, quantity: float, price: float) -> None:
+        """
+        Records an executed order, sells are counted as closed trades against the average cost of the position.
+
+        :param ticker: The ticker of the asset.
+        :param side: Either "BUY" or "SELL".
+        :param quantity: The amount of the asset which was traded.
+        :param price: The price the asset was traded at.
+        """
+        self.traded_value += quantity * price
+        position: list[float] = self.positions.setdefault(ticker, [0.0, 0.0])
+
+        if side == "BUY":
+            total_quantity: float = position[0] + quantity
+            position[1] = (position[0] * position[1] + quantity * price) / total_quantity if total_quantity else 0
+            position[0] = total_quantity
+        else:
+            self.closed_trades += 1
+            if price > position[1]:
+                self.winning_trades += 1
+            position[0] = max(position[0] - quantity, 0.0)
+
+    @property
+    def total_return(self) -> float:
+        if not self.start_equity:
+            return 0
+        return self.last_equity / self.start_equity - 1
+
+    @property
+    def sharpe_ratio(self) -> float:
+        if self.return_count < 2 or self.return_m2 == 0:
+            return 0
+        std: float = sqrt(self.return_m2 / (self.return_count - 1))
+        return self.return_mean / std * sqrt(self.periods_per_year)
+
+    @property
+    def sortino_ratio(self) -> float:
+        if self.return_count == 0 or self.downside_sum_sq == 0:
+            return 0
+        downside_deviation: float = sqrt(self.downside_sum_sq / self.return_count)
+        return self.return_mean / downside_deviation * sqrt(self.periods_per_year)
+
+    @property
+    def exposure(self) -> float:
+        return self.exposure_sum / self.steps if self.steps else 0
+
+    @property
+    def turnover(self) -> float:
+        average_equity: float = self.equity_sum / self.steps if self.steps else 0
+        return self.traded_value / average_equity if average_equity else 0
+
+    @property
+    def win_rate(self) -> float:
+        return self.winning_trades / self.closed_trades if self.closed_trades else 0
+
+    def summary(self) -> dict[str, float]:
+        return {
+            "total_return": self.total_return,
+            "max_drawdown": self.max_drawdown,
+            "sharpe_ratio": self.sharpe_ratio,
+            "sortino_ratio": self.sortino_ratio,
+            "exposure": self.exposure,
+            "turnover": self.turnover,
+            "win_rate": self.win_rate,
+            "closed_trades": self.closed_trades,
+        }
+
+    def to_state(self) -> dict[str, any]:
+        """
+        :return: The json serializable accumulator state, the equity curve is not part of it.
+        """
+        return {field: getattr(self, field) for field in self._STATE_FIELDS}
+
+    @classmethod
+    def from_state(cls, state: dict[str, any], **kwargs) -> 'BacktestMetrics':
+        """
+        Restores an accumulator from `to_state`, so a backtest can continue where it stopped.
+        """
+        metrics: BacktestMetrics = cls(periods_per_year=state["periods_per_year"], **kwargs)
+        for field in cls._STATE_FIELDS:
+            setattr(metrics, field, state[field])
+        return metrics
+
+    def close(self) -> None:
+        """
+        Flushes and closes the equity curve file if one is written.
+        """
+        if self._writer is not None:
+            self._writer.close()
@@ -1 +1,6 @@
-from .fetchData import fetch_klines, fetch_ticker_price, fetch_exchange_info
\ No newline at end of file
+from .fetchData import fetch_klines, fetch_ticker_price, fetch_ticker_prices, fetch_exchange_info
+from .priceSnapshot import PriceSnapshot, price_snapshot
+from .transport import LatencyHistogram, Transport, get_transport, set_transport
+from .weightGovernor import Priority, WeightGovernor, request_priority
+from .exchangeInfo import ExchangeInfo, QuoteAssetTickers, exchange_info
+from .klineFeed import KlineFeed
@@ -0,0 +1,190 @@
+import json
+import os
+import threading
+import time
+from collections.abc import Mapping
+from logging import getLogger
+from typing import Iterator, Optional
+
+from src.api.fetchData import fetch_exchange_info
+from src.utils import load_config
+
+logger = getLogger("oracle.app")
+
+# The fields of a symbol of the exchange info which are kept
+_SYMBOL_FIELDS: tuple[str, ...] = ("symbol", "status", "baseAsset", "quoteAsset")
+
+
+class ExchangeInfo:
+    """
+    The symbols of Binance, loaded on first use instead of on import.
+
+    The symbols are persisted in `path` and only fetched again once the file is older than `refresh_interval`,
+    so starting the app doesn't wait for the large exchange info download and works offline with a stored file.
+    If a refresh fails, the stored symbols are used until the next attempt `retry_interval` seconds later.
+    The symbols are indexed by name and by quote asset.
+    """
+
+    def __init__(self, path: str = "cache/exchange_info.json", refresh_interval: float = 24 * 60 * 60,
+                 retry_interval: float = 5 * 60):
+        """
+        :param path: The file the symbols are persisted in.
+        :param refresh_interval: The age in seconds after which the symbols are fetched again.
+        :param retry_interval: The seconds to wait before refreshing again after a failed refresh.
+        """
+        self.path: str = path
+        self.refresh_interval: float = refresh_interval
+        self.retry_interval: float = retry_interval
+
+        self._fetched_at: Optional[float] = None
+        self._next_refresh: float = 0
+        self._symbols: dict[str, dict[str, str]] = {}
+        self._by_quote_asset: dict[str, dict[str, dict[str, str]]] = {}
+        # {suffix: (the `_by_quote_asset` they were merged from, tickers)}, see `tickers`
+        self._by_quote_suffix: dict[str, tuple[dict, dict[str, dict[str, str]]]] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> 'ExchangeInfo':
+        """
+        Creates the exchange info from `exchange_info` in `API_CONFIG`.
+        """
+        config: dict[str, any] = (load_config("API_CONFIG") or {}).get("exchange_info", {})
+        return cls(
+            path=config.get("path", "cache/exchange_info.json"),
+            refresh_interval=config.get("refresh_interval", 24 * 60 * 60),
+            retry_interval=config.get("retry_interval", 5 * 60),
+        )
+
+    def symbol(self, ticker: str) -> Optional[dict[str, str]]:
+        """
+        :return: The symbol with its status, base and quote asset or None if Binance doesn't list the ticker.
+        """
+        return self._load()[0].get(ticker)
+
+    def is_valid(self, ticker: str, quote_asset: Optional[str] = None) -> bool:
+        """
+        :param ticker: The ticker to validate.
+        :param quote_asset: The quote asset the ticker must have (optional).
+
+        :return: Whether Binance lists the ticker.
+        """
+        symbol: Optional[dict[str, str]] = self.symbol(ticker)
+        return symbol is not None and (quote_asset is None or symbol["quoteAsset"] == quote_asset)
+
+    def tickers(self, quote_asset: Optional[str] = None, suffix: bool = False) -> dict[str, dict[str, str]]:
+        """
+        :param quote_asset: The quote asset of the tickers, all tickers if not given.
+        :param suffix: Whether every quote asset ending with `quote_asset` matches, e.g. 'AEUR' for 'EUR'.
+
+        :return: The symbols in the format of {ticker: symbol}, must not be modified.
+        """
+        symbols, by_quote_asset = self._load()
+        if quote_asset is None:
+            return symbols
+        if not suffix:
+            return by_quote_asset.get(quote_asset, {})
+
+        # Merged once per index, a refresh replaces `by_quote_asset` and with it the merged tickers
+        cached: Optional[tuple[dict, dict[str, dict[str, str]]]] = self._by_quote_suffix.get(quote_asset)
+        if cached is None or cached[0] is not by_quote_asset:
+            cached = (by_quote_asset, {
+                ticker: symbol for asset, asset_symbols in by_quote_asset.items() if asset.endswith(quote_asset)
+                for ticker, symbol in asset_symbols.items()
+            })
+            self._by_quote_suffix[quote_asset] = cached
+        return cached[1]
+
+    def refresh(self) -> None:
+        """
+        Fetches and persists the symbols, regardless of the age of the stored ones.
+        """
+        with self._lock:
+            self._fetch()
+
+    def _load(self) -> tuple[dict[str, dict[str, str]], dict[str, dict[str, dict[str, str]]]]:
+        if time.time() < self._next_refresh:
+            return self._symbols, self._by_quote_asset
+
+        with self._lock:
+            if self._fetched_at is None:
+                self._read()
+
+            if time.time() >= self._next_refresh:
+                try:
+                    self._fetch()
+                except Exception as e:
+                    if self._fetched_at is None:
+                        raise
+                    logger.warning(f"Failed to refresh the exchange info, using the one of {self._fetched_at}: {e}")
+                    self._next_refresh = time.time() + self.retry_interval
+
+        return self._symbols, self._by_quote_asset
+
+    def _fetch(self) -> None:
+        symbols: list[dict[str, str]] = [{key: symbol[key] for key in _SYMBOL_FIELDS}
+                                         for symbol in fetch_exchange_info()["symbols"]]
+        self._index(symbols, time.time())
+        logger.info(f"Fetched the exchange info with {len(symbols)} symbols.")
+
+        tmp_path: str = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump({"fetched_at": self._fetched_at, "symbols": symbols}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Failed to store the exchange info in {self.path}: {e}")
+
+    def _read(self) -> None:
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, "r") as f:
+                stored: dict[str, any] = json.load(f)
+            self._index(stored["symbols"], stored["fetched_at"])
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable exchange info {self.path}: {e}")
+
+    def _index(self, symbols: list[dict[str, str]], fetched_at: float) -> None:
+        by_quote_asset: dict[str, dict[str, dict[str, str]]] = {}
+        for symbol in symbols:
+            by_quote_asset.setdefault(symbol["quoteAsset"], {})[symbol["symbol"]] = symbol
+
+        # The indexes are replaced at once, readers without the lock see either the old or the new ones
+        self._symbols = {symbol["symbol"]: symbol for symbol in symbols}
+        self._by_quote_asset = by_quote_asset
+        self._fetched_at = fetched_at
+        self._next_refresh = fetched_at + self.refresh_interval
+
+
+class QuoteAssetTickers(Mapping):
+    """
+    Read only mapping of the tickers with a quote asset to their symbol, which loads the exchange info on first access.
+    """
+
+    def __init__(self, exchange_info: ExchangeInfo, quote_asset: str, suffix: bool = False):
+        """
+        :param exchange_info: The exchange info the tickers are read from.
+        :param quote_asset: The quote asset of the tickers.
+        :param suffix: Whether every quote asset ending with `quote_asset` matches, see `ExchangeInfo.tickers`.
+        """
+        self.exchange_info: ExchangeInfo = exchange_info
+        self.quote_asset: str = quote_asset
+        self.suffix: bool = suffix
+
+    def __getitem__(self, ticker: str) -> dict[str, str]:
+        return self.exchange_info.tickers(self.quote_asset, self.suffix)[ticker]
+
+    def __contains__(self, ticker: object) -> bool:
+        return ticker in self.exchange_info.tickers(self.quote_asset, self.suffix)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.exchange_info.tickers(self.quote_asset, self.suffix))
+
+    def __len__(self) -> int:
+        return len(self.exchange_info.tickers(self.quote_asset, self.suffix))
+
+
+exchange_info: ExchangeInfo = ExchangeInfo.from_config()
@@ -1,18 +1,21 @@
 from time import timezone
 from typing import Optional
+import json
 import time
-from requests import Response, get
+from requests import Response
 from datetime import datetime, timezone
 from tzlocal import get_localzone
 
 from pandas import DataFrame, to_datetime, concat
 from dateutil.relativedelta import relativedelta
 
+from src.api.transport import get_transport
 from src.api.utils import handle_binance_status
 
-url_fetch_ticker_price: str = "https://api.binance.com/api/v3/ticker/price"
-url_fetch_klines: str = "https://api.binance.com/api/v3/klines"
-url_fetch_exchange_info: str = "https://api.binance.com/api/v3/exchangeInfo"
+# The endpoints are requested through the transport, which owns the host, see `src.api.transport`
+endpoint_ticker_price: str = "/api/v3/ticker/price"
+endpoint_klines: str = "/api/v3/klines"
+endpoint_exchange_info: str = "/api/v3/exchangeInfo"
 
 unix_utc_offset: int = int(datetime.now(get_localzone()).utcoffset().total_seconds()) * 1000
 
@@ -37,7 +40,7 @@ def fetch_ticker_price(ticker) -> float:
     param: dict = {
         'symbol': ticker
     }
-    response: Response = get(url_fetch_ticker_price, params=param)
+    response: Response = get_transport().get(endpoint_ticker_price, params=param)
     data: dict = response.json()
 
     handle_binance_status(response.status_code, data)
@@ -45,8 +48,27 @@ def fetch_ticker_price(ticker) -> float:
     return float(data["price"])
 
 
+def fetch_ticker_prices(tickers: Optional[list[str]] = None) -> dict[str, float]:
+    """
+    Retrieves the prices of many tickers with one request.
+
+    :param tickers: The tickers to fetch, all tickers of Binance if not given.
+    :return: The prices in the format of {ticker: price}
+    """
+    params: dict = {}
+    if tickers is not None:
+        params["symbols"] = json.dumps(sorted(set(tickers)), separators=(",", ":"))
+
+    response: Response = get_transport().get(endpoint_ticker_price, params=params)
+    data: list[dict] = response.json()
+
+    handle_binance_status(response.status_code, data)
+
+    return {price["symbol"]: float(price["price"]) for price in data}
+
+
 def fetch_exchange_info(tickers: Optional[list[str]] = None) -> dict:
-    response: Response = get(url_fetch_exchange_info)
+    response: Response = get_transport().get(endpoint_exchange_info)
 
     data: dict = response.json()
 
@@ -153,7 +175,7 @@ def fetch_klines(
             'limit': limit
         }
 
-        response: Response = get(url_fetch_klines, params=params)
+        response: Response = get_transport().get(endpoint_klines, params=params)
 
         data = response.json()
 
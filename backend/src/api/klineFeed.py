@@ -0,0 +1,214 @@
+import threading
+import time
+from datetime import datetime, timezone
+from logging import getLogger
+from typing import Iterable, Optional
+
+import numpy as np
+from pandas import DataFrame, concat
+
+from src.api.fetchData import fetch_klines
+from src.api.utils import base_interval, interval_ms, interval_offset_ms, resample_klines
+
+logger = getLogger("oracle.app")
+
+time_format: str = "%Y-%m-%d %H:%M:%S"
+
+
+class KlineFeed:
+    """
+    The klines of one ticker in every interval its consumers need, fetched as one stream.
+
+    Only the klines of the base interval, the coarsest native interval every requested interval can be resampled
+    from, are fetched. All other intervals, including ones Binance doesn't serve like '7m' or '45m', are resampled
+    from them. `update` only fetches the base klines since the latest one and only resamples the buckets they fall in.
+
+    Buckets which started before the first base kline are left out, as they would be missing klines.
+
+    `load` reads the base klines stored in the shared `candles` table first and only fetches the ones missing
+    before and after them, the fetched closed klines are stored for the next load.
+    """
+
+    def __init__(self, ticker: str, intervals: Iterable[str], use_store: bool = True):
+        """
+        :param ticker: The ticker of the klines.
+        :param intervals: The fixed width intervals the feed serves.
+        :param use_store: Whether `load` reads and writes the stored candles.
+        """
+        self.ticker: str = ticker
+        self.intervals: frozenset[str] = frozenset(intervals)
+        self.base_interval: str = base_interval(self.intervals)
+        self.use_store: bool = use_store
+
+        self._base: Optional[DataFrame] = None
+        self._frames: dict[str, DataFrame] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def load(self, days: float = 0, start: Optional[str] = None, end: Optional[str] = None) -> None:
+        """
+        Loads the base klines, see `fetch_klines`. Stored klines are read from the `candles` table,
+        only the klines before and after them are fetched.
+
+        :param days: The number of days to go back from now, ignored if `start` is given.
+        :param start: The UTC start time in the format 'YYYY-MM-DD HH:MM:SS' (optional).
+        :param end: The UTC end time in the format 'YYYY-MM-DD HH:MM:SS' (optional).
+        """
+        stored: Optional[DataFrame] = self._load_stored(days, start, end) if self.use_store else None
+
+        if stored is None:
+            base: DataFrame = fetch_klines(
+                ticker=self.ticker,
+                interval=self.base_interval,
+                start=start,
+                end=end,
+                days=days if start is None else 0,
+                is_utc_time=start is not None
+            )
+            self._store(base)
+        else:
+            base: DataFrame = self._complete(stored, days, start, end)
+
+        with self._lock:
+            self._base = base
+            self._frames = {}
+
+    def _range_ms(self, days: float, start: Optional[str], end: Optional[str]) -> tuple[int, int]:
+        def to_ms(timestamp: str) -> int:
+            return int(datetime.strptime(timestamp, time_format).replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+        end_ms: int = to_ms(end) if end is not None else int(time.time() * 1000)
+        start_ms: int = to_ms(start) if start is not None else end_ms - int(days * 24 * 60 * 60 * 1000)
+        return start_ms, end_ms
+
+    def _load_stored(self, days: float, start: Optional[str], end: Optional[str]) -> Optional[DataFrame]:
+        """
+        :return: The stored base klines of the range or None if there are none, or they have gaps.
+        """
+        # Imported here, so importing `src.api` doesn't load the database layer
+        from src.database import load_candles
+
+        start_ms, end_ms = self._range_ms(days, start, end)
+        try:
+            stored: DataFrame = load_candles(self.ticker, self.base_interval, start=start_ms, end=end_ms)
+        except Exception as e:
+            logger.warning(f"Failed to read the stored {self.base_interval} candles of {self.ticker}: {e}")
+            return None
+
+        if stored.empty:
+            return None
+        # Klines missing in between would be fetched anyway, so the whole range is fetched instead
+        if (np.diff(stored["OpenTime"].to_numpy(dtype="int64")) != interval_ms(self.base_interval)).any():
+            logger.debug(f"The stored {self.base_interval} candles of {self.ticker} have gaps, fetching all.")
+            return None
+
+        return stored.astype(float)
+
+    def _complete(self, stored: DataFrame, days: float, start: Optional[str], end: Optional[str]) -> DataFrame:
+        """
+        Fetches the base klines of the range before and after the stored ones.
+        """
+        start_ms, end_ms = self._range_ms(days, start, end)
+        width: int = interval_ms(self.base_interval)
+        first_open: int = int(stored["OpenTime"].iloc[0])
+        last_open: int = int(stored["OpenTime"].iloc[-1])
+
+        def fetch(from_ms: int, to_ms: Optional[int]) -> DataFrame:
+            fetched: DataFrame = fetch_klines(
+                ticker=self.ticker,
+                interval=self.base_interval,
+                start=datetime.fromtimestamp(from_ms / 1000, timezone.utc).strftime(time_format),
+                end=datetime.fromtimestamp(to_ms / 1000, timezone.utc).strftime(time_format) if to_ms is not None else None,
+                is_utc_time=True
+            )
+            self._store(fetched)
+            return fetched
+
+        parts: list[DataFrame] = []
+        if first_open - width >= start_ms:
+            head: DataFrame = fetch(start_ms, first_open - 1000)
+            parts.append(head[head["OpenTime"] < first_open])
+        parts.append(stored)
+        if last_open + width <= end_ms:
+            tail: DataFrame = fetch(last_open + width, end_ms if end is not None else None)
+            parts.append(tail[tail["OpenTime"] > last_open])
+
+        parts = [part for part in parts if not part.empty]
+        logger.debug(f"Loaded {len(stored)} stored and fetched {sum(map(len, parts)) - len(stored)} "
+                     f"{self.base_interval} klines of {self.ticker}.")
+        return concat(parts) if len(parts) > 1 else stored
+
+    def _store(self, klines: DataFrame) -> None:
+        if not self.use_store or klines.empty:
+            return
+
+        from src.database import store_candles
+
+        try:
+            store_candles(self.ticker, self.base_interval, klines)
+        except Exception as e:
+            logger.warning(f"Failed to store the {self.base_interval} candles of {self.ticker}: {e}")
+
+    def update(self, days: Optional[float] = None) -> int:
+        """
+        Fetches the base klines since the latest one, which is fetched again as it may still have been open.
+
+        :param days: Drops the klines older than this number of days before the latest one (optional).
+
+        :return: The amount of fetched base klines.
+        """
+        if self._base is None or self._base.empty:
+            self.load(days=days or 0)
+            return len(self._base)
+
+        new: DataFrame = fetch_klines(
+            ticker=self.ticker,
+            interval=self.base_interval,
+            start=self._base.index[-1].strftime(time_format),
+            is_utc_time=True
+        )
+        new = new[new["OpenTime"] >= self._base["OpenTime"].iloc[-1]]
+        if new.empty:
+            return 0
+
+        with self._lock:
+            first_new: int = int(new["OpenTime"].iloc[0])
+            base: DataFrame = concat([self._base[self._base["OpenTime"] < first_new], new])
+            if days is not None:
+                base = base[base["OpenTime"] >= base["OpenTime"].iloc[-1] - days * 24 * 60 * 60 * 1000]
+            self._base = base
+
+            first_open: int = int(base["OpenTime"].iloc[0])
+            for interval, frame in self._frames.items():
+                width: int = interval_ms(interval)
+                offset: int = interval_offset_ms(interval)
+                # Only the bucket of the first new kline and later ones change
+                bucket_open: int = (first_new - offset) // width * width + offset
+                resampled: DataFrame = resample_klines(base[base["OpenTime"] >= bucket_open], interval)
+                frame = concat([frame[frame["OpenTime"] < bucket_open], resampled])
+                self._frames[interval] = frame[frame["OpenTime"] >= first_open]
+
+        logger.debug(f"Updated the {self.base_interval} klines of {self.ticker} with {len(new)} klines.")
+        return len(new)
+
+    def klines(self, interval: str) -> DataFrame:
+        """
+        :param interval: One of the intervals of the feed.
+
+        :return: The klines of the interval with the columns and index of `fetch_klines`.
+        """
+        if interval not in self.intervals:
+            raise ValueError(f"The feed of {self.ticker} doesn't serve the interval '{interval}'.")
+
+        with self._lock:
+            if interval == self.base_interval:
+                return self._base.copy()
+
+            frame: Optional[DataFrame] = self._frames.get(interval)
+            if frame is None:
+                frame = resample_klines(self._base, interval)
+                if not frame.empty:
+                    frame = frame[frame["OpenTime"] >= self._base["OpenTime"].iloc[0]]
+                self._frames[interval] = frame
+
+            # Consumers may add columns, the cached frame must not change
+            return frame.copy()
@@ -0,0 +1,104 @@
+import threading
+import time
+from logging import getLogger
+from typing import Iterable, Optional
+
+from src.api.fetchData import fetch_ticker_prices
+from src.exceptions import DataFetchError
+from src.utils import load_config
+
+logger = getLogger("oracle.app")
+
+
+class PriceSnapshot:
+    """
+    Process wide snapshot of the prices of every ticker the profiles trade.
+
+    All tickers ever requested are fetched together with one request and the prices are reused for `ttl`
+    seconds, so every profile trading in the same tick sees the same prices and the process sends at most
+    one price request per tick. Callers requesting a new snapshot while one is fetched wait for it
+    instead of sending their own request.
+    """
+
+    def __init__(self, ttl: float = 1.0):
+        """
+        :param ttl: The seconds a snapshot is reused.
+        """
+        self.ttl: float = ttl
+
+        self._tickers: set[str] = set()
+        self._prices: dict[str, float] = {}
+        self._fetched_at: float = float("-inf")
+        self._lock: threading.Lock = threading.Lock()
+        self.requests: int = 0
+
+    @classmethod
+    def from_config(cls) -> 'PriceSnapshot':
+        """
+        Creates the snapshot from `price_snapshot` in `API_CONFIG`.
+        """
+        config: dict[str, any] = (load_config("API_CONFIG") or {}).get("price_snapshot", {})
+        return cls(ttl=config.get("ttl", 1.0))
+
+    def get(self, tickers: Iterable[str]) -> dict[str, float]:
+        """
+        Returns the prices of the tickers from the current snapshot, a new one is fetched if it expired
+        or doesn't contain every ticker yet. Tickers Binance returned no price for are left out and forgotten.
+
+        :param tickers: The tickers whose prices are needed.
+
+        :return: The prices in the format of {ticker: price}
+        """
+        tickers = set(tickers)
+        if not tickers:
+            return {}
+
+        with self._lock:
+            new_tickers: set[str] = tickers - self._tickers
+            self._tickers |= tickers
+            if time.monotonic() - self._fetched_at >= self.ttl or not tickers <= self._prices.keys():
+                try:
+                    self._prices = fetch_ticker_prices(sorted(self._tickers))
+                except Exception:
+                    # An invalid ticker fails the whole request, it must not fail the following snapshots too
+                    self._tickers -= new_tickers
+                    raise
+                self._fetched_at = time.monotonic()
+                self.requests += 1
+                logger.debug(f"Fetched a price snapshot of {len(self._prices)} tickers.")
+
+                missing_tickers: set[str] = self._tickers - self._prices.keys()
+                if missing_tickers:
+                    # E.g. delisted symbols, they would otherwise force a new snapshot on every request
+                    self._tickers -= missing_tickers
+                    logger.warning(f"No prices returned for {sorted(missing_tickers)}, they are left out.")
+
+            prices: dict[str, float] = self._prices
+
+        return {ticker: prices[ticker] for ticker in tickers if ticker in prices}
+
+    def price(self, ticker: str) -> float:
+        """
+        :return: The price of the ticker from the current snapshot.
+
+        :raises DataFetchError: If Binance returned no price for the ticker.
+        """
+        prices: dict[str, float] = self.get([ticker])
+        if ticker not in prices:
+            raise DataFetchError("No price returned for the ticker.", ticker=ticker)
+        return prices[ticker]
+
+    def forget(self, tickers: Optional[Iterable[str]] = None) -> None:
+        """
+        Stops fetching the tickers with every snapshot, e.g. after they were removed from every wallet.
+
+        :param tickers: The tickers to forget, all if not given.
+        """
+        with self._lock:
+            if tickers is None:
+                self._tickers.clear()
+            else:
+                self._tickers -= set(tickers)
+
+
+price_snapshot: PriceSnapshot = PriceSnapshot.from_config()
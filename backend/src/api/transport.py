@@ -0,0 +1,318 @@
+import bisect
+import itertools
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from logging import getLogger
+from typing import Iterator, Optional, Union
+
+from requests import Response, Session
+from requests.adapters import HTTPAdapter
+
+from src.api.weightGovernor import Priority, WeightGovernor, current_priority
+from src.exceptions import RateLimitError
+from src.utils import load_config
+
+logger = getLogger("oracle.app")
+
+# A timeout in seconds or a tuple of (connect timeout, read timeout)
+Timeout = Union[float, tuple[float, float]]
+
+
+class LatencyHistogram:
+    """
+    Thread safe histogram of request latencies with fixed buckets.
+    """
+
+    # The upper bounds of the buckets in seconds, latencies above the last one are counted in an overflow bucket
+    BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self):
+        self._lock: threading.Lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.counts: list[int] = [0] * (len(self.BUCKETS) + 1)
+        self.count: int = 0
+        self.total: float = 0
+        self.max: float = 0
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(self.BUCKETS, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """
+        :param q: The quantile between 0 and 1.
+
+        :return: The upper bound of the bucket containing the quantile, the maximum latency for the overflow bucket.
+        """
+        with self._lock:
+            if not self.count:
+                return 0
+
+            rank: float = q * self.count
+            seen: int = 0
+            for i, count in enumerate(self.counts):
+                seen += count
+                if seen >= rank and count:
+                    return self.BUCKETS[i] if i < len(self.BUCKETS) else self.max
+            return self.max
+
+    def snapshot(self) -> dict[str, any]:
+        """
+        :return: The amount, average, maximum, p50, p99 and bucket counts of the recorded latencies.
+        """
+        p50: float = self.quantile(0.5)
+        p99: float = self.quantile(0.99)
+        with self._lock:
+            return {
+                "count": self.count,
+                "avg": self.total / self.count if self.count else 0,
+                "max": self.max,
+                "p50": p50,
+                "p99": p99,
+                "buckets": {**{str(bound): count for bound, count in zip(self.BUCKETS, self.counts)},
+                            "inf": self.counts[-1]},
+            }
+
+
+class Transport:
+    """
+    The HTTP transport every Binance request goes through.
+
+    All requests share one session, which keeps the connections to the hosts alive in a pool, so only the
+    first request per pooled connection pays for the TCP and TLS handshakes. Responses are requested
+    gzip compressed and every endpoint can have its own timeout. The latency of every request is recorded
+    in a histogram per endpoint. If the transport has a weight governor, every request waits for its request weight.
+
+    Requests go to `base_url`. With mirrors, requests of at least `hedge_priority` are hedged: if the host hasn't
+    answered within the `hedge_quantile` of the latencies of the endpoint, the request is sent to the next mirror
+    as well and the first response is used. A hedge is only sent if its weight is available right away.
+
+    The hosts are only given by `base_url` and `mirrors`, so the transport can point at local stand-in servers.
+    """
+
+    def __init__(
+            self,
+            base_url: str = "https://api.binance.com",
+            pool_connections: int = 4,
+            pool_maxsize: int = 16,
+            timeout: Timeout = (3.05, 10),
+            timeouts: Optional[dict[str, Timeout]] = None,
+            compress: bool = True,
+            governor: Optional[WeightGovernor] = None,
+            mirrors: Optional[list[str]] = None,
+            hedge_priority: Priority = Priority.LIVE,
+            hedge_quantile: float = 0.95,
+            hedge_delay: float = 0.25,
+            hedge_min_samples: int = 20
+    ):
+        """
+        :param base_url: The scheme and host the endpoints are requested from.
+        :param pool_connections: The amount of hosts whose connections are pooled.
+        :param pool_maxsize: The amount of connections kept alive per host, should cover the concurrent requests.
+        :param timeout: The default timeout of the requests.
+        :param timeouts: The timeouts of specific endpoints in the format of {endpoint: timeout} (optional).
+        :param compress: Whether to request gzip compressed responses.
+        :param governor: The governor of the request weights (optional).
+        :param mirrors: Equivalent hosts the hedged requests are sent to, no requests are hedged if not given.
+        :param hedge_priority: The lowest priority of the requests which are hedged.
+        :param hedge_quantile: The latency quantile of an endpoint after which a request is hedged.
+        :param hedge_delay: The seconds after which a request is hedged while an endpoint has too few latencies.
+        :param hedge_min_samples: The amount of latencies of an endpoint from which its quantile is used.
+        """
+        self.base_url: str = base_url.rstrip("/")
+        self.mirrors: list[str] = [mirror.rstrip("/") for mirror in mirrors or []]
+        self.timeout: Timeout = timeout
+        self.timeouts: dict[str, Timeout] = dict(timeouts or {})
+        self.governor: Optional[WeightGovernor] = governor
+        self.hedge_priority: Priority = hedge_priority
+        self.hedge_quantile: float = hedge_quantile
+        self.hedge_delay: float = hedge_delay
+        self.hedge_min_samples: int = hedge_min_samples
+        self.hedges: int = 0
+        self.hedge_wins: int = 0
+
+        self.session: Session = Session()
+        adapter: HTTPAdapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Accept-Encoding"] = "gzip, deflate" if compress else "identity"
+
+        self._latencies: dict[str, LatencyHistogram] = {}
+        self._latencies_lock: threading.Lock = threading.Lock()
+        self._mirror_index: Iterator[int] = itertools.count()
+        self._executor: Optional[ThreadPoolExecutor] = (
+            ThreadPoolExecutor(max_workers=pool_maxsize, thread_name_prefix="hedged-request") if self.mirrors else None
+        )
+
+    @classmethod
+    def from_config(cls) -> 'Transport':
+        """
+        Creates the transport from `transport` in `API_CONFIG` with the governor of `weight_governor`.
+        """
+        api_config: dict[str, any] = load_config("API_CONFIG") or {}
+        config: dict[str, any] = api_config.get("transport", {})
+        hedging: dict[str, any] = config.get("hedging", {})
+        timeouts: dict[str, Timeout] = {endpoint: tuple(timeout) if isinstance(timeout, list) else timeout
+                                        for endpoint, timeout in config.get("timeouts", {}).items()}
+        timeout: Timeout = config.get("timeout", (3.05, 10))
+        return cls(
+            base_url=config.get("base_url", "https://api.binance.com"),
+            pool_connections=config.get("pool_connections", 4),
+            pool_maxsize=config.get("pool_maxsize", 16),
+            timeout=tuple(timeout) if isinstance(timeout, list) else timeout,
+            timeouts=timeouts,
+            compress=config.get("compress", True),
+            governor=WeightGovernor.from_config() if api_config.get("weight_governor", {}).get("enabled", True) else None,
+            mirrors=config.get("mirrors") if hedging.get("enabled", True) else None,
+            hedge_priority=Priority[hedging.get("priority", "LIVE")],
+            hedge_quantile=hedging.get("quantile", 0.95),
+            hedge_delay=hedging.get("delay", 0.25),
+            hedge_min_samples=hedging.get("min_samples", 20),
+        )
+
+    def get(self, endpoint: str, params: Optional[dict] = None) -> Response:
+        """
+        Sends a GET request to an endpoint, hedged if it has mirrors and a high enough priority.
+        Of hedged requests the first successful response is used, an error response only if every attempt failed.
+
+        :param endpoint: The path of the endpoint, e.g. "/api/v3/klines".
+        :param params: The query parameters (optional).
+
+        :return: The response, its status is not checked.
+
+        :raises RateLimitError: If the weight of the request wasn't available within `max_wait` of the governor.
+        """
+        weight: int = 0
+        if self.governor is not None:
+            weight = self.governor.weight(endpoint, params)
+            self.governor.acquire(weight)
+
+        if self._executor is None or current_priority() > self.hedge_priority:
+            return self._send(self.base_url, endpoint, params)
+
+        futures: list[Future] = [self._executor.submit(self._send, self.base_url, endpoint, params)]
+        done, _ = wait(futures, timeout=self._hedge_delay(endpoint))
+        if not done and self._acquire_hedge(weight):
+            mirror: str = self.mirrors[next(self._mirror_index) % len(self.mirrors)]
+            futures.append(self._executor.submit(self._send, mirror, endpoint, params))
+            self.hedges += 1
+
+        error: Optional[BaseException] = None
+        failed_response: Optional[Response] = None
+        pending: set[Future] = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = error or future.exception()
+                    continue
+
+                response: Response = future.result()
+                # An error response, e.g. a 503 or 429 of a mirror, must not win over a slower valid one
+                if not 200 <= response.status_code < 300:
+                    failed_response = failed_response or response
+                    continue
+
+                if future is not futures[0]:
+                    self.hedge_wins += 1
+                # The slower request finishes in the background, its response only updates the governor
+                return response
+
+        if failed_response is not None:
+            return failed_response
+        raise error
+
+    def latencies(self) -> dict[str, dict[str, any]]:
+        """
+        :return: The latency histogram of every requested endpoint, see `LatencyHistogram.snapshot`.
+        """
+        with self._latencies_lock:
+            histograms: dict[str, LatencyHistogram] = dict(self._latencies)
+        return {endpoint: histogram.snapshot() for endpoint, histogram in histograms.items()}
+
+    def close(self) -> None:
+        """
+        Closes the pooled connections.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        self.session.close()
+
+    def _send(self, base_url: str, endpoint: str, params: Optional[dict]) -> Response:
+        start: float = time.perf_counter()
+        try:
+            response: Response = self.session.get(base_url + endpoint, params=params,
+                                                  timeout=self.timeouts.get(endpoint, self.timeout))
+        finally:
+            self._histogram(endpoint).record(time.perf_counter() - start)
+
+        if self.governor is not None:
+            self.governor.observe(response)
+        return response
+
+    def _hedge_delay(self, endpoint: str) -> float:
+        histogram: LatencyHistogram = self._histogram(endpoint)
+        if histogram.count < self.hedge_min_samples:
+            return self.hedge_delay
+        return histogram.quantile(self.hedge_quantile)
+
+    def _acquire_hedge(self, weight: int) -> bool:
+        if self.governor is None:
+            return True
+
+        # A hedge must never delay other requests, it is skipped if its weight isn't available right away
+        try:
+            self.governor.acquire(weight, timeout=0)
+        except RateLimitError:
+            return False
+        return True
+
+    def _histogram(self, endpoint: str) -> LatencyHistogram:
+        histogram: Optional[LatencyHistogram] = self._latencies.get(endpoint)
+        if histogram is None:
+            with self._latencies_lock:
+                histogram = self._latencies.setdefault(endpoint, LatencyHistogram())
+        return histogram
+
+
+_transport: Optional[Transport] = None
+_transport_lock: threading.Lock = threading.Lock()
+
+
+def get_transport() -> Transport:
+    """
+    Returns the transport of the process, it is created from the config on first use.
+    """
+    global _transport
+    if _transport is not None:
+        return _transport
+
+    with _transport_lock:
+        if _transport is None:
+            _transport = Transport.from_config()
+            logger.debug(f"Created the HTTP transport for {_transport.base_url}.")
+
+    return _transport
+
+
+def set_transport(transport: Optional[Transport]) -> Optional[Transport]:
+    """
+    Replaces the transport of the process, e.g. with one pointing at local stand-in servers.
+    The replaced transport isn't closed.
+
+    :param transport: The new transport, None to create it from the config on next use.
+
+    :return: The replaced transport.
+    """
+    global _transport
+    with _transport_lock:
+        previous: Optional[Transport] = _transport
+        _transport = transport
+
+    return previous
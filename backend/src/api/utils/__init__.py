@@ -1,2 +1,3 @@
-from .modifyData import compress_data, determine_interval  # type: ignore
-from .handleStatus import handle_binance_status
\ No newline at end of file
+from .modifyData import (compress_data, determine_interval, base_interval, interval_ms, interval_offset_ms,  # type: ignore
+                         resample_klines, NATIVE_INTERVALS)
+from .handleStatus import handle_binance_status
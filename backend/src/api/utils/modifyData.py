@@ -1,5 +1,133 @@
+import math
+from functools import reduce
+from typing import Iterable, Optional
+
+import numpy as np
 import pandas as pd
 
+# The seconds of the units of the fixed width intervals, months have no fixed width
+INTERVAL_UNITS: dict[str, int] = {
+    "s": 1,
+    "m": 60,
+    "h": 60 * 60,
+    "d": 24 * 60 * 60,
+    "w": 7 * 24 * 60 * 60,
+}
+
+# The fixed width intervals Binance serves klines in, from the finest to the coarsest
+NATIVE_INTERVALS: list[str] = ["1s", "1m", "3m", "5m", "15m", "30m", "1h", "2h", "4h", "6h", "8h", "12h", "1d", "3d", "1w"]
+
+# The pandas frequencies of the units and the factor of the amount, weeks are given in days as "W" is anchored to Sundays
+_FREQUENCIES: dict[str, tuple[str, int]] = {"s": ("s", 1), "m": ("min", 1), "h": ("h", 1), "d": ("D", 1), "w": ("D", 7)}
+
+# Binance opens weekly klines on Mondays, the unix epoch was a Thursday
+_WEEK_OFFSET_MS: int = 4 * 24 * 60 * 60 * 1000
+
+# How the columns of a bucket are reduced, columns which aren't listed are summed up
+_FIRST_COLUMNS: set[str] = {"Open"}
+_LAST_COLUMNS: set[str] = {"Close"}
+_MAX_COLUMNS: set[str] = {"High"}
+_MIN_COLUMNS: set[str] = {"Low"}
+
+
+def interval_ms(interval: str) -> int:
+    """
+    :param interval: A fixed width interval like '1m', '7m', '4h' or '1w'.
+
+    :return: The width of the interval in milliseconds.
+
+    :raises ValueError: If the interval has no fixed width, e.g. '1M'.
+    """
+    amount, unit = interval[:-1], interval[-1]
+    if not amount.isdigit() or int(amount) == 0 or unit not in INTERVAL_UNITS:
+        raise ValueError(f"Interval '{interval}' has no fixed width.")
+
+    return int(amount) * INTERVAL_UNITS[unit] * 1000
+
+
+def interval_offset_ms(interval: str) -> int:
+    """
+    :return: The offset of the bucket boundaries of the interval from the unix epoch in milliseconds.
+    """
+    return _WEEK_OFFSET_MS if interval[-1] == "w" else 0
+
+
+def base_interval(intervals: Iterable[str]) -> str:
+    """
+    Finds the coarsest native interval every interval can be resampled from.
+
+    :param intervals: Fixed width intervals, e.g. the intervals of the Trading Components of a ticker.
+
+    :return: The native interval to fetch.
+    """
+    intervals = list(intervals)
+    width: int = reduce(math.gcd, (interval_ms(interval) for interval in intervals))
+    offsets: set[int] = {interval_offset_ms(interval) for interval in intervals}
+
+    for native in reversed(NATIVE_INTERVALS):
+        native_width: int = interval_ms(native)
+        if width % native_width == 0 and all((offset - interval_offset_ms(native)) % native_width == 0 for offset in offsets):
+            return native
+
+    return NATIVE_INTERVALS[0]
+
+
+def resample_klines(data_frame: pd.DataFrame, interval: str, origin: Optional[int] = None) -> pd.DataFrame:
+    """
+    Resamples klines into a coarser interval with one reduction per column over the sorted rows, so any fixed
+    width interval, native or not, can be derived from the klines of a finer one.
+
+    The Open of a bucket is its first Open, the Close its last Close, the High and Low the extremes and every other
+    column, e.g. the volumes, is summed up. `OpenTime` and `CloseTime` are set to the bounds of the bucket.
+
+    :param data_frame: The klines ordered by their time index, e.g. as returned by `fetch_klines`.
+    :param interval: The fixed width interval to resample into.
+    :param origin: A unix timestamp in milliseconds the buckets are aligned to,
+                   defaults to the boundaries Binance uses for the interval.
+
+    :return: The klines of the interval with one row per bucket containing at least one kline.
+    """
+    width: int = interval_ms(interval)
+    origin = interval_offset_ms(interval) if origin is None else origin
+    if data_frame.empty:
+        return data_frame.copy()
+
+    index: pd.DatetimeIndex = data_frame.index
+    timestamps: np.ndarray = (index.as_unit("ms").asi8 if "OpenTime" not in data_frame.columns
+                              else data_frame["OpenTime"].to_numpy(dtype="int64"))
+
+    buckets: np.ndarray = (timestamps - origin) // width
+    starts: np.ndarray = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends: np.ndarray = np.r_[starts[1:], len(buckets)] - 1
+    open_times: np.ndarray = buckets[starts] * width + origin
+
+    columns: dict[str, np.ndarray] = {}
+    for column in data_frame.columns:
+        values: np.ndarray = data_frame[column].to_numpy()
+        if column == "OpenTime":
+            columns[column] = open_times.astype(values.dtype)
+        elif column == "CloseTime":
+            columns[column] = (open_times + width - 1).astype(values.dtype)
+        elif column in _FIRST_COLUMNS:
+            columns[column] = values[starts]
+        elif column in _LAST_COLUMNS:
+            columns[column] = values[ends]
+        elif column in _MAX_COLUMNS:
+            columns[column] = np.maximum.reduceat(values, starts)
+        elif column in _MIN_COLUMNS:
+            columns[column] = np.minimum.reduceat(values, starts)
+        else:
+            columns[column] = np.add.reduceat(values, starts)
+
+    new_index: pd.DatetimeIndex = pd.to_datetime(open_times, unit="ms").as_unit(index.unit)
+    new_index = new_index.tz_localize(index.tz) if index.tz is not None else new_index
+    if len(new_index) > 1 and np.all(np.diff(open_times) == width):
+        # Regular buckets keep the frequency of the interval, like native klines
+        alias, factor = _FREQUENCIES[interval[-1]]
+        new_index = pd.DatetimeIndex(new_index, freq=f"{int(interval[:-1]) * factor}{alias}")
+
+    return pd.DataFrame(columns, index=new_index.rename(index.name))
+
 
 def determine_interval(interval: str) -> str:
     """
@@ -35,40 +163,14 @@ def determine_interval(interval: str) -> str:
 
 def compress_data(data_frame: pd.DataFrame, interval: str) -> pd.DataFrame:
     """
-    The first three char of interval  are numbers => 00
-    The fourth char of interval is unit of time =>  m:minute / h : hour
+    Compresses the data into a coarser interval, aligned to the first row.
+
+    :param data_frame: The data ordered by its time index.
+    :param interval: The interval to compress into, data of a native interval is returned as is.
+
+    :return: The compressed data, see `resample_klines`.
     """
     if interval == determine_interval(interval):
         return data_frame
 
-    compress_amount: int = int(interval[:-1])
-    n_interval: int = int(compress_amount)
-
-    new_data_frame: pd.DataFrame = pd.DataFrame()
-
-    for n in range(0, int((len(data_frame) + 1) / n_interval), n_interval):
-        timestr: str = data_frame.index[n].strftime("%Y-%m-%d %X")
-        idx: list = [
-            pd.Timestamp(
-                year=int(timestr[0:4]),
-                month=int(timestr[5:7]),
-                day=int(timestr[8:10]),
-                hour=int(timestr[11:13]),
-                minute=int(timestr[14:16]),
-                second=int(timestr[17:19]),
-            )
-        ]
-
-        data: dict[str, list] = {
-            "Open": [data_frame.Open.iloc[n]],
-            "Close": [data_frame.Close.iloc[n + n_interval - 1]],
-            "High": [data_frame.High.iloc[n : n + n_interval].max()],
-            "Low": [data_frame.Low.iloc[n : n + n_interval].min()],
-            "Dividends": [0],
-        }
-
-        new_data_frame: pd.DataFrame = new_data_frame._append(
-            pd.DataFrame(data, index=pd.Index(idx))
-        )
-
-    return new_data_frame
+    return resample_klines(data_frame, interval, origin=int(data_frame.index[0].value // 1_000_000))
@@ -0,0 +1,238 @@
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from logging import getLogger
+from typing import Iterator, Optional
+
+from requests import Response
+
+from src.exceptions import RateLimitError
+from src.utils import load_config
+
+logger = getLogger("oracle.app")
+
+# The header in which Binance returns the request weight used by the IP in the current minute
+USED_WEIGHT_HEADER: str = "X-MBX-USED-WEIGHT-1M"
+
+# The request weights of the endpoints, see the Binance spot API docs
+DEFAULT_WEIGHTS: dict[str, int] = {
+    "/api/v3/klines": 2,
+    "/api/v3/exchangeInfo": 20,
+}
+
+
+class Priority(IntEnum):
+    """
+    The priority of a request, lower values are served first.
+    """
+    LIVE = 0
+    DEFAULT = 1
+    BACKTEST = 2
+
+
+_priority: ContextVar[Priority] = ContextVar("request_priority", default=Priority.DEFAULT)
+
+
+@contextmanager
+def request_priority(priority: Priority) -> Iterator[None]:
+    """
+    Sets the priority of the requests sent inside the block, also usable as decorator.
+
+    :param priority: The priority of the requests.
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> Priority:
+    """
+    :return: The priority of the requests sent from the current context, see `request_priority`.
+    """
+    return _priority.get()
+
+
+class WeightGovernor:
+    """
+    Keeps the request weight of the process below the Binance limit.
+
+    The weight is managed in a token bucket holding `headroom` of the limit, which refills evenly over the limit
+    interval. Every request takes its weight before it's sent, callers which don't fit wait in a queue, ordered by
+    their priority and then by their arrival. After every response the bucket is lowered to the weight Binance
+    reports as still unused, which covers every process sending requests from the same IP.
+
+    A 429 or 418 response trips the circuit breaker, which stops all requests for the `Retry-After` of the
+    response or an exponential backoff and empties the bucket.
+    """
+
+    def __init__(
+            self,
+            limit: int = 6000,
+            interval: float = 60,
+            headroom: float = 0.9,
+            weights: Optional[dict[str, int]] = None,
+            default_weight: int = 2,
+            backoff: float = 1,
+            max_backoff: float = 300,
+            max_wait: Optional[float] = None
+    ):
+        """
+        :param limit: The request weight Binance allows per interval.
+        :param interval: The seconds of the limit interval.
+        :param headroom: The fraction of the limit which may be used.
+        :param weights: Weights of endpoints which replace the defaults in the format of {endpoint: weight} (optional).
+        :param default_weight: The weight of endpoints without a known weight.
+        :param backoff: The seconds the circuit breaker stays open after the first trip without `Retry-After`.
+        :param max_backoff: The longest backoff in seconds.
+        :param max_wait: The default of the longest time in seconds `acquire` waits, unlimited if not given.
+        """
+        self.capacity: float = limit * headroom
+        self.refill_rate: float = self.capacity / interval
+        self.weights: dict[str, int] = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.default_weight: int = default_weight
+        self.backoff: float = backoff
+        self.max_backoff: float = max_backoff
+        self.max_wait: Optional[float] = max_wait
+
+        self.tokens: float = self.capacity
+        self.trips: int = 0
+        self._updated: float = time.monotonic()
+        self._open_until: float = 0
+        self._condition: threading.Condition = threading.Condition()
+        self._waiters: list[tuple[int, int]] = []
+        self._tickets: Iterator[int] = itertools.count()
+
+    @classmethod
+    def from_config(cls) -> 'WeightGovernor':
+        """
+        Creates the governor from `weight_governor` in `API_CONFIG`.
+        """
+        config: dict[str, any] = (load_config("API_CONFIG") or {}).get("weight_governor", {})
+        return cls(
+            limit=config.get("limit", 6000),
+            interval=config.get("interval", 60),
+            headroom=config.get("headroom", 0.9),
+            weights=config.get("weights"),
+            default_weight=config.get("default_weight", 2),
+            backoff=config.get("backoff", 1),
+            max_backoff=config.get("max_backoff", 300),
+            max_wait=config.get("max_wait"),
+        )
+
+    def weight(self, endpoint: str, params: Optional[dict] = None) -> int:
+        """
+        :return: The request weight of a request to the endpoint with the parameters.
+        """
+        if endpoint == "/api/v3/ticker/price" and endpoint not in self.weights:
+            # A single symbol costs 2, many or all symbols 4
+            return 2 if params and "symbol" in params else 4
+        return self.weights.get(endpoint, self.default_weight)
+
+    def acquire(self, weight: int, priority: Optional[Priority] = None, timeout: Optional[float] = None) -> None:
+        """
+        Waits until the weight is available and the circuit breaker is closed and takes the weight.
+
+        :param weight: The request weight.
+        :param priority: The priority of the request, defaults to the one set by `request_priority`.
+        :param timeout: The longest time to wait in seconds, defaults to `max_wait`.
+
+        :raises RateLimitError: If the weight wasn't available within the timeout.
+        """
+        priority = _priority.get() if priority is None else priority
+        timeout = self.max_wait if timeout is None else timeout
+        deadline: Optional[float] = None if timeout is None else time.monotonic() + timeout
+
+        with self._condition:
+            ticket: tuple[int, int] = (priority, next(self._tickets))
+            heapq.heappush(self._waiters, ticket)
+            try:
+                while True:
+                    now: float = time.monotonic()
+                    self._refill(now)
+
+                    if self._waiters[0] == ticket:
+                        # A weight above the capacity waits for a full bucket, it would never fit otherwise
+                        missing: float = min(weight, self.capacity) - self.tokens
+                        if now >= self._open_until and missing <= 0:
+                            self.tokens -= weight
+                            return
+                        wait: Optional[float] = max(self._open_until - now, missing / self.refill_rate)
+                    else:
+                        # Only the first waiter takes weight, the others are woken when it's done
+                        wait: Optional[float] = None
+
+                    if deadline is not None:
+                        if now >= deadline:
+                            raise RateLimitError(weight=weight, priority=priority.name, tokens=self.tokens,
+                                                 open_for=max(self._open_until - now, 0))
+                        wait = deadline - now if wait is None else min(wait, deadline - now)
+
+                    self._condition.wait(wait)
+            finally:
+                self._waiters.remove(ticket)
+                heapq.heapify(self._waiters)
+                self._condition.notify_all()
+
+    def observe(self, response: Response) -> None:
+        """
+        Updates the bucket with the used weight reported by the response and trips the circuit breaker
+        if the response is a 429 or 418.
+        """
+        used: Optional[str] = response.headers.get(USED_WEIGHT_HEADER)
+
+        with self._condition:
+            if used is not None:
+                self._refill(time.monotonic())
+                self.tokens = min(self.tokens, self.capacity - float(used))
+
+            if response.status_code in (418, 429):
+                retry_after: Optional[str] = response.headers.get("Retry-After")
+                self._trip(response.status_code, float(retry_after) if retry_after is not None else None)
+            elif response.status_code < 400:
+                self.trips = 0
+
+    def trip(self, status_code: int, retry_after: Optional[float] = None) -> None:
+        """
+        Opens the circuit breaker, no weight is handed out until it closes again.
+
+        :param status_code: The status code which tripped the breaker.
+        :param retry_after: The seconds to wait, an exponential backoff of the successive trips if not given.
+        """
+        with self._condition:
+            self._trip(status_code, retry_after)
+
+    def status(self) -> dict[str, any]:
+        """
+        :return: The available weight, the amount of waiting callers and the seconds the circuit breaker stays open.
+        """
+        with self._condition:
+            now: float = time.monotonic()
+            self._refill(now)
+            return {
+                "tokens": self.tokens,
+                "capacity": self.capacity,
+                "waiting": len(self._waiters),
+                "open_for": max(self._open_until - now, 0),
+                "trips": self.trips,
+            }
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.refill_rate)
+        self._updated = now
+
+    def _trip(self, status_code: int, retry_after: Optional[float]) -> None:
+        self.trips += 1
+        if retry_after is None:
+            retry_after = min(self.max_backoff, self.backoff * 2 ** (self.trips - 1))
+
+        self._refill(time.monotonic())
+        self._open_until = max(self._open_until, time.monotonic() + retry_after)
+        self.tokens = min(self.tokens, 0)
+        logger.warning(f"Binance rate limited the requests ({status_code}), pausing them for {retry_after} seconds.")
+        self._condition.notify_all()
@@ -30,6 +30,12 @@ def init_app():
 
     atexit.register(stop_app)
 
+    from src.database import migrate
+
+    # The database layer doesn't migrate on its own, so the schema is brought up to date before it is used
+    applied: list[str] = migrate()
+    logger.info(f"Database Schema Migrated Successfully, {len(applied)} steps applied...")
+
     from src.services import init_service
 
     logger.info("Initializing Oracle...")
@@ -42,21 +48,42 @@ def init_app():
 
     logger.info("All Profiles Registered Successfully...")
 
+    from src.database import order_journal
+
+    # Loads fills which were journaled but not yet inserted before the last shutdown
+    order_journal.start()
+    logger.info("Order Journal Started Successfully...")
+
+    from src.database import change_notifier
+
+    # Applies the changes other processes, e.g. the CLI, make to the loaded profiles
+    change_notifier.start()
+    logger.info("Change Listener Started Successfully...")
+
 
 
 def stop_app():
-    from src.database import engine
+    from src.database import change_notifier, dispose_engine, get_pool_metrics, order_journal, write_behind_queue
 
     logger = logging.getLogger("oracle.app")
 
+    change_notifier.stop()
 
     for profile in profile_registry.get().values():
         profile.change_status(Status.INACTIVE)
 
     logger.info("All Profiles Deactivated Successfully...")
 
+    if write_behind_queue.stop():
+        logger.info("Pending Profile Updates Written Successfully...")
+    else:
+        logger.error("Failed to write all pending Profile Updates!")
+
+    order_journal.stop()
+    logger.info("Order Journal Loaded Successfully...")
 
-    engine.dispose()
+    logger.info(f"Database Pool Metrics: {get_pool_metrics()}")
+    dispose_engine()
     logger.info("Database Disposed Successfully...")
 
     logger.info("Oracle Waiting for tasks to finish...")
@@ -10,3 +10,5 @@ from .tradingComponentCommands import add_trading_component_command, remove_trad
     list_profile_trading_component_command, list_trading_components_command, update_trading_component_command
 from .pluginCommands import add_plugin_command, update_plugin_command, remove_plugin_command, \
     list_profile_plugins_command, list_plugins_command
+from .optimizationCommands import search_command
+from .databaseCommands import migrate_command, sync_candles_command
@@ -0,0 +1 @@
+from .databaseCommands import migrate_command, sync_candles_command
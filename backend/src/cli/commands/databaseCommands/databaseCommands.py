@@ -0,0 +1,80 @@
+import time
+from datetime import datetime, timezone
+from typing import Annotated, Optional
+
+import typer
+from pandas import DataFrame
+from rich.box import ROUNDED
+from rich.console import Console
+from rich.progress import Progress, SpinnerColumn, TextColumn
+from rich.table import Table
+from src.api import fetch_klines
+from src.cli.commands.validation import validate_and_prompt_interval, validate_and_prompt_ticker
+from src.database import latest_candle_time, migrate, store_candles
+
+console = Console()
+
+
+def migrate_command():
+    with Progress(
+            SpinnerColumn(finished_text=":white_check_mark: "),
+            TextColumn("[progress.description]{task.description}"),
+    ) as progress:
+        migrate_progress = progress.add_task("Migrating the database schema...", total=1)
+        try:
+            applied: list[str] = migrate()
+        except Exception as e:
+            progress.update(migrate_progress, description="[bold red]Migration failed!", completed=1)
+            console.print(f"[bold red]Failed to migrate the database: [white]{e}")
+            return
+
+        progress.update(migrate_progress, completed=1)
+
+    if not applied:
+        console.print("[bold green]The database schema is up to date.")
+        return
+
+    table: Table = Table(show_header=True, header_style="bold cyan", box=ROUNDED, style="bold", title="Applied Steps")
+    table.add_column("Step", style="dim")
+    table.add_column("Change", style="bold magenta")
+
+    for i, step in enumerate(applied):
+        table.add_row(str(i + 1), step)
+
+    console.print(table)
+
+
+def sync_candles_command(
+        ticker: Annotated[Optional[str], typer.Argument(help="The ticker of the candles.")] = None,
+        interval: Annotated[Optional[str], typer.Option("--interval", "-i",
+                help="The interval of the candles, e.g. '1h'.")] = None,
+        days: Annotated[float, typer.Option("--days", "-d", min=0,
+                help="The number of past days of candles to keep stored.")] = 30):
+    ticker = validate_and_prompt_ticker(ticker)
+    if interval is None:
+        interval = validate_and_prompt_interval()
+
+    # Only the candles after the latest stored one are fetched
+    start_ms: int = int((time.time() - days * 86400) * 1000)
+    latest: Optional[int] = latest_candle_time(ticker, interval)
+    if latest is not None:
+        start_ms = max(start_ms, latest + 1)
+    start: str = datetime.fromtimestamp(start_ms / 1000, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    end: str = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+    with Progress(
+            SpinnerColumn(finished_text=":white_check_mark: "),
+            TextColumn("[progress.description]{task.description}"),
+    ) as progress:
+        sync_progress = progress.add_task(f"Syncing the candles of {ticker} {interval} since {start}...", total=1)
+        try:
+            df: DataFrame = fetch_klines(ticker=ticker, interval=interval, start=start, end=end, is_utc_time=True)
+            stored: int = store_candles(ticker, interval, df)
+        except Exception as e:
+            progress.update(sync_progress, description="[bold red]Syncing failed!", completed=1)
+            console.print(f"[bold red]Failed to sync the candles of {ticker} {interval}: [white]{e}")
+            return
+
+        progress.update(sync_progress, completed=1)
+
+    console.print(f"[bold green]Stored {stored} new candles of {ticker} {interval}.")
@@ -0,0 +1 @@
+from .optimizationCommands import search_command
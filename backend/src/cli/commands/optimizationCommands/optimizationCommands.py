@@ -0,0 +1,72 @@
+from typing import Annotated, Optional
+
+import typer
+from rich.box import ROUNDED
+from rich.console import Console
+from rich.progress import Progress, SpinnerColumn, TextColumn
+from rich.table import Table
+from src.cli.commands.validation import (validate_and_prompt_interval, validate_and_prompt_tc_name,
+                                         validate_and_prompt_ticker)
+from src.services.optimization import HalvingResult, hyperband, successive_halving
+
+console = Console()
+
+
+def search_command(
+        tc_name: Annotated[Optional[str], typer.Argument(help="The name of the Trading Component to optimize.")] = None,
+        ticker: Annotated[Optional[str], typer.Option("--ticker", "-t", help="The ticker to optimize on.")] = None,
+        interval: Annotated[Optional[str], typer.Option("--interval", "-i",
+                help="The interval of the candles, e.g. '1h'.")] = None,
+        days: Annotated[float, typer.Option("--days", "-d", min=1, help="The number of past days of candles to use.")] = 30,
+        candidates: Annotated[int, typer.Option("--candidates", "-c", min=1,
+                help="The amount of settings to start with, ignored with --hyperband.")] = 81,
+        eta: Annotated[int, typer.Option("--eta", min=2,
+                help="The factor by which the candidates shrink and the history grows per rung.")] = 3,
+        min_budget: Annotated[int, typer.Option("--min-candles", min=1,
+                help="The amount of candles of the first rung.")] = 200,
+        use_hyperband: Annotated[bool, typer.Option("--hyperband", "-hb",
+                help="Runs several brackets instead of one successive halving run.")] = False,
+        workers: Annotated[Optional[int], typer.Option("--workers", "-w", min=1,
+                help="The amount of worker processes, defaults to the cpu count.")] = None,
+        seed: Annotated[Optional[int], typer.Option("--seed", help="The seed for sampling the candidates.")] = None,
+        no_cache: Annotated[bool, typer.Option("--no-cache", help="Recompute every fitness instead of using cached ones.")] = False):
+    tc_name = validate_and_prompt_tc_name(tc_name)
+    ticker = validate_and_prompt_ticker(ticker)
+    if interval is None:
+        interval = validate_and_prompt_interval()
+
+    with Progress(
+            SpinnerColumn(finished_text=":white_check_mark: "),
+            TextColumn("[progress.description]{task.description}"),
+    ) as progress:
+        search_progress = progress.add_task(f"Searching settings of {tc_name}...", total=1)
+
+        if use_hyperband:
+            result: HalvingResult = hyperband(tc_name, ticker, interval, days=days, eta=eta, min_budget=min_budget,
+                                              max_workers=workers, seed=seed, use_cache=False if no_cache else None)
+        else:
+            result: HalvingResult = successive_halving(tc_name, ticker, interval, days=days, n_candidates=candidates,
+                                                       eta=eta, min_budget=min_budget, max_workers=workers, seed=seed,
+                                                       use_cache=False if no_cache else None)
+
+        progress.update(search_progress, completed=1)
+
+    rung_table: Table = Table(show_header=True, header_style="bold cyan", box=ROUNDED, style="bold", title="Rungs")
+    rung_table.add_column("Rung", style="dim")
+    rung_table.add_column("Candidates", style="bold magenta")
+    rung_table.add_column("Candles", style="bold yellow")
+    rung_table.add_column("Best Return")
+
+    for i, rung in enumerate(result.rungs):
+        clr: str = "[bold green]" if rung.best_fitness >= 0 else "[bold red]"
+        rung_table.add_row(str(i + 1), str(rung.candidates), str(rung.budget), f"{clr}{rung.best_fitness:.2%}")
+
+    console.print(rung_table)
+
+    if result.best_settings is None:
+        console.print(f"[bold red]No valid settings found for '[white underline bold]{tc_name}[/white underline bold]'.")
+        return
+
+    console.print(f"[bold green]Best settings: [white]{result.best_settings}[/white]\n"
+                  f"Return on the whole history: {result.best_fitness:.2%}\n"
+                  f"Backtested candles: {result.candles_evaluated} ({result.cpu_fraction:.2%} of a full grid)")
@@ -80,7 +80,8 @@ def update_plugin_command(
 
     settings: dict[str, any] = create_edit_object_settings(plugin.instance, plugin.settings)
 
-    if profile.update_plugin(id=plugin_id, name=plugin.name, settings=settings):
+    if profile.update_plugin(id=plugin_id, name=plugin.name, settings=settings,
+                             expected_version=plugin.version):
         console.print(
             f"[bold green]Plugin '[bold]{plugin_id}[/bold]' successfully updated in profile '[bold]{profile_name}[/bold]'.")
     else:
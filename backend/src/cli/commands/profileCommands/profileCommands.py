@@ -91,7 +91,14 @@ def backtest_profile_command(
                                                     prompt="Enter past number of days to backtest")] = 7,
         partition_amount: Annotated[Optional[int], typer.Option("--partitions", "-p", min=1,
                 help="The number of partitions to divide the data into for recalculating the Return on Investment (ROI).",
-                prompt="Enter number of partitions")] = 1):
+                prompt="Enter number of partitions")] = 1,
+        start: Annotated[Optional[str], typer.Option("--start", "-s",
+                help="The UTC start time in the format 'YYYY-MM-DD HH:MM:SS', overrides the number of days.")] = None,
+        end: Annotated[Optional[str], typer.Option("--end", "-e",
+                help="The UTC end time in the format 'YYYY-MM-DD HH:MM:SS', defaults to now.")] = None,
+        no_cache: Annotated[bool, typer.Option("--no-cache", help="Recompute the backtest instead of using cached results.")] = False,
+        equity_curve_path: Annotated[Optional[str], typer.Option("--equity-curve", "-ec",
+                help="Writes the equity curve to this file in a compact columnar format.")] = None):
     profile_id: int = validate_and_prompt_profile_name(profile_name)
     profile: Profile = profile_registry.get(profile_id)
 
@@ -107,7 +114,9 @@ def backtest_profile_command(
     ) as progress:
         backtest_progress = progress.add_task("Backtesting...", total=1)
 
-        net_worth_his, order_his = profile.backtest(balance=balance, days=days, partition_amount=partition_amount)
+        net_worth_his, order_his, metrics = profile.backtest(
+            balance=balance, days=days, partition_amount=partition_amount, start=start, end=end,
+            use_cache=False if no_cache else None, equity_curve_path=equity_curve_path)
 
         progress.update(backtest_progress, description="Backtesting...", completed=1)
 
@@ -140,3 +149,21 @@ def backtest_profile_command(
 
 
     console.print(backtest_table)
+
+    metrics_table: Table = Table(show_header=True, header_style="bold cyan", box=ROUNDED, style="bold",
+                                 title="Risk & Performance")
+    metrics_table.add_column("Metric", style="bold magenta")
+    metrics_table.add_column("Value", style="bold yellow")
+
+    metrics_table.add_row("Total Return", f"{metrics.total_return:.2%}")
+    metrics_table.add_row("Max Drawdown", f"{metrics.max_drawdown:.2%}")
+    metrics_table.add_row("Sharpe Ratio", f"{metrics.sharpe_ratio:.3f}")
+    metrics_table.add_row("Sortino Ratio", f"{metrics.sortino_ratio:.3f}")
+    metrics_table.add_row("Exposure", f"{metrics.exposure:.2%}")
+    metrics_table.add_row("Turnover", f"{metrics.turnover:.3f}")
+    metrics_table.add_row("Win Rate", f"{metrics.win_rate:.2%} of {metrics.closed_trades} closed trades")
+
+    console.print(metrics_table)
+
+    if equity_curve_path is not None:
+        console.print(f"[bold green]Equity curve written to '[white underline bold]{equity_curve_path}[/white underline bold]'.")
@@ -209,7 +209,8 @@ def update_trading_component_command(
             ticker=ticker,
             interval=interval,
             weight=weight,
-            settings=new_tc_settings):
+            settings=new_tc_settings,
+            expected_version=tc.version):
         console.print("[bold]Trading Component updated successfully![/bold]")
     else:
         console.print("[bold red]Error: Trading Component not updated![/bold red]")
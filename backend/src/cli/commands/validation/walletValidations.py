@@ -11,9 +11,9 @@ console = Console()
 def validate_and_prompt_ticker(ticker: Optional[str] = None) -> str:
     while True:
         if ticker is None:
-            ticker: Optional[str] = prompt("Ticker: ", completer=WordCompleter(list(VALID_TICKERS.keys()), ignore_case=True))
+            ticker: Optional[str] = prompt("Ticker: ", completer=WordCompleter(list(VALID_TICKERS), ignore_case=True))
 
-        if ticker not in VALID_TICKERS.keys():
+        if ticker not in VALID_TICKERS:
             console.print(f"[bold red] Ticker is not in list! [/bold red]")
             ticker = None
         else:
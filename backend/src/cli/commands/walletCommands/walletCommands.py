@@ -14,6 +14,7 @@ from rich.table import Table
 from src.api import fetch_ticker_price
 from src.cli.commands.validation import validate_and_prompt_profile_name
 from src.constants import VALID_TICKERS
+from src.database import wallet_patch
 from src.exceptions import DataFetchError
 from src.services.entities import Profile
 from src.utils.registry import profile_registry
@@ -134,7 +135,7 @@ def update_wallet_command(
     # Prompt for adding and removing tickers interactively
     while prompt_user:
         # Use rich prompt for better user interaction
-        ticker_prompt = prompt("Enter ticker :", completer=WordCompleter(words=VALID_TICKERS, ignore_case=True))
+        ticker_prompt = prompt("Enter ticker :", completer=WordCompleter(words=list(VALID_TICKERS), ignore_case=True))
 
         if ticker_prompt.lower() == "":
             break
@@ -194,15 +195,18 @@ def update_wallet_command(
         typer.Abort()
         return
 
-    pw_final_wallet: dict[str, float] = {}
-    for ticker in final_wallet.keys():
-        pw_wallet: dict[str, float] = profile.paper_wallet
-        if ticker in pw_wallet.keys():
-            pw_final_wallet[ticker] = pw_wallet[ticker]
-        else:
-            pw_final_wallet[ticker] = 0
+    # Re-run on the reloaded profile if it was updated in the meantime, so only the edits of the user are applied
+    edits: dict[str, Optional[float]] = wallet_patch(started_wallet, final_wallet)
+
+    def compute(current: Profile) -> dict[str, dict[str, float]]:
+        wallet: dict[str, float] = {
+            ticker: amount for ticker, amount in {**current.wallet, **edits}.items() if amount is not None}
+        return {
+            "wallet": wallet,
+            "paper_wallet": {ticker: current.paper_wallet.get(ticker, 0) for ticker in wallet},
+        }
 
-    if profile.update(wallet=final_wallet, paper_wallet=pw_final_wallet):
+    if profile.update_with(compute):
         console.print(f"[bold green]Profile '[bold]{profile_name}; ID: {profile.id}[/bold]' wallet successfully updated![/bold green]")
     else:
         console.print(f"[bold]Error:[/bold] Unable to update profile '[bold]{profile_name}; ID: {profile.id}[/bold]'.\n"
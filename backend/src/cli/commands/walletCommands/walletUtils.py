@@ -6,7 +6,7 @@ from rich.console import Console
 from rich.progress import Progress
 from rich.table import Table
 
-from src.api import fetch_ticker_price
+from src.api import fetch_ticker_prices
 
 console = Console()
 
@@ -30,12 +30,15 @@ def create_wallet_table(wallet: dict[str, float], title: str, transient: bool =
         final_wallet_table.add_column("Value", style="bold green")
         final_wallet_table.add_column("Holding Value", style="bold green")
 
+        # One request for the prices of every ticker, tickers Binance doesn't know are missing
+        prices: dict[str, float] = fetch_ticker_prices() if wallet else {}
+
         i = 1
         for ticker, quantity in wallet.items():
             progress.update(final_wallet_task, description=f"Fetching prices of {ticker}... {i}/{len(final_wallet)}",
                             advance=1)
 
-            current_price: Optional[float] = fetch_ticker_price(ticker)
+            current_price: Optional[float] = prices.get(ticker)
 
             if current_price is None:
                 invalid_tickers.append(ticker)
@@ -55,7 +55,8 @@ def repl():
                                       add_plugin_command, list_plugins_command, remove_plugin_command,
                                       update_plugin_command,
                                       list_profile_trading_component_command, update_trading_component_command,
-                                      backtest_profile_command)
+                                      backtest_profile_command, search_command, migrate_command,
+                                      sync_candles_command)
 
         app = typer.Typer(rich_markup_mode="rich")
         app.command(name="list-tcs", help="Lists all available Trading Components.")(list_trading_components_command)
@@ -96,11 +97,21 @@ def repl():
         bot_app.command(name="stop", help="Stops the app.")(stop_app_command)
         bot_app.command(name="status", help="Checks the status of the app.")(status_app_command)
 
+        optimize_app = typer.Typer(help="Commands to optimize the settings of Trading Components.")
+        optimize_app.command(name="search", help="Searches the best settings of a Trading Component.")(search_command)
+
+        db_app = typer.Typer(help="Commands to maintain the database.")
+        db_app.command(name="migrate", help="Creates and updates the database schema.")(migrate_command)
+        db_app.command(name="sync-candles", help="Stores the latest candles of a ticker in the database.")(
+            sync_candles_command)
+
         profile_app.add_typer(wallet_app, name="wallet")
         profile_app.add_typer(trading_component_app, name="tc")
         profile_app.add_typer(plugin_app, name="plugin")
         app.add_typer(profile_app, name="profile")
         app.add_typer(bot_app, name="bot")
+        app.add_typer(optimize_app, name="optimize")
+        app.add_typer(db_app, name="db")
 
         command_list: list[str] = []
 
@@ -129,6 +140,14 @@ def repl():
                 command_list.append("bot " + command.name)
         command_list.append("bot --help")
 
+        for command in optimize_app.registered_commands:
+            command_list.append("optimize " + command.name)
+        command_list.append("optimize --help")
+
+        for command in db_app.registered_commands:
+            command_list.append("db " + command.name)
+        command_list.append("db --help")
+
         # TODO: doesn't work currently as ctx is empty in repl
         # @app.callback()
         def log_command(ctx: typer.Context):
@@ -186,9 +205,11 @@ def repl():
 
             progress.update(deactivate_task, description="[bold green]All Profiles Deactivated Successfully")
 
-            from src.database import engine
+            from src.database import dispose_engine, order_journal, write_behind_queue
 
-            engine.dispose()
+            write_behind_queue.stop()
+            order_journal.stop()
+            dispose_engine()
             progress.update(close_db_engine_task, advance=1, description="[bold green]Database engine closed")
 
             logger.info("All Profiles Deactivated Successfully. Closing Oracle...")
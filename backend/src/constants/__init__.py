@@ -1,3 +1,4 @@
 from .errorCodes import ErrorCode
 from .profileConstants import Status
+from .dataConstants import DATA_STORE_VERSION
 from .walletConstants import VALID_TICKERS
\ No newline at end of file
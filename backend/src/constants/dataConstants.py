@@ -0,0 +1,3 @@
+# Version of the candle data pipeline (fetching, slicing, resampling).
+# Bump it whenever the data fed into evaluations changes, cached backtests keyed on it become invalid.
+DATA_STORE_VERSION: int = 2
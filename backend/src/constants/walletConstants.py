@@ -1,3 +1,7 @@
-from src.api import fetch_exchange_info
+from collections.abc import Mapping
 
-VALID_TICKERS: list[str] = [ticker["symbol"] for ticker in fetch_exchange_info()["symbols"] if ticker["quoteAsset"].endswith("EUR")]
+from src.api import QuoteAssetTickers, exchange_info
+
+# The tickers which can be traded, mapped to their symbol. The exchange info is loaded on first access, not on import.
+# Every quote asset ending with EUR is accepted, e.g. AEUR as well.
+VALID_TICKERS: Mapping[str, dict[str, str]] = QuoteAssetTickers(exchange_info, "EUR", suffix=True)
@@ -1,52 +1,31 @@
-from logging import getLogger
+from .sessionManager import (AsyncSessionFactory, Session, async_session_scope, get_pool_metrics, pool_options,
+                             session_scope)
+from .concurrency import RetryPolicy, retry_on_conflict, retry_policy
+from .readCache import ReadCache, read_cache
+from .backends import (create_async_database_engine, create_database_engine, dispose_async_engine, dispose_engine,
+                       get_async_engine, get_engine, load_db_config)
 
-from sqlalchemy import Engine, create_engine
-from sqlalchemy.engine import URL
-from sqlalchemy.sql import text
+from .changeNotifier import Change, ChangeNotifier, change_notifier
 
-from src.utils import load_config
+DB_CONFIG = load_db_config()
 
-logger = getLogger("oracle.app")
-
-logger.info("Initializing Database...")
-
-DB_CONFIG = load_config("DB_CONFIG")
-
-DATABASE_URL = URL.create(
-    drivername="postgresql+psycopg",
-    username=DB_CONFIG["user"],
-    password=DB_CONFIG["password"],
-    host=DB_CONFIG["host"],
-    port=DB_CONFIG["port"],
-    database=DB_CONFIG["database"],
-)
-BASE_URL = URL.create(
-    drivername="postgresql+psycopg",
-    username=DB_CONFIG["user"],
-    password=DB_CONFIG["password"],
-    host=DB_CONFIG["host"],
-    port=DB_CONFIG["port"],
-)
-
-base_engine: Engine = create_engine(BASE_URL)
-
-with base_engine.connect() as conn:
-    result = conn.execute(text("SELECT 1 FROM pg_database WHERE datname = 'oracle'"))
-    if result.fetchone() is None:
-        conn.execute(text("CREATE DATABASE oracle"))
-        logger.info("Database Successfully Created!")
-
-engine: Engine = create_engine(DATABASE_URL)
-
-
-from .dtos import TradingComponentDTO, OrderDTO, PluginDTO, ProfileDTO
-from .models import Base, TradingComponentModel, OrderModel, PluginModel, ProfileModel
-from .operations import (create_trading_component, create_order, create_plugin,
+from .dtos import TradingComponentDTO, OrderDTO, OrderAggregateDTO, PluginDTO, ProfileDTO
+from .models import Base, TradingComponentModel, OrderModel, PluginModel, ProfileModel, CandleModel, ORDERS_PARTITIONED
+from .operations import (create_trading_component, create_order, bulk_insert_orders, create_plugin,
                          create_profile, delete_trading_component, delete_plugin,
                          delete_profile, get_trading_component, get_order, get_plugin,
                          get_profile, update_trading_component, update_plugin,
-                         update_profile)
-
-Base.metadata.create_all(engine)
-
-logger.info("Database Successfully Initialized!")
+                         update_profile, get_profile_bundles, get_orders_page, get_order_aggregates,
+                         order_partition_statements, wallet_patch,
+                         store_candles, load_candles, load_candle_columns, latest_candle_time)
+from .operations import asyncOperations
+from .writeBehindQueue import WriteBehindQueue, write_behind_queue
+from .orderJournal import OrderJournal, order_journal
+from .migrations import migrate
+
+
+def __getattr__(name: str):
+    # The engine is created on first access instead of on import
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,224 @@
+import os
+import threading
+from logging import getLogger
+from typing import Optional
+
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.sql import text
+
+from src.database.sessionManager import AsyncSessionFactory, Session, pool_options
+from src.utils import load_config
+
+logger = getLogger("oracle.app")
+
+BACKENDS: tuple[str, ...] = ("postgresql", "sqlite")
+
+_engine: Optional[Engine] = None
+_engine_lock: threading.Lock = threading.Lock()
+_async_engine: Optional[AsyncEngine] = None
+
+
+def load_db_config() -> dict[str, any]:
+    """
+    Loads the `DB_CONFIG`, the environment variables `ORACLE_DB_BACKEND` and `ORACLE_SQLITE_PATH`
+    override its `backend` and `sqlite_path`, e.g. to run the tests without a Postgres server.
+
+    :return: The `DB_CONFIG` with the overrides applied.
+    """
+    db_config: dict[str, any] = dict(load_config("DB_CONFIG") or {})
+    db_config["backend"] = os.environ.get("ORACLE_DB_BACKEND", db_config.get("backend", "postgresql"))
+    db_config["sqlite_path"] = os.environ.get("ORACLE_SQLITE_PATH", db_config.get("sqlite_path", "data/oracle.sqlite3"))
+
+    if db_config["backend"] not in BACKENDS:
+        raise ValueError(f"Unknown database backend {db_config['backend']!r}, expected one of {BACKENDS}.")
+
+    return db_config
+
+
+def get_engine() -> Engine:
+    """
+    Returns the engine of the database layer. It is created on first use and the session factory is bound to it,
+    the schema is only migrated before if `auto_migrate` is enabled in `DB_CONFIG`. Otherwise the entry points
+    migrate it explicitly, see `migrate`. Importing `src.database` therefore never connects to the database.
+
+    :return: The engine of the configured backend.
+    """
+    global _engine
+    if _engine is not None:
+        return _engine
+
+    with _engine_lock:
+        if _engine is None:
+            db_config: dict[str, any] = load_db_config()
+            engine: Engine = create_database_engine(db_config)
+
+            if db_config.get("auto_migrate", False):
+                from src.database.migrations import migrate
+                migrate(engine)
+
+            Session.configure(bind=engine)
+            _engine = engine
+
+    return _engine
+
+
+def get_async_engine() -> AsyncEngine:
+    """
+    Returns the async engine of the async operations, created on first use. The schema is migrated through
+    `get_engine` before, so the async engine only serves queries.
+
+    :return: The async engine of the configured backend.
+    """
+    global _async_engine
+    if _async_engine is not None:
+        return _async_engine
+
+    get_engine()
+    with _engine_lock:
+        if _async_engine is None:
+            engine: AsyncEngine = create_async_database_engine(load_db_config())
+            AsyncSessionFactory.configure(bind=engine)
+            _async_engine = engine
+
+    return _async_engine
+
+
+def dispose_engine() -> None:
+    """
+    Closes all connections of the engine, if it was created.
+    The async engine is discarded as well, as it has to be disposed from its event loop, see `dispose_async_engine`.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+
+
+async def dispose_async_engine() -> None:
+    """
+    Closes all connections of the async engine, if it was created.
+    """
+    global _async_engine
+    engine: Optional[AsyncEngine] = _async_engine
+    _async_engine = None
+    if engine is not None:
+        AsyncSessionFactory.configure(bind=None)
+        await engine.dispose()
+
+
+def create_database_engine(db_config: dict[str, any]) -> Engine:
+    """
+    Creates the engine of the configured backend.
+
+    :param db_config: The `DB_CONFIG` returned by `load_db_config`.
+
+    :return: The engine, for Postgres the database is created if it doesn't exist.
+    """
+    if db_config["backend"] == "sqlite":
+        return _create_sqlite_engine(db_config)
+    return _create_postgresql_engine(db_config)
+
+
+def create_async_database_engine(db_config: dict[str, any]) -> AsyncEngine:
+    """
+    Creates the async engine of the configured backend, Postgres through psycopg and SQLite through aiosqlite.
+    The database has to exist already, see `create_database_engine`.
+
+    :param db_config: The `DB_CONFIG` returned by `load_db_config`.
+
+    :return: The async engine.
+    """
+    # The timed pool is synchronous, async engines use their adapted queue pool with the same limits
+    options: dict[str, any] = {key: value for key, value in pool_options(db_config).items() if key != "poolclass"}
+
+    if db_config["backend"] == "postgresql":
+        return create_async_engine(URL.create(
+            drivername="postgresql+psycopg",
+            username=db_config["user"],
+            password=db_config["password"],
+            host=db_config["host"],
+            port=db_config["port"],
+            database=db_config["database"],
+        ), **options)
+
+    if db_config["sqlite_path"] == ":memory:":
+        raise ValueError("The async operations need a database file, an in-memory SQLite database isn't shared.")
+
+    busy_timeout: float = db_config.get("pool_timeout", 30)
+    engine: AsyncEngine = create_async_engine(
+        URL.create("sqlite+aiosqlite", database=db_config["sqlite_path"]),
+        connect_args={"timeout": busy_timeout},
+        **options
+    )
+    _register_sqlite_events(engine.sync_engine, busy_timeout)
+    return engine
+
+
+def _create_postgresql_engine(db_config: dict[str, any]) -> Engine:
+    database_url: URL = URL.create(
+        drivername="postgresql+psycopg",
+        username=db_config["user"],
+        password=db_config["password"],
+        host=db_config["host"],
+        port=db_config["port"],
+        database=db_config["database"],
+    )
+    base_url: URL = database_url.set(database=None)
+
+    base_engine: Engine = create_engine(base_url)
+    with base_engine.connect() as conn:
+        result = conn.execute(text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": db_config["database"]})
+        if result.fetchone() is None:
+            conn.execution_options(isolation_level="AUTOCOMMIT").execute(
+                text(f'CREATE DATABASE "{db_config["database"]}"')
+            )
+            logger.info("Database Successfully Created!")
+    base_engine.dispose()
+
+    return create_engine(database_url, **pool_options(db_config))
+
+
+def _create_sqlite_engine(db_config: dict[str, any]) -> Engine:
+    path: str = db_config["sqlite_path"]
+    busy_timeout: float = db_config.get("pool_timeout", 30)
+
+    if path == ":memory:":
+        # Every connection to :memory: is a separate database, so all sessions share one connection
+        options: dict[str, any] = {"poolclass": StaticPool}
+    else:
+        directory: str = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        options = pool_options(db_config)
+
+    engine: Engine = create_engine(
+        URL.create("sqlite", database=path),
+        # Sessions of the write-behind queue and the order journal run in their own threads
+        connect_args={"check_same_thread": False, "timeout": busy_timeout},
+        **options
+    )
+    _register_sqlite_events(engine, busy_timeout)
+
+    logger.info(f"Using the embedded SQLite database {path}")
+    return engine
+
+
+def _register_sqlite_events(engine: Engine, busy_timeout: float) -> None:
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, _) -> None:
+        # The driver would begin transactions itself and break savepoints, they are begun in `on_begin` instead
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout * 1000)}")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def on_begin(connection) -> None:
+        connection.exec_driver_sql("BEGIN")
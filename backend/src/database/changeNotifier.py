@@ -0,0 +1,203 @@
+import json
+import queue
+import threading
+from dataclasses import asdict, dataclass, field
+from logging import getLogger
+from typing import Callable, Optional
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.orm import Session as SessionType
+
+from src.database.backends import get_engine
+from src.database.readCache import read_cache
+from src.database.sessionManager import run_after_commit
+from src.utils import load_config
+
+logger = getLogger("oracle.app")
+
+# Postgres drops notifications with a payload of 8000 bytes or more
+_MAX_PAYLOAD: int = 7900
+
+
+@dataclass
+class Change:
+    # The table of the changed row, e.g. "profiles", "trading_components" or "plugins"
+    table: str
+    # "insert", "update" or "delete"
+    op: str
+    id: int
+    profile_id: Optional[int] = None
+    # The version of the row after the change
+    version: Optional[int] = None
+    # The changed columns, profile wallets may be given as `wallet_patch` and `paper_wallet_patch`
+    fields: dict[str, any] = field(default_factory=dict)
+    # Set if the fields didn't fit into the notification, the receiver has to reload the row
+    reload: bool = False
+
+    def to_json(self) -> str:
+        payload: str = json.dumps(asdict(self), separators=(",", ":"), default=str)
+        if len(payload.encode("utf-8")) < _MAX_PAYLOAD:
+            return payload
+
+        return json.dumps({**asdict(self), "fields": {}, "reload": True}, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, payload: str) -> 'Change':
+        return cls(**json.loads(payload))
+
+
+class ChangeNotifier:
+    """
+    Publishes the changes of profiles, Trading Components and plugins to every runtime process.
+
+    On Postgres a change is sent with NOTIFY in the transaction of the write, so it is delivered exactly when
+    the write commits, and `start` LISTENs on a dedicated connection in a background thread. The embedded SQLite
+    backend has no notifications, its changes are only delivered to the subscribers of the writing process
+    after the commit. Either way subscribers are called in commit order from a background thread, never from
+    the writing one, which may still hold the locks the subscribers need.
+    """
+
+    def __init__(self, enabled: bool = True, channel: str = "oracle_changes", reconnect_delay: float = 5):
+        """
+        :param enabled: If False no changes are published.
+        :param channel: The channel of the notifications.
+        :param reconnect_delay: The seconds to wait before reconnecting a lost listener connection.
+        """
+        self.enabled: bool = enabled
+        self.channel: str = channel
+        self.reconnect_delay: float = reconnect_delay
+
+        self._subscribers: list[Callable[[Change], any]] = []
+        self._stopped: threading.Event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # The committed changes of this process waiting for `_dispatch_local`, only used without Postgres
+        self._local_changes: queue.Queue[Optional[Change]] = queue.Queue()
+        self._local_thread: Optional[threading.Thread] = None
+        self._local_lock: threading.Lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> 'ChangeNotifier':
+        """
+        Creates the notifier from `change_notifications` in `DB_CONFIG`.
+        """
+        config: dict[str, any] = (load_config("DB_CONFIG") or {}).get("change_notifications", {})
+        return cls(
+            enabled=config.get("enabled", True),
+            channel=config.get("channel", "oracle_changes"),
+            reconnect_delay=config.get("reconnect_delay", 5),
+        )
+
+    def subscribe(self, callback: Callable[[Change], any]) -> None:
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Change], any]) -> None:
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def notify_statement(self, change: Change) -> Select:
+        """
+        :return: The statement which sends the change when its transaction commits, Postgres only.
+        """
+        return select(func.pg_notify(self.channel, change.to_json()))
+
+    def publish(self, session: SessionType, change: Change) -> None:
+        """
+        Publishes a change once the transaction of the session commits, it is discarded on a rollback.
+
+        :param session: The session which wrote the change.
+        :param change: The change to publish.
+        """
+        if not self.enabled:
+            return
+
+        if session.get_bind().dialect.name == "postgresql":
+            session.execute(self.notify_statement(change))
+        else:
+            run_after_commit(session, lambda: self._publish_local(change))
+
+    def dispatch(self, change: Change) -> None:
+        """
+        Calls every subscriber with the change, a failing subscriber doesn't stop the others.
+        """
+        for callback in list(self._subscribers):
+            try:
+                callback(change)
+            except Exception as e:
+                logger.error(f"Failed to apply {change}: {e}", exc_info=True)
+
+    def wait(self) -> None:
+        """
+        Blocks until every change committed by this process without Postgres was dispatched.
+        """
+        self._local_changes.join()
+
+    def start(self) -> None:
+        """
+        Starts listening for the changes of other processes, only needed on Postgres.
+        """
+        if not self.enabled or self._thread is not None or get_engine().dialect.name != "postgresql":
+            return
+
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="change-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        thread: Optional[threading.Thread] = self._thread
+        self._stopped.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        self._thread = None
+
+        with self._local_lock:
+            local_thread: Optional[threading.Thread] = self._local_thread
+            self._local_thread = None
+        if local_thread is not None:
+            self._local_changes.put(None)
+            if local_thread is not threading.current_thread():
+                local_thread.join()
+
+    def _publish_local(self, change: Change) -> None:
+        with self._local_lock:
+            if self._local_thread is None:
+                self._local_thread = threading.Thread(target=self._dispatch_local, name="change-dispatcher",
+                                                      daemon=True)
+                self._local_thread.start()
+        self._local_changes.put(change)
+
+    def _dispatch_local(self) -> None:
+        while True:
+            change: Optional[Change] = self._local_changes.get()
+            try:
+                if change is None:
+                    return
+                self.dispatch(change)
+            finally:
+                self._local_changes.task_done()
+
+    def _run(self) -> None:
+        import psycopg
+
+        # libpq doesn't know the driver suffix of the SQLAlchemy url
+        conninfo: str = get_engine().url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+        while not self._stopped.is_set():
+            try:
+                with psycopg.connect(conninfo, autocommit=True) as connection:
+                    connection.execute(f'LISTEN "{self.channel}"')
+                    logger.info(f"Listening for changes on channel {self.channel}.")
+
+                    while not self._stopped.is_set():
+                        for notify in connection.notifies(timeout=1):
+                            change: Change = Change.from_json(notify.payload)
+                            # The write may come from another process, whose commit didn't invalidate this cache
+                            read_cache.invalidate(change.table)
+                            self.dispatch(change)
+            except Exception as e:
+                logger.error(f"Change listener failed, reconnecting in {self.reconnect_delay} seconds: {e}",
+                             exc_info=True)
+                self._stopped.wait(self.reconnect_delay)
+
+
+change_notifier: ChangeNotifier = ChangeNotifier.from_config()
+
@@ -0,0 +1,78 @@
+import random
+import time
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Callable, Iterator, Optional, TypeVar
+
+from sqlalchemy.orm.exc import StaleDataError
+
+from src.exceptions import ConcurrentUpdateError
+from src.utils import load_config
+
+logger = getLogger("oracle.app")
+
+T = TypeVar("T")
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 5
+    # The seconds before the first retry, doubled on every further retry up to `max_backoff`
+    backoff: float = 0.01
+    max_backoff: float = 0.5
+
+    @classmethod
+    def from_config(cls) -> 'RetryPolicy':
+        """
+        Creates the policy from `optimistic_locking` in `DB_CONFIG`.
+        """
+        config: dict[str, any] = (load_config("DB_CONFIG") or {}).get("optimistic_locking", {})
+        return cls(
+            max_attempts=config.get("max_attempts", 5),
+            backoff=config.get("backoff", 0.01),
+            max_backoff=config.get("max_backoff", 0.5),
+        )
+
+    def delays(self) -> Iterator[float]:
+        """
+        :return: The jittered seconds to wait before every retry, so conflicting writers don't retry in lockstep.
+        """
+        for attempt in range(self.max_attempts - 1):
+            yield random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+retry_policy: RetryPolicy = RetryPolicy.from_config()
+
+
+def retry_on_conflict(
+        operation: Callable[[], T],
+        on_conflict: Optional[Callable[[], any]] = None,
+        policy: Optional[RetryPolicy] = None
+) -> T:
+    """
+    Runs a compare-and-swap operation until it doesn't conflict with a concurrent writer.
+
+    :param operation: The operation, which raises a `ConcurrentUpdateError` or a `StaleDataError`
+        if the version it read was updated in the meantime.
+    :param on_conflict: Called after every conflict, e.g. to reload the state the operation is based on (optional).
+    :param policy: The retry policy, defaults to `optimistic_locking` in `DB_CONFIG`.
+
+    :return: The result of the operation.
+
+    :raises ConcurrentUpdateError: If the operation still conflicts after the last attempt.
+    """
+    policy = policy or retry_policy
+    delays: Iterator[float] = policy.delays()
+
+    while True:
+        try:
+            return operation()
+        except (ConcurrentUpdateError, StaleDataError) as e:
+            delay: Optional[float] = next(delays, None)
+            if delay is None:
+                raise ConcurrentUpdateError(f"Gave up after {policy.max_attempts} conflicting attempts: {e}") from e
+
+            logger.debug(f"Concurrent update conflict, retrying in {delay:.3f}s: {e}")
+            time.sleep(delay)
+            if on_conflict is not None:
+                on_conflict()
@@ -1 +1 @@
-from .dtos import TradingComponentDTO, OrderDTO, PluginDTO, ProfileDTO
+from .dtos import TradingComponentDTO, OrderDTO, OrderAggregateDTO, PluginDTO, ProfileDTO
@@ -1,4 +1,5 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
+from typing import Optional
 
 from src.utils.registry import tc_registry, plugin_registry
 
@@ -14,9 +15,16 @@ class ProfileDTO:
     paper_wallet: dict[str, float]
     buy_limit: float
     sell_limit: float
+    version: int = 1
 
+    def copy(self) -> 'ProfileDTO':
+        """
+        :return: A copy with its own wallets, so changes don't reach the original.
+        """
+        return replace(self, wallet=dict(self.wallet), paper_wallet=dict(self.paper_wallet))
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class TradingComponentDTO:
     id: int
     profile_id: int
@@ -25,26 +33,67 @@ class TradingComponentDTO:
     ticker: str
     interval: str
     settings: dict[str, any]
+    version: int = 1
+    _instance: Optional['BaseIndicator'] = field(default=None, init=False, repr=False, compare=False)
 
-    def __post_init__(self):
-        self.instance: 'BaseIndicator' = tc_registry.get(self.name)(**self.settings)
+    @property
+    def instance(self) -> 'BaseIndicator':
+        """
+        The Trading Component built from the settings, created on first access.
+        """
+        if self._instance is None:
+            object.__setattr__(self, "_instance", tc_registry.get(self.name)(**self.settings))
+        return self._instance
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class PluginDTO:
     id: int
     profile_id: int
     name: str
     settings: dict[str, any]
+    version: int = 1
+    _instance: Optional['BasePlugin'] = field(default=None, init=False, repr=False, compare=False)
 
-    def __post_init__(self):
-        self.instance: 'BasePlugin' = plugin_registry.get(self.name)(**self.settings)
+    @property
+    def instance(self) -> 'BasePlugin':
+        """
+        The plugin built from the settings, created on first access.
+        """
+        if self._instance is None:
+            object.__setattr__(self, "_instance", plugin_registry.get(self.name)(**self.settings))
+        return self._instance
 
-@dataclass
+
+@dataclass(slots=True)
 class OrderDTO:
     id: int
     profile_id: int
     type: str
     ticker: str
-    quantity: int
+    quantity: float
     price: float
     timestamp: str
+    fill_id: Optional[str] = None
+
+
+@dataclass(slots=True)
+class OrderAggregateDTO:
+    ticker: str
+    day: str
+    orders: int
+    buy_quantity: float
+    sell_quantity: float
+    buy_value: float
+    sell_value: float
+
+    @property
+    def net_quantity(self) -> float:
+        return self.buy_quantity - self.sell_quantity
+
+    @property
+    def pnl(self) -> float:
+        """
+        The realized cash flow of the day, the value of the sold minus the value of the bought assets.
+        """
+        return self.sell_value - self.buy_value
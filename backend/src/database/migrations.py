@@ -0,0 +1,114 @@
+from logging import getLogger
+from typing import Optional
+
+from sqlalchemy import Connection, Engine, Float, Integer, UniqueConstraint, inspect, text
+from sqlalchemy.schema import AddConstraint
+
+from src.database.backends import get_engine, load_db_config
+from src.database.models import ORDERS_PARTITIONED, Base
+from src.database.operations import order_partition_statements
+
+logger = getLogger("oracle.app")
+
+
+def migrate(engine: Optional[Engine] = None) -> list[str]:
+    """
+    Creates the missing tables and brings existing ones up to date with the models. Adds missing columns,
+    unique constraints and indexes, widens integer columns which are floats in the models and creates the
+    order partitions. Every step checks the current schema first, so migrating an up to date schema changes nothing.
+
+    :param engine: The engine to migrate, defaults to the engine of the database layer.
+
+    :return: The descriptions of the applied steps.
+    """
+    engine = engine or get_engine()
+    applied: list[str] = []
+
+    with engine.begin() as connection:
+        missing_tables: list[str] = [table.name for table in Base.metadata.sorted_tables
+                                     if not inspect(connection).has_table(table.name)]
+        Base.metadata.create_all(connection)
+        applied += [f"Created table {name}" for name in missing_tables]
+
+        for table in Base.metadata.sorted_tables:
+            if table.name not in missing_tables:
+                applied += _migrate_table(connection, table)
+
+        if ORDERS_PARTITIONED:
+            applied += _migrate_partitions(connection)
+
+    for step in applied:
+        logger.info(f"Database migration: {step}")
+    logger.info(f"Database migrated, {len(applied)} steps applied.")
+
+    return applied
+
+
+def _migrate_table(connection: Connection, table) -> list[str]:
+    inspector = inspect(connection)
+    dialect = connection.dialect
+    quote = dialect.identifier_preparer.quote
+    applied: list[str] = []
+
+    existing_columns: dict[str, dict[str, any]] = {column["name"]: column for column in inspector.get_columns(table.name)}
+    for column in table.columns:
+        existing: Optional[dict[str, any]] = existing_columns.get(column.name)
+
+        if existing is None:
+            ddl: str = f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column.type.compile(dialect)}"
+            # A column can only be added as NOT NULL with a default for the existing rows
+            if column.server_default is not None:
+                ddl += f" DEFAULT {column.server_default.arg}"
+                if not column.nullable:
+                    ddl += " NOT NULL"
+
+            connection.execute(text(ddl))
+            applied.append(f"Added column {table.name}.{column.name}")
+
+        elif (dialect.name == "postgresql" and isinstance(column.type, Float)
+              and isinstance(existing["type"], Integer)):
+            connection.execute(text(
+                f"ALTER TABLE {quote(table.name)} ALTER COLUMN {quote(column.name)} TYPE {column.type.compile(dialect)}"
+            ))
+            applied.append(f"Changed the type of {table.name}.{column.name} to {column.type.compile(dialect)}")
+
+    existing_constraints: set[str] = {constraint["name"] for constraint in inspector.get_unique_constraints(table.name)}
+    existing_indexes: set[str] = {index["name"] for index in inspector.get_indexes(table.name)}
+
+    for constraint in table.constraints:
+        if not isinstance(constraint, UniqueConstraint) or constraint.name is None:
+            continue
+        if constraint.name in existing_constraints or constraint.name in existing_indexes:
+            continue
+
+        if dialect.name == "postgresql":
+            connection.execute(AddConstraint(constraint))
+        else:
+            # SQLite can't add constraints to a table, a unique index enforces the same
+            columns: str = ", ".join(quote(column.name) for column in constraint.columns)
+            connection.execute(text(f"CREATE UNIQUE INDEX {quote(constraint.name)} ON {quote(table.name)} ({columns})"))
+        applied.append(f"Added unique constraint {constraint.name}")
+
+    for index in table.indexes:
+        if index.name not in existing_indexes:
+            index.create(connection, checkfirst=True)
+            applied.append(f"Created index {index.name}")
+
+    return applied
+
+
+def _migrate_partitions(connection: Connection) -> list[str]:
+    partitioned: bool = connection.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('orders')")
+    ).first() is not None
+
+    if not partitioned:
+        logger.warning("orders_partitioning is enabled, but the existing orders table isn't partitioned. "
+                       "It can't be converted in place, move its rows into a new partitioned table first.")
+        return []
+
+    months_ahead: int = load_db_config().get("orders_partitioning", {}).get("months_ahead", 3)
+    for statement in order_partition_statements(months_ahead):
+        connection.execute(text(statement))
+
+    return [f"Ensured the order partitions for the next {months_ahead} months"]
@@ -1,2 +1,2 @@
 from .models import (Base, TradingComponentModel, OrderModel,  # type: ignore
-                     PluginModel, ProfileModel)
+                     PluginModel, ProfileModel, CandleModel, JSONType, ORDERS_PARTITIONED)
@@ -1,10 +1,22 @@
-from sqlalchemy import (Column, DateTime, Float, ForeignKey, Integer,
-                        String, func, ARRAY)
+from sqlalchemy import (JSON, BigInteger, Column, DateTime, Float, ForeignKey, Index, Integer,
+                        String, UniqueConstraint, func)
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import declarative_base
 
+from src.database.backends import load_db_config
+
 Base = declarative_base()
 
+# JSONB on Postgres, plain JSON on the embedded SQLite backend
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+_DB_CONFIG: dict[str, any] = load_db_config()
+
+# Range partitioning of the orders by their timestamp, see `order_partition_statements`. Only supported by Postgres.
+ORDERS_PARTITIONED: bool = (
+    _DB_CONFIG["backend"] == "postgresql" and _DB_CONFIG.get("orders_partitioning", {}).get("enabled", False)
+)
+
 
 class ProfileModel(Base):  # type: ignore
     __tablename__ = "profiles"
@@ -13,14 +25,18 @@ class ProfileModel(Base):  # type: ignore
     status = Column(Integer, default=0)
 
     balance = Column(Float)
-    wallet = Column(JSONB)
+    wallet = Column(JSONType)
 
     paper_balance = Column(Float)
-    paper_wallet = Column(JSONB)
+    paper_wallet = Column(JSONType)
 
     buy_limit = Column(Float)
     sell_limit = Column(Float)
 
+    # Incremented on every update, writers only update the version they read
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
+
 
 class TradingComponentModel(Base):
     __tablename__ = "trading_components"
@@ -31,7 +47,11 @@ class TradingComponentModel(Base):
     weight = Column(Float)
     ticker = Column(String(16))
     interval = Column(String(16))
-    settings = Column(JSONB)
+    settings = Column(JSONType)
+
+    # Incremented on every update, writers only update the version they read
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
 
 
 class PluginModel(Base):
@@ -40,16 +60,54 @@ class PluginModel(Base):
     profile_id = Column(Integer, ForeignKey("profiles.id", ondelete="CASCADE"))
 
     name = Column(String(100))
-    settings = Column(JSONB)
+    settings = Column(JSONType)
+
+    # Incremented on every update, writers only update the version they read
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    __mapper_args__ = {"version_id_col": version}
 
 
 class OrderModel(Base):
     __tablename__ = "orders"
+    # The partition key has to be part of every unique constraint of a partitioned table
+    __table_args__ = (
+        UniqueConstraint("fill_id", *(["timestamp"] if ORDERS_PARTITIONED else []), name="uq_orders_fill_id"),
+        Index("ix_orders_profile_id_timestamp_id", "profile_id", "timestamp", "id"),
+        Index("ix_orders_profile_id_ticker_timestamp", "profile_id", "ticker", "timestamp"),
+        Index("ix_orders_timestamp", "timestamp"),
+        {"postgresql_partition_by": "RANGE (timestamp)"} if ORDERS_PARTITIONED else {},
+    )
+
     id = Column(Integer, primary_key=True, autoincrement=True)
     profile_id = Column(Integer, ForeignKey("profiles.id", ondelete="CASCADE"))
 
+    # Unique per executed fill, so replaying the order journal never inserts an order twice
+    fill_id = Column(String(32))
+
     type = Column(String(4))
     ticker = Column(String(16))
-    quantity = Column(Integer)
+    quantity = Column(Float)
     price = Column(Float)
-    timestamp = Column(DateTime, default=func.current_timestamp())
+    timestamp = Column(DateTime, default=func.current_timestamp(), primary_key=ORDERS_PARTITIONED,
+                       nullable=not ORDERS_PARTITIONED)
+
+
+# The closed klines of Binance, shared by every runtime node, see `store_candles` and `load_candles`
+class CandleModel(Base):
+    __tablename__ = "candles"
+
+    ticker = Column(String(16), primary_key=True)
+    interval = Column(String(16), primary_key=True)
+    # The open and close time of the kline as unix timestamps in milliseconds, like Binance returns them
+    open_time = Column(BigInteger, primary_key=True)
+
+    open = Column(Float, nullable=False)
+    high = Column(Float, nullable=False)
+    low = Column(Float, nullable=False)
+    close = Column(Float, nullable=False)
+    volume = Column(Float, nullable=False)
+    close_time = Column(BigInteger, nullable=False)
+    quote_asset_volume = Column(Float)
+    number_of_trades = Column(BigInteger)
+    taker_buy_base_asset_volume = Column(Float)
+    taker_buy_quote_asset_volume = Column(Float)
@@ -1,7 +1,10 @@
 from .tradingComponentOperations import (create_trading_component, delete_trading_component,
                                          get_trading_component, update_trading_component)
-from .orderOperation import create_order, get_order
+from .orderOperation import (bulk_insert_orders, create_order, get_order,
+                             get_order_aggregates, get_orders_page, order_partition_statements)
 from .pluginOperations import (create_plugin, delete_plugin, get_plugin,
                                update_plugin)
 from .profileOperations import (create_profile, delete_profile, get_profile,
-                                update_profile)
+                                update_profile, wallet_patch)
+from .bulkOperations import get_profile_bundles
+from .candleOperations import latest_candle_time, load_candle_columns, load_candles, store_candles
@@ -0,0 +1,181 @@
+from datetime import datetime
+from logging import getLogger
+from typing import Optional
+
+from sqlalchemy import Select, Update, select
+from src.database import (Change, OrderDTO, OrderModel, ProfileDTO, ProfileModel, async_session_scope, change_notifier,
+                          read_cache)
+from src.database.operations.orderOperation import bulk_insert_statement, orders_page_query
+from src.database.operations.orderOperation import convert_to_dto as convert_order_to_dto
+from src.database.operations.profileOperations import convert_to_dto as convert_profile_to_dto
+from src.database.operations.profileOperations import profile_change, profile_update_statement
+from src.exceptions import ConcurrentUpdateError
+
+logger = getLogger("oracle.app")
+
+# Async counterparts of the operations the runtime calls on every evaluation. They build the same statements
+# as the blocking operations, but await the database instead of holding a thread while the query runs.
+
+
+async def get_profile(id: int = None, name: str = None) -> ProfileDTO | list[ProfileDTO] | None:
+    """
+    Retrieves a profile from the database based on profile ID or profile name, see `get_profile`.
+
+    :param id: The ID of the profile to retrieve. Optional.
+    :param name: The name of the profile to retrieve. Optional.
+
+    :return: A Profile object, a list of all Profile objects or None if not found.
+    """
+    try:
+        async with async_session_scope() as session:
+            if id is not None:
+                return convert_profile_to_dto(await session.get(ProfileModel, id))
+
+            if name is not None:
+                profile: Optional[ProfileModel] = await session.scalar(
+                    select(ProfileModel).where(ProfileModel.name == name).limit(1)
+                )
+                return convert_profile_to_dto(profile)
+
+            return [convert_profile_to_dto(profile) for profile in await session.scalars(select(ProfileModel))]
+
+    except Exception as e:
+        logger.error(f"Error retrieving Profile: {e}", exc_info=True)
+        return None
+
+
+async def update_profile(
+        id: int,
+        name: Optional[str] = None,
+        status: Optional[str] = None,
+        balance: Optional[float] = None,
+        wallet: Optional[dict] = None,
+        paper_balance: Optional[float] = None,
+        paper_wallet: Optional[dict] = None,
+        buy_limit: Optional[float] = None,
+        sell_limit: Optional[float] = None,
+        wallet_patch: Optional[dict] = None,
+        paper_wallet_patch: Optional[dict] = None,
+        expected_version: Optional[int] = None
+) -> Optional[int]:
+    """
+    Updates a profile in the database with a single UPDATE, see `update_profile` for the parameters.
+
+    :return: The version of the profile after the update, None if it wasn't found or on error.
+
+    :raises ConcurrentUpdateError: If the profile is no longer at `expected_version`.
+    """
+    columns: dict[str, any] = {
+        "name": name, "status": status, "balance": balance, "wallet": wallet, "paper_balance": paper_balance,
+        "paper_wallet": paper_wallet, "buy_limit": buy_limit, "sell_limit": sell_limit
+    }
+
+    try:
+        async with async_session_scope() as session:
+            query: Optional[Update] = profile_update_statement(
+                id, session.bind.dialect.name, columns, wallet_patch, paper_wallet_patch, expected_version
+            )
+            if query is None:
+                profile: Optional[ProfileModel] = await session.get(ProfileModel, id)
+                return profile.version if profile is not None else None
+
+            result = await session.execute(query, execution_options={"synchronize_session": False})
+            version: Optional[int] = result.scalar()
+            read_cache.invalidate_on_commit(session.sync_session, "profiles")
+            if version is None:
+                if expected_version is not None and await session.get(ProfileModel, id) is not None:
+                    raise ConcurrentUpdateError(table="profiles", id=id, expected_version=expected_version)
+
+                logger.warning(f"Profile with ID {id} not found.")
+                return None
+
+            change: Change = profile_change(id, version, columns, wallet_patch, paper_wallet_patch)
+            await session.run_sync(change_notifier.publish, change)
+
+        logger.info(f"Profile with ID {id} updated {columns}; {wallet_patch=}; {paper_wallet_patch=}; successfully.")
+        return version
+
+    except ConcurrentUpdateError:
+        raise
+    except Exception as e:
+        logger.error(f"Error updating {columns}; {wallet_patch=}; {paper_wallet_patch=}; for profile with ID {id}: {e}",
+                     exc_info=True)
+        return None
+
+
+async def create_order(
+        profile_id: int, order_type: str, ticker: str, quantity: float, price: float
+) -> OrderDTO | None:
+    """
+    Creates a new order for the profile in the database, see `create_order`.
+
+    :return: The newly created Order object or None on error.
+    """
+    try:
+        async with async_session_scope() as session:
+            new_order: OrderModel = OrderModel(
+                profile_id=profile_id, type=order_type, ticker=ticker, quantity=quantity, price=price
+            )
+            session.add(new_order)
+            await session.flush()
+            # The timestamp is set by the database, it can't be loaded lazily in async code
+            await session.refresh(new_order)
+            order_dto: OrderDTO = convert_order_to_dto(new_order)
+
+        logger.info(f"Order {order_type=}; {ticker=}; {quantity=}; {price=}; created successfully for {profile_id=}.")
+        return order_dto
+
+    except Exception as e:
+        logger.error(f"Error creating order {order_type=}; {ticker=}; {quantity=}; {price=}; for {profile_id=}: {e}",
+                     exc_info=True)
+        return None
+
+
+async def bulk_insert_orders(orders: list[dict[str, any]]) -> int:
+    """
+    Inserts many orders in one transaction and skips those whose `fill_id` already exists, see `bulk_insert_orders`.
+
+    :return: The amount of orders which were inserted.
+    """
+    if not orders:
+        return 0
+
+    async with async_session_scope() as session:
+        connection = await session.connection()
+        inserted: int = len((await connection.execute(bulk_insert_statement(session.bind.dialect.name), orders)).all())
+
+    logger.info(f"{inserted} of {len(orders)} orders bulk inserted.")
+    return inserted
+
+
+async def get_orders_page(
+        profile_id: int,
+        ticker: Optional[str] = None,
+        order_type: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        after: Optional[tuple[datetime, int]] = None,
+        limit: int = 100,
+        newest_first: bool = True
+) -> tuple[list[OrderDTO], Optional[tuple[datetime, int]]] | None:
+    """
+    Retrieves one page of the orders of a profile with keyset pagination, see `get_orders_page`.
+
+    :return: The orders of the page and the cursor of the next page, None as cursor on the last page.
+        None on error.
+    """
+    try:
+        async with async_session_scope() as session:
+            query: Select = orders_page_query(profile_id, ticker, order_type, start, end, after, limit, newest_first)
+            orders: list[OrderModel] = list(await session.scalars(query))
+            order_dtos: list[OrderDTO] = [convert_order_to_dto(order) for order in orders[:limit]]
+
+        cursor: Optional[tuple[datetime, int]] = (
+            (order_dtos[-1].timestamp, order_dtos[-1].id) if len(orders) > limit else None
+        )
+        return order_dtos, cursor
+
+    except Exception as e:
+        logger.error(f"Error retrieving orders page where {profile_id=}; {ticker=}; {order_type=}; {after=}: {e}",
+                     exc_info=True)
+        return None
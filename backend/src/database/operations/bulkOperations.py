@@ -0,0 +1,49 @@
+from collections import defaultdict
+from logging import getLogger
+
+from src.database import (PluginDTO, PluginModel, ProfileDTO, ProfileModel, TradingComponentDTO,
+                          TradingComponentModel, session_scope)
+from src.database.operations.pluginOperations import convert_to_dto as convert_plugin_to_dto
+from src.database.operations.profileOperations import convert_to_dto as convert_profile_to_dto
+from src.database.operations.tradingComponentOperations import convert_to_dto as convert_trading_component_to_dto
+
+logger = getLogger("oracle.app")
+
+
+def get_profile_bundles() -> list[tuple[ProfileDTO, list[TradingComponentDTO], list[PluginDTO]]] | None:
+    """
+    Retrieves all profiles together with their Trading Components and plugins.
+    Uses three set based queries in one session instead of two queries per profile.
+
+    :return: A list of (profile, trading components, plugins) or None on error.
+    """
+    try:
+        with session_scope() as session:
+            profiles: list[ProfileModel] = session.query(ProfileModel).order_by(ProfileModel.id).all()
+            trading_components: list[TradingComponentModel] = (
+                session.query(TradingComponentModel).order_by(TradingComponentModel.id).all()
+            )
+            plugins: list[PluginModel] = session.query(PluginModel).order_by(PluginModel.id).all()
+
+            trading_components_by_profile: dict[int, list[TradingComponentDTO]] = defaultdict(list)
+            for trading_component in trading_components:
+                trading_components_by_profile[trading_component.profile_id].append(
+                    convert_trading_component_to_dto(trading_component)
+                )
+
+            plugins_by_profile: dict[int, list[PluginDTO]] = defaultdict(list)
+            for plugin in plugins:
+                plugins_by_profile[plugin.profile_id].append(convert_plugin_to_dto(plugin))
+
+            bundles: list[tuple[ProfileDTO, list[TradingComponentDTO], list[PluginDTO]]] = [
+                (convert_profile_to_dto(profile), trading_components_by_profile[profile.id], plugins_by_profile[profile.id])
+                for profile in profiles
+            ]
+
+        logger.info(f"{len(profiles)} Profiles with {len(trading_components)} Trading Components "
+                    f"and {len(plugins)} Plugins retrieved.")
+        return bundles
+
+    except Exception as e:
+        logger.error(f"Error retrieving Profile bundles: {e}", exc_info=True)
+        return None
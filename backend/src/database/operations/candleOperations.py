@@ -0,0 +1,211 @@
+"""
+Storage of closed klines in the shared `candles` table.
+
+`store_candles` is called by the `database` CLI commands and by `KlineFeed.load`, which reads the stored
+candles with `load_candles` and only fetches the klines missing before and after them.
+"""
+import time
+from logging import getLogger
+from typing import Optional
+
+import numpy as np
+from pandas import DataFrame, to_datetime
+from sqlalchemy import Connection, Select, func, select, text
+from sqlalchemy.dialects import sqlite
+from src.database import CandleModel, session_scope
+
+logger = getLogger("oracle.app")
+
+# The columns of the klines of `fetch_klines` and the columns of the `candles` table they are stored in
+KLINE_COLUMNS: dict[str, str] = {
+    "OpenTime": "open_time",
+    "Open": "open",
+    "High": "high",
+    "Low": "low",
+    "Close": "close",
+    "Volume": "volume",
+    "CloseTime": "close_time",
+    "QuoteAssetVolume": "quote_asset_volume",
+    "NumberOfTrades": "number_of_trades",
+    "TakerBuyBaseAssetVolume": "taker_buy_base_asset_volume",
+    "TakerBuyQuoteAssetVolume": "taker_buy_quote_asset_volume",
+}
+_INTEGER_COLUMNS: set[str] = {"open_time", "close_time", "number_of_trades"}
+_CANDLE_COLUMNS: list[str] = ["ticker", "interval", *KLINE_COLUMNS.values()]
+# The Postgres types of the binary COPY, in the order of `_CANDLE_COLUMNS`
+_COPY_TYPES: list[str] = ["text", "text", *("int8" if column in _INTEGER_COLUMNS else "float8"
+                                            for column in KLINE_COLUMNS.values())]
+
+
+def candle_rows(ticker: str, interval: str, df: DataFrame, now: Optional[int] = None) -> list[tuple]:
+    """
+    Converts the klines of `fetch_klines` into rows of the `candles` table. The kline which is still open
+    is left out, so stored candles never change.
+
+    :param ticker: The ticker of the klines.
+    :param interval: The interval of the klines.
+    :param df: The klines as returned by `fetch_klines`.
+    :param now: The current unix timestamp in milliseconds, defaults to now.
+
+    :return: The rows in the order of the columns of the `candles` table.
+    """
+    now = int(time.time() * 1000) if now is None else now
+    closed: DataFrame = df[df["CloseTime"] < now]
+
+    integer_positions: list[int] = [i for i, column in enumerate(KLINE_COLUMNS.values()) if column in _INTEGER_COLUMNS]
+    rows: list[tuple] = []
+    for values in closed[list(KLINE_COLUMNS)].to_numpy(dtype="float64").tolist():
+        for i in integer_positions:
+            values[i] = int(values[i])
+        rows.append((ticker, interval, *values))
+
+    return rows
+
+
+def store_candles(ticker: str, interval: str, df: DataFrame, batch_size: int = 5000) -> int:
+    """
+    Stores the closed klines of `fetch_klines`, candles which are already stored are skipped.
+    On Postgres the rows are loaded with a binary COPY, other backends use multi-row inserts.
+
+    :param ticker: The ticker of the klines.
+    :param interval: The interval of the klines.
+    :param df: The klines as returned by `fetch_klines`.
+    :param batch_size: The amount of rows per insert on backends without COPY.
+
+    :return: The amount of stored candles.
+    """
+    rows: list[tuple] = candle_rows(ticker, interval, df)
+    if not rows:
+        return 0
+
+    with session_scope() as session:
+        connection: Connection = session.connection()
+        if connection.dialect.name == "postgresql":
+            inserted: int = _copy_candles(connection, rows)
+        else:
+            insert = sqlite.insert(CandleModel).on_conflict_do_nothing().returning(CandleModel.open_time)
+            inserted: int = sum(
+                len(connection.execute(insert, [dict(zip(_CANDLE_COLUMNS, row)) for row in rows[i:i + batch_size]]).all())
+                for i in range(0, len(rows), batch_size)
+            )
+
+    logger.info(f"{inserted} of {len(rows)} candles of {ticker} {interval} stored.")
+    return inserted
+
+
+def _copy_candles(connection: Connection, rows: list[tuple]) -> int:
+    # COPY can't skip existing rows, so the rows are copied into a temporary table and inserted from there
+    columns: str = ", ".join(_CANDLE_COLUMNS)
+    connection.execute(text(
+        "CREATE TEMPORARY TABLE IF NOT EXISTS candles_staging "
+        "(LIKE candles INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+    ))
+    connection.execute(text("TRUNCATE candles_staging"))
+
+    with connection.connection.driver_connection.cursor() as cursor:
+        with cursor.copy(f"COPY candles_staging ({columns}) FROM STDIN (FORMAT BINARY)") as copy:
+            copy.set_types(_COPY_TYPES)
+            for row in rows:
+                copy.write_row(row)
+
+    return connection.execute(text(
+        f"INSERT INTO candles ({columns}) SELECT {columns} FROM candles_staging ON CONFLICT DO NOTHING"
+    )).rowcount
+
+
+def _candles_query(ticker: str, interval: str, start: Optional[int], end: Optional[int]) -> Select:
+    query: Select = (
+        select(*(getattr(CandleModel, column) for column in KLINE_COLUMNS.values()))
+        .where(CandleModel.ticker == ticker, CandleModel.interval == interval)
+        .order_by(CandleModel.open_time)
+    )
+    if start is not None:
+        query = query.where(CandleModel.open_time >= start)
+    if end is not None:
+        query = query.where(CandleModel.open_time <= end)
+    return query
+
+
+def load_candle_columns(
+        ticker: str,
+        interval: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        batch_size: int = 50_000
+) -> dict[str, np.ndarray]:
+    """
+    Reads stored candles column by column. The rows are counted first and every column is preallocated,
+    then the rows are streamed from a server-side cursor in batches and copied into the columns.
+    Besides the arrays only one batch of rows is held.
+
+    :param ticker: The ticker of the candles.
+    :param interval: The interval of the candles.
+    :param start: The earliest open time as unix timestamp in milliseconds (optional).
+    :param end: The latest open time as unix timestamp in milliseconds (optional).
+    :param batch_size: The amount of rows fetched from the cursor at once.
+
+    :return: A contiguous float64 array per column of the `candles` table, ordered by the open time.
+    """
+    query: Select = _candles_query(ticker, interval, start, end)
+
+    with session_scope() as session:
+        connection: Connection = session.connection()
+        capacity: int = connection.execute(select(func.count()).select_from(query.subquery())).scalar()
+        columns: dict[str, np.ndarray] = {
+            column: np.empty(capacity, dtype="float64") for column in KLINE_COLUMNS.values()
+        }
+        rows: int = 0
+
+        result = connection.execution_options(stream_results=True, max_row_buffer=batch_size).execute(query)
+        for partition in result.partitions(batch_size):
+            batch: np.ndarray = np.array(partition, dtype="float64")
+
+            # Candles stored after the count was taken
+            if rows + len(batch) > capacity:
+                capacity = max(2 * capacity, rows + len(batch))
+                for column, values in columns.items():
+                    grown: np.ndarray = np.empty(capacity, dtype="float64")
+                    grown[:rows] = values[:rows]
+                    columns[column] = grown
+
+            for i, column in enumerate(KLINE_COLUMNS.values()):
+                columns[column][rows:rows + len(batch)] = batch[:, i]
+            rows += len(batch)
+
+    return {column: values[:rows] for column, values in columns.items()}
+
+
+def load_candles(
+        ticker: str,
+        interval: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        batch_size: int = 50_000
+) -> DataFrame:
+    """
+    Reads stored candles into a DataFrame with the columns and index of `fetch_klines`.
+
+    :param ticker: The ticker of the candles.
+    :param interval: The interval of the candles.
+    :param start: The earliest open time as unix timestamp in milliseconds (optional).
+    :param end: The latest open time as unix timestamp in milliseconds (optional).
+    :param batch_size: The amount of rows fetched from the cursor at once.
+
+    :return: The candles indexed by their UTC open time.
+    """
+    columns: dict[str, np.ndarray] = load_candle_columns(ticker, interval, start, end, batch_size)
+    df: DataFrame = DataFrame({kline_column: columns[column] for kline_column, column in KLINE_COLUMNS.items()})
+    df.index = to_datetime(df["OpenTime"], unit="ms", utc=True)
+    df.index.name = "timestamp"
+    return df
+
+
+def latest_candle_time(ticker: str, interval: str) -> Optional[int]:
+    """
+    :return: The close time of the latest stored candle as unix timestamp in milliseconds or None if none is stored.
+    """
+    with session_scope() as session:
+        return session.execute(
+            select(func.max(CandleModel.close_time))
+            .where(CandleModel.ticker == ticker, CandleModel.interval == interval)
+        ).scalar()
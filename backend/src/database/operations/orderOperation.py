@@ -1,14 +1,15 @@
+from datetime import datetime
 from logging import getLogger
-from typing import Type
+from typing import Optional, Type
 
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import Insert, Select, and_, case, func, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import sessionmaker
-from src.database import OrderDTO, OrderModel, engine
+from src.database import OrderAggregateDTO, OrderDTO, OrderModel, session_scope
 
 logger = getLogger("oracle.app")
 
-Session = sessionmaker(bind=engine)
-
 
 def convert_to_dto(order: OrderModel) -> OrderDTO | None:
     """
@@ -24,11 +25,12 @@ def convert_to_dto(order: OrderModel) -> OrderDTO | None:
         quantity=order.quantity,
         price=order.price,
         timestamp=order.timestamp,
+        fill_id=order.fill_id,
     )
 
 
 def create_order(
-        profile_id: int, order_type: str, ticker: str, quantity: int, price: float
+        profile_id: int, order_type: str, ticker: str, quantity: float, price: float
 ) -> OrderDTO:
     """
     Creates a new order for the profile in the database.
@@ -41,30 +43,59 @@ def create_order(
 
     :return: The newly created Order object.
     """
-    session = Session()
-
     try:
-        new_order = OrderModel(
-            profile_id=profile_id,
-            type=order_type,
-            ticker=ticker,
-            quantity=quantity,
-            price=price,
-        )
-        session.add(new_order)
-        session.commit()
+        with session_scope() as session:
+            new_order = OrderModel(
+                profile_id=profile_id,
+                type=order_type,
+                ticker=ticker,
+                quantity=quantity,
+                price=price,
+            )
+            session.add(new_order)
+            session.flush()
+            order_dto = convert_to_dto(new_order)
 
         logger.info(
             f"Order {order_type=}; {ticker=}; {quantity=}; {price=}; created successfully for {profile_id=}."
         )
-        return convert_to_dto(new_order)
+        return order_dto
 
     except IntegrityError as e:
         logger.error(f"Error creating order {order_type=}; {ticker=}; {quantity=}; {price=}; for {profile_id=}: {e}", exc_info=True)
-        session.rollback()
 
-    finally:
-        session.close()
+
+def bulk_insert_statement(dialect: str) -> Insert:
+    """
+    Builds the insert of `bulk_insert_orders`, which is shared with its async variant.
+    Orders whose `fill_id` already exists are skipped and only the ids of the inserted orders are returned.
+
+    :param dialect: The name of the database dialect.
+    """
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    return insert(OrderModel).on_conflict_do_nothing().returning(OrderModel.id)
+
+
+def bulk_insert_orders(orders: list[dict[str, any]]) -> int:
+    """
+    Inserts many orders with multi-row inserts in one transaction.
+    Orders whose `fill_id` already exists are skipped, so the same orders can safely be inserted again.
+
+    :param orders: The orders as dictionaries with the keys `fill_id`, `profile_id`, `type`, `ticker`,
+        `quantity`, `price` and `timestamp`.
+
+    :return: The amount of orders which were inserted.
+    """
+    if not orders:
+        return 0
+
+    with session_scope() as session:
+        inserted: int = len(session.connection().execute(
+            bulk_insert_statement(session.get_bind().dialect.name), orders
+        ).all())
+
+    logger.info(f"{inserted} of {len(orders)} orders bulk inserted.")
+    return inserted
 
 
 def get_order(
@@ -83,26 +114,212 @@ def get_order(
 
     :return: The Order object or None if not found.
     """
-    session = Session()
-
     try:
-        if id is not None:
-            logger.info(f"Order with ID {id} retrieved.")
-            return convert_to_dto(session.get(OrderModel, id))
-        elif profile_id is not None:
-            order_dtos: list[OrderDTO] = [convert_to_dto(order) for order in session.query(OrderModel).filter_by(profile_id=profile_id).all()]
-        elif ticker is not None:
-            order_dtos: list[OrderDTO] = [convert_to_dto(order) for order in session.query(OrderModel).filter_by(ticker=ticker).all()]
-        elif order_type is not None:
-            order_dtos: list[OrderDTO] = [convert_to_dto(order) for order in session.query(OrderModel).filter_by(type=order_type).all()]
-        else:
-            order_dtos: list[OrderDTO] = [convert_to_dto(order) for order in session.query(OrderModel).all()]
+        with session_scope() as session:
+            if id is not None:
+                logger.info(f"Order with ID {id} retrieved.")
+                return convert_to_dto(session.get(OrderModel, id))
+            elif profile_id is not None:
+                order_dtos: list[OrderDTO] = [convert_to_dto(order) for order in session.query(OrderModel).filter_by(profile_id=profile_id).all()]
+            elif ticker is not None:
+                order_dtos: list[OrderDTO] = [convert_to_dto(order) for order in session.query(OrderModel).filter_by(ticker=ticker).all()]
+            elif order_type is not None:
+                order_dtos: list[OrderDTO] = [convert_to_dto(order) for order in session.query(OrderModel).filter_by(type=order_type).all()]
+            else:
+                order_dtos: list[OrderDTO] = [convert_to_dto(order) for order in session.query(OrderModel).all()]
 
         logger.info(f"{len(order_dtos)} orders where {profile_id=}; {ticker=}; {order_type=}; retrieved.")
+        return order_dtos
 
     except Exception as e:
         logger.error(f"Error retrieving order(s) where {profile_id=}; {ticker=}; {order_type=}: {e}", exc_info=True)
         return None
 
-    finally:
-        session.close()
+
+def orders_page_query(
+        profile_id: int,
+        ticker: Optional[str] = None,
+        order_type: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        after: Optional[tuple[datetime, int]] = None,
+        limit: int = 100,
+        newest_first: bool = True
+) -> Select:
+    """
+    Builds the query of `get_orders_page`, which is shared with its async variant.
+    It selects one order more than `limit`, which tells whether there is a next page.
+    """
+    query: Select = select(OrderModel).where(OrderModel.profile_id == profile_id)
+
+    if ticker is not None:
+        query = query.where(OrderModel.ticker == ticker)
+    if order_type is not None:
+        query = query.where(OrderModel.type == order_type)
+    if start is not None:
+        query = query.where(OrderModel.timestamp >= start)
+    if end is not None:
+        query = query.where(OrderModel.timestamp < end)
+
+    if after is not None:
+        after_timestamp, after_id = after
+        if newest_first:
+            query = query.where(or_(OrderModel.timestamp < after_timestamp,
+                                    and_(OrderModel.timestamp == after_timestamp, OrderModel.id < after_id)))
+        else:
+            query = query.where(or_(OrderModel.timestamp > after_timestamp,
+                                    and_(OrderModel.timestamp == after_timestamp, OrderModel.id > after_id)))
+
+    if newest_first:
+        query = query.order_by(OrderModel.timestamp.desc(), OrderModel.id.desc())
+    else:
+        query = query.order_by(OrderModel.timestamp.asc(), OrderModel.id.asc())
+
+    return query.limit(limit + 1)
+
+
+def get_orders_page(
+        profile_id: int,
+        ticker: Optional[str] = None,
+        order_type: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        after: Optional[tuple[datetime, int]] = None,
+        limit: int = 100,
+        newest_first: bool = True
+) -> tuple[list[OrderDTO], Optional[tuple[datetime, int]]] | None:
+    """
+    Retrieves one page of the orders of a profile with keyset pagination over (timestamp, id).
+    Unlike an offset, the cursor costs the same on every page, as it seeks directly into the index.
+
+    :param profile_id: The ID of the profile.
+    :param ticker: Only orders of this ticker (optional).
+    :param order_type: Only orders of this type (optional).
+    :param start: Only orders at or after this time (optional).
+    :param end: Only orders before this time (optional).
+    :param after: The cursor returned with the previous page, None for the first page.
+    :param limit: The maximum amount of orders per page.
+    :param newest_first: Whether to page from the newest to the oldest order.
+
+    :return: The orders of the page and the cursor of the next page, None as cursor on the last page.
+        None on error.
+    """
+    try:
+        with session_scope() as session:
+            query: Select = orders_page_query(profile_id, ticker, order_type, start, end, after, limit, newest_first)
+
+            # One extra row tells whether there is a next page
+            orders: list[OrderModel] = list(session.scalars(query))
+            order_dtos: list[OrderDTO] = [convert_to_dto(order) for order in orders[:limit]]
+
+        cursor: Optional[tuple[datetime, int]] = (
+            (order_dtos[-1].timestamp, order_dtos[-1].id) if len(orders) > limit else None
+        )
+        logger.info(f"{len(order_dtos)} orders where {profile_id=}; {ticker=}; {order_type=}; {start=}; {end=}; "
+                    f"{after=}; retrieved.")
+        return order_dtos, cursor
+
+    except Exception as e:
+        logger.error(f"Error retrieving orders page where {profile_id=}; {ticker=}; {order_type=}; {after=}: {e}",
+                     exc_info=True)
+        return None
+
+
+def get_order_aggregates(
+        profile_id: int,
+        ticker: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+) -> list[OrderAggregateDTO] | None:
+    """
+    Aggregates the orders of a profile per ticker and day in the database.
+
+    :param profile_id: The ID of the profile.
+    :param ticker: Only orders of this ticker (optional).
+    :param start: Only orders at or after this time (optional).
+    :param end: Only orders before this time (optional).
+
+    :return: The aggregates ordered by day and ticker or None on error.
+    """
+    try:
+        with session_scope() as session:
+            if session.get_bind().dialect.name == "postgresql":
+                day = func.to_char(func.date_trunc("day", OrderModel.timestamp), "YYYY-MM-DD")
+            else:
+                day = func.strftime("%Y-%m-%d", OrderModel.timestamp)
+
+            is_buy = func.upper(OrderModel.type) == "BUY"
+            is_sell = func.upper(OrderModel.type) == "SELL"
+            value = OrderModel.quantity * OrderModel.price
+
+            query = (
+                select(
+                    OrderModel.ticker,
+                    day.label("day"),
+                    func.count(OrderModel.id),
+                    func.coalesce(func.sum(case((is_buy, OrderModel.quantity), else_=0)), 0),
+                    func.coalesce(func.sum(case((is_sell, OrderModel.quantity), else_=0)), 0),
+                    func.coalesce(func.sum(case((is_buy, value), else_=0)), 0),
+                    func.coalesce(func.sum(case((is_sell, value), else_=0)), 0),
+                )
+                .where(OrderModel.profile_id == profile_id)
+                .group_by(OrderModel.ticker, day)
+                .order_by(day, OrderModel.ticker)
+            )
+
+            if ticker is not None:
+                query = query.where(OrderModel.ticker == ticker)
+            if start is not None:
+                query = query.where(OrderModel.timestamp >= start)
+            if end is not None:
+                query = query.where(OrderModel.timestamp < end)
+
+            aggregates: list[OrderAggregateDTO] = [
+                OrderAggregateDTO(ticker=row[0], day=row[1], orders=row[2], buy_quantity=row[3],
+                                  sell_quantity=row[4], buy_value=row[5], sell_value=row[6])
+                for row in session.execute(query)
+            ]
+
+        logger.info(f"{len(aggregates)} order aggregates where {profile_id=}; {ticker=}; {start=}; {end=}; retrieved.")
+        return aggregates
+
+    except Exception as e:
+        logger.error(f"Error aggregating orders where {profile_id=}; {ticker=}; {start=}; {end=}: {e}", exc_info=True)
+        return None
+
+
+def order_partition_statements(months_ahead: int = 3, now: Optional[datetime] = None) -> list[str]:
+    """
+    Builds the statements which create the monthly partitions of the orders table from the current month
+    up to `months_ahead` and a default partition for everything outside of them.
+
+    Rows of a month without a partition land in the default partition, Postgres refuses to create a partition
+    over them. A missing month is therefore created as a plain table, its rows are moved out of the default
+    partition and only then it is attached.
+
+    :param months_ahead: The amount of future months to create partitions for.
+    :param now: The current time, defaults to now.
+
+    :return: The idempotent statements, executed in one transaction.
+    """
+    month: datetime = (now or datetime.now()).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    statements: list[str] = ["CREATE TABLE IF NOT EXISTS orders_default PARTITION OF orders DEFAULT"]
+
+    for _ in range(months_ahead + 1):
+        next_month: datetime = month + relativedelta(months=1)
+        partition: str = f"orders_{month:%Y_%m}"
+        bounds: str = f"\"timestamp\" >= '{month:%Y-%m-%d}' AND \"timestamp\" < '{next_month:%Y-%m-%d}'"
+        statements.append(
+            f"DO $$ BEGIN "
+            f"IF to_regclass('{partition}') IS NULL THEN "
+            f"CREATE TABLE {partition} (LIKE orders INCLUDING DEFAULTS INCLUDING CONSTRAINTS); "
+            f"WITH moved AS (DELETE FROM orders_default WHERE {bounds} RETURNING *) "
+            f"INSERT INTO {partition} SELECT * FROM moved; "
+            f"ALTER TABLE orders ATTACH PARTITION {partition} "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{next_month:%Y-%m-%d}'); "
+            f"END IF; "
+            f"END $$"
+        )
+        month = next_month
+
+    return statements
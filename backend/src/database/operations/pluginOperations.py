@@ -1,14 +1,14 @@
 from logging import getLogger
-from typing import Type
+from typing import Optional, Type
 
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import sessionmaker
-from src.database import PluginDTO, PluginModel, engine
+from sqlalchemy.orm.exc import StaleDataError
+from src.database import Change, PluginDTO, PluginModel, change_notifier, read_cache, retry_on_conflict, session_scope
+from src.exceptions import ConcurrentUpdateError
 
 logger = getLogger("oracle.app")
 
-Session = sessionmaker(bind=engine)
-
 
 def convert_to_dto(plugin: PluginModel) -> PluginDTO | None:
     """
@@ -21,9 +21,23 @@ def convert_to_dto(plugin: PluginModel) -> PluginDTO | None:
         profile_id=plugin.profile_id,
         name=plugin.name,
         settings=plugin.settings,
+        version=plugin.version,
     )
 
 
+def load_dtos(session, **filters) -> list[PluginDTO]:
+    """
+    Loads the plugins matching the filters as plain rows, without building ORM objects or plugin instances.
+
+    :param session: The session of the unit of work.
+    :param filters: The column values to filter by.
+
+    :return: The list of PluginDTOs.
+    """
+    columns = [PluginModel.id, PluginModel.profile_id, PluginModel.name, PluginModel.settings, PluginModel.version]
+    return [PluginDTO(*row) for row in session.execute(select(*columns).filter_by(**filters))]
+
+
 def create_plugin(
         profile_id: int, name: str, settings: dict
 ) -> PluginDTO | None:
@@ -36,31 +50,33 @@ def create_plugin(
 
     :return: The newly created Plugin object.
     """
-    session = Session()
-
     try:
-        new_plugin = PluginModel(
-            profile_id=profile_id,
-            name=name,
-            settings=settings,
-        )
-        session.add(new_plugin)
-        session.commit()
+        with session_scope() as session:
+            new_plugin = PluginModel(
+                profile_id=profile_id,
+                name=name,
+                settings=settings,
+            )
+            session.add(new_plugin)
+            session.flush()
+            read_cache.invalidate_on_commit(session, "plugins")
+            plugin_dto = convert_to_dto(new_plugin)
+            change_notifier.publish(session, Change(
+                table="plugins", op="insert", id=plugin_dto.id, profile_id=profile_id, version=plugin_dto.version,
+                fields={"name": name, "settings": settings}
+            ))
 
         logger.info(
             f"Plugin {name=}; {settings=}; created successfully for {profile_id=}."
         )
-        return convert_to_dto(new_plugin)
+        return plugin_dto
 
     except IntegrityError as e:
         logger.error(f"Error creating plugin {name=}; {settings=}; for {profile_id=}: {e}", exc_info=True)
-        session.rollback()
         return None
 
-    finally:
-        session.close()
-
 
+@read_cache.cached("plugins")
 def get_plugin(
         id: int | None = None,
         profile_id: int | None = None,
@@ -75,19 +91,17 @@ def get_plugin(
 
     :return: The Plugin object or None if not found.
     """
-    session = Session()
-
     try:
-        if id is not None:
-            logger.info(f"Plugin with ID {id} retrieved.")
-            return convert_to_dto(session.get(PluginModel, id))
-        elif profile_id is not None:
-            plugin_dtos: list[PluginDTO] = [convert_to_dto(plugin) for plugin in
-                    session.query(PluginModel).filter_by(profile_id=profile_id).all()]
-        elif name is not None:
-            plugin_dtos: list[PluginDTO] = convert_to_dto(session.query(PluginModel).filter_by(name=name).first())
-        else:
-            plugin_dtos: list[PluginDTO] = [convert_to_dto(plugin) for plugin in session.query(PluginModel).all()]
+        with session_scope() as session:
+            if id is not None:
+                logger.info(f"Plugin with ID {id} retrieved.")
+                return convert_to_dto(session.get(PluginModel, id))
+            elif profile_id is not None:
+                plugin_dtos: list[PluginDTO] = load_dtos(session, profile_id=profile_id)
+            elif name is not None:
+                plugin_dtos: list[PluginDTO] = convert_to_dto(session.query(PluginModel).filter_by(name=name).first())
+            else:
+                plugin_dtos: list[PluginDTO] = load_dtos(session)
 
         logger.info(f"{len(plugin_dtos)} Plugins where {id=}; {profile_id=}; {name=} retrieved.")
         return plugin_dtos
@@ -96,12 +110,9 @@ def get_plugin(
         logger.error(f"Error retrieving plugin(s) where {id=}; {profile_id=}; {name=}: {e}", exc_info=True)
         return None
 
-    finally:
-        session.close()
-
 
 def update_plugin(
-        id: int, name: str | None = None, settings: dict | None = None
+        id: int, name: str | None = None, settings: dict | None = None, expected_version: Optional[int] = None
 ) -> bool:
     """
     Updates a plugin in the database.
@@ -109,34 +120,52 @@ def update_plugin(
     :param id: The ID of the plugin to update.
     :param name: The new plugin name (optional).
     :param settings: The new plugin settings (optional).
+    :param expected_version: The version of the plugin the changes were based on. If given, the update
+        is a compare-and-swap which fails instead of overwriting a concurrent change (optional).
 
     :return: True if the plugin was updated successfully, False otherwise.
+
+    :raises ConcurrentUpdateError: If the plugin is no longer at `expected_version`.
     """
-    session = Session()
+    def apply() -> bool:
+        with session_scope() as session:
+            # Reloaded on every attempt, the flush only succeeds if the version is still the one read here
+            plugin = session.get(PluginModel, id, populate_existing=True)
+            if not plugin:
+                logger.warning(f"Plugin with ID {id} not found.")
+                return False
+            if expected_version is not None and plugin.version != expected_version:
+                raise ConcurrentUpdateError(table="plugins", id=id, expected_version=expected_version)
+
+            if name:
+                plugin.name = name
+            if settings:
+                plugin.settings = settings
+            # Flushed here to publish the incremented version
+            session.flush()
+            read_cache.invalidate_on_commit(session, "plugins")
+            change_notifier.publish(session, Change(
+                table="plugins", op="update", id=id, profile_id=plugin.profile_id, version=plugin.version,
+                fields={field: value for field, value in (("name", name), ("settings", settings)) if value}
+            ))
+        return True
 
     try:
-        plugin = session.get(PluginModel, id)
-        if not plugin:
-            logger.warning(f"Plugin with ID {id} not found.")
+        # A fixed expected version can't match on a retry, the caller has to reload what it edited
+        if not (apply() if expected_version is not None else retry_on_conflict(apply)):
             return False
 
-        if name:
-            plugin.name = name
-        if settings:
-            plugin.settings = settings
-
-        session.commit()
         logger.info(f"Plugin with ID {id} updated {name=}; {settings=}; successfully.")
         return True
 
+    except ConcurrentUpdateError:
+        raise
+    except StaleDataError as e:
+        raise ConcurrentUpdateError(table="plugins", id=id, expected_version=expected_version) from e
     except Exception as e:
         logger.error(f"Error updating {name=}; {settings=} for plugin with ID {id}: {e}", exc_info=True)
-        session.rollback()
         return False
 
-    finally:
-        session.close()
-
 
 def delete_plugin(id: int) -> bool:
     """
@@ -146,23 +175,20 @@ def delete_plugin(id: int) -> bool:
 
     :return: True if the plugin was deleted successfully, False if not found.
     """
-    session = Session()
-
     try:
-        plugin = session.get(PluginModel, id)
-        if plugin:
+        with session_scope() as session:
+            plugin = session.get(PluginModel, id)
+            if not plugin:
+                logger.warning(f"Plugin with ID {id} not found.")
+                return False
+
             session.delete(plugin)
-            session.commit()
-            logger.info(f"Plugin with ID {id} deleted successfully.")
-            return True
-        else:
-            logger.warning(f"Plugin with ID {id} not found.")
-            return False
+            read_cache.invalidate_on_commit(session, "plugins")
+            change_notifier.publish(session, Change(table="plugins", op="delete", id=id, profile_id=plugin.profile_id))
+
+        logger.info(f"Plugin with ID {id} deleted successfully.")
+        return True
 
     except Exception as e:
         logger.error(f"Error deleting plugin with ID {id}: {e}", exc_info=True)
-        session.rollback()
         return False
-
-    finally:
-        session.close()
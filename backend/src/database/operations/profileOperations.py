@@ -1,14 +1,16 @@
+import json
+from dataclasses import asdict
 from logging import getLogger
-from typing import Type
+from typing import Optional, Type
 
+from sqlalchemy import Update, cast, func, update
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import sessionmaker
-from src.database import ProfileDTO, ProfileModel, engine
+from src.database import Change, ProfileDTO, ProfileModel, change_notifier, read_cache, session_scope
+from src.exceptions import ConcurrentUpdateError
 
 logger = getLogger("oracle.app")
 
-Session = sessionmaker(bind=engine)
-
 
 def convert_to_dto(profile: Type[ProfileModel] | ProfileModel | None) -> ProfileDTO | None:
     """
@@ -28,7 +30,8 @@ def convert_to_dto(profile: Type[ProfileModel] | ProfileModel | None) -> Profile
         paper_wallet=profile.paper_wallet,
 
         buy_limit=profile.buy_limit,
-        sell_limit=profile.sell_limit
+        sell_limit=profile.sell_limit,
+        version=profile.version
     )
 
 
@@ -47,38 +50,41 @@ def create_profile(
 
     :return: The newly created profile object.
     """
-    session = Session()
-
     try:
-        # Create and add the new profile
-        new_profile = ProfileModel(
-            name=name,
-            balance=balance,
-            wallet=wallet,
-            paper_balance=paper_balance,
-            paper_wallet=wallet,
-            buy_limit=buy_limit,
-            sell_limit=sell_limit
-        )
+        with session_scope() as session:
+            # Create and add the new profile
+            new_profile = ProfileModel(
+                name=name,
+                balance=balance,
+                wallet=wallet,
+                paper_balance=paper_balance,
+                paper_wallet=wallet,
+                buy_limit=buy_limit,
+                sell_limit=sell_limit
+            )
 
-        session.add(new_profile)
-        session.commit()
+            session.add(new_profile)
+            session.flush()
+            profile_dto = convert_to_dto(new_profile)
+            read_cache.invalidate_on_commit(session, "profiles")
+            change_notifier.publish(session, Change(
+                table="profiles", op="insert", id=profile_dto.id, profile_id=profile_dto.id,
+                version=profile_dto.version,
+                fields={key: value for key, value in asdict(profile_dto).items() if key not in ("id", "version")}
+            ))
 
         logger.info(
             f"Profile {new_profile.id=}; {name=}; {balance=}; {wallet=}; {paper_balance=}; {buy_limit=}; {sell_limit=}; created successfully.")
-        return convert_to_dto(new_profile)
+        return profile_dto
 
     except IntegrityError as e:
         logger.error(
             f"Error creating profile {name=}; {balance=}; {wallet=}; {paper_balance=}; {buy_limit=}; {sell_limit=}: {e}",
             exc_info=True)
-        session.rollback()
         return None
 
-    finally:
-        session.close()
-
 
+@read_cache.cached("profiles", copy=ProfileDTO.copy)
 def get_profile(id: int = None, name: str = None) -> ProfileDTO | list[ProfileDTO] | None:
     """
     Retrieves a profile from the database based on profile ID or profile name.
@@ -89,31 +95,103 @@ def get_profile(id: int = None, name: str = None) -> ProfileDTO | list[ProfileDT
 
     :return: A Profile object, a list of all Profile objects or None if not found.
     """
-    session = Session()
-
     try:
-        if id is not None:
-            logger.info(f"Profile with ID {id} retrieved.")
-            return convert_to_dto(session.get(ProfileModel, id))
-
-        elif name is not None:
-            profile: Type[ProfileModel] | None = session.query(ProfileModel).filter_by(name=name).first()
-            logger.info(f"Profile where {name=} retrieved.")
-            return convert_to_dto(profile)
-        else:
-            profiles: list[Type[ProfileModel]] = session.query(ProfileModel).all()
-            logger.info(f"All Profiles retrieved.")
-            return [convert_to_dto(profile) for profile in profiles]
+        with session_scope() as session:
+            if id is not None:
+                logger.info(f"Profile with ID {id} retrieved.")
+                return convert_to_dto(session.get(ProfileModel, id))
+
+            elif name is not None:
+                profile: Type[ProfileModel] | None = session.query(ProfileModel).filter_by(name=name).first()
+                logger.info(f"Profile where {name=} retrieved.")
+                return convert_to_dto(profile)
+            else:
+                profiles: list[Type[ProfileModel]] = session.query(ProfileModel).all()
+                logger.info(f"All Profiles retrieved.")
+                return [convert_to_dto(profile) for profile in profiles]
 
     except Exception as e:
         logger.error(f"Error retrieving Profile: {e}", exc_info=True)
         return None
 
-    finally:
-        session.close()
 
+def wallet_patch(old: dict[str, float], new: dict[str, float]) -> dict[str, Optional[float]]:
+    """
+    Calculates the entries of a wallet which changed.
+
+    :param old: The wallet before the change.
+    :param new: The wallet after the change.
+
+    :return: The changed and added entries with their new amount, removed entries with None.
+    """
+    patch: dict[str, Optional[float]] = {ticker: amount for ticker, amount in new.items() if old.get(ticker) != amount}
+    patch.update({ticker: None for ticker in old.keys() - new.keys()})
+    return patch
+
+
+def _patched(column, patch: dict[str, Optional[float]], dialect: str):
+    """
+    Builds the expression which merges a patch into a JSON column, entries patched with None are removed.
+    """
+    if dialect == "postgresql":
+        merged = column.op("||")(cast(patch, JSONB))
+        # Wallet amounts are never null, so stripping nulls only removes the deleted entries
+        return func.jsonb_strip_nulls(merged) if None in patch.values() else merged
+
+    return func.json_patch(column, json.dumps(patch))
+
+
+def profile_update_statement(
+        id: int,
+        dialect: str,
+        columns: dict[str, any],
+        wallet_patch: Optional[dict] = None,
+        paper_wallet_patch: Optional[dict] = None,
+        expected_version: Optional[int] = None
+) -> Optional[Update]:
+    """
+    Builds the UPDATE of `update_profile`, which is shared with its async variant.
+
+    :param id: The ID of the profile to update.
+    :param dialect: The name of the database dialect.
+    :param columns: The new values of the columns, columns which are None are left unchanged.
+
+    :return: The statement returning the new version or None if nothing is updated.
+    """
+    values: dict[str, any] = {column: value for column, value in columns.items() if value is not None}
+    if columns.get("wallet") is None and wallet_patch:
+        values["wallet"] = _patched(ProfileModel.wallet, wallet_patch, dialect)
+    if columns.get("paper_wallet") is None and paper_wallet_patch:
+        values["paper_wallet"] = _patched(ProfileModel.paper_wallet, paper_wallet_patch, dialect)
+
+    if not values:
+        return None
+
+    query = update(ProfileModel).where(ProfileModel.id == id)
+    if expected_version is not None:
+        query = query.where(ProfileModel.version == expected_version)
+
+    return query.values(**values, version=ProfileModel.version + 1).returning(ProfileModel.version)
 
-from typing import Optional
+
+def profile_change(
+        id: int,
+        version: int,
+        columns: dict[str, any],
+        wallet_patch: Optional[dict] = None,
+        paper_wallet_patch: Optional[dict] = None
+) -> Change:
+    """
+    Builds the published change of `update_profile`, which is shared with its async variant.
+    Wallets are only sent as a patch if the whole wallet wasn't updated.
+    """
+    fields: dict[str, any] = {column: value for column, value in columns.items() if value is not None}
+    if columns.get("wallet") is None and wallet_patch:
+        fields["wallet_patch"] = wallet_patch
+    if columns.get("paper_wallet") is None and paper_wallet_patch:
+        fields["paper_wallet_patch"] = paper_wallet_patch
+
+    return Change(table="profiles", op="update", id=id, profile_id=id, version=version, fields=fields)
 
 
 def update_profile(
@@ -126,9 +204,15 @@ def update_profile(
         paper_wallet: Optional[dict] = None,
         buy_limit: Optional[float] = None,
         sell_limit: Optional[float] = None,
-) -> bool:
+        wallet_patch: Optional[dict] = None,
+        paper_wallet_patch: Optional[dict] = None,
+        expected_version: Optional[int] = None
+) -> Optional[int]:
     """
-    Updates a profile in the database.
+    Updates a profile in the database with a single UPDATE, which only sets the given columns.
+    Instead of rewriting a whole wallet, only its changed entries can be merged into the stored one.
+    Every update increments the version of the profile. If `expected_version` is given, the update is a
+    compare-and-swap which only succeeds if nobody updated the profile since that version was read.
 
     :param id: The ID of the profile to update.
     :param name: The new profile name (optional).
@@ -139,51 +223,51 @@ def update_profile(
     :param paper_wallet: The new paper wallet information for the profile (optional).
     :param buy_limit: The new buy limit of the profile (optional).
     :param sell_limit: The new sell limit of the profile (optional).
+    :param wallet_patch: The changed entries of the wallet, see `wallet_patch`. Ignored if `wallet` is given (optional).
+    :param paper_wallet_patch: The changed entries of the paper wallet, see `wallet_patch`.
+        Ignored if `paper_wallet` is given (optional).
+    :param expected_version: The version the update is based on (optional).
 
-    :return: True if the profile was updated successfully, False otherwise.
+    :return: The version of the profile after the update, None if it wasn't found or on error.
+
+    :raises ConcurrentUpdateError: If the profile is no longer at `expected_version`.
     """
-    session = Session()
+    columns: dict[str, any] = {
+        "name": name, "status": status, "balance": balance, "wallet": wallet, "paper_balance": paper_balance,
+        "paper_wallet": paper_wallet, "buy_limit": buy_limit, "sell_limit": sell_limit
+    }
 
     try:
-        # Retrieve the profile to update
-        profile = session.get(ProfileModel, id)
-        if not profile:
-            logger.warning(f"Profile with ID {id} not found.")
-            return False
-
-        # Update values if provided
-        if name is not None:
-            profile.name = name
-        if status is not None:
-            profile.status = status
-
-        if balance is not None:
-            profile.balance = balance
-        if wallet is not None:
-            profile.wallet = wallet
-
-        if paper_balance is not None:
-            profile.paper_balance = paper_balance
-        if paper_wallet is not None:
-            profile.paper_wallet = paper_wallet
-
-        if buy_limit is not None:
-            profile.buy_limit = buy_limit
-        if sell_limit is not None:
-            profile.sell_limit = sell_limit
-
-        session.commit()
+        with session_scope() as session:
+            query: Optional[Update] = profile_update_statement(
+                id, session.get_bind().dialect.name, columns, wallet_patch, paper_wallet_patch, expected_version
+            )
+            if query is None:
+                profile: Optional[ProfileModel] = session.get(ProfileModel, id)
+                return profile.version if profile is not None else None
+
+            version: Optional[int] = session.execute(query, execution_options={"synchronize_session": False}).scalar()
+            read_cache.invalidate_on_commit(session, "profiles")
+            if version is None:
+                if expected_version is not None and session.get(ProfileModel, id) is not None:
+                    raise ConcurrentUpdateError(table="profiles", id=id, expected_version=expected_version)
+
+                logger.warning(f"Profile with ID {id} not found.")
+                return None
+
+            change_notifier.publish(session, profile_change(id, version, columns, wallet_patch, paper_wallet_patch))
+
         logger.info(
-            f"Profile with ID {id} updated {name=}; {status=}; {balance=}; {wallet=}; {paper_balance=}; {paper_wallet=}; {buy_limit=}; {sell_limit=}; successfully.")
-        return True
+            f"Profile with ID {id} updated {name=}; {status=}; {balance=}; {wallet=}; {paper_balance=}; {paper_wallet=}; "
+            f"{buy_limit=}; {sell_limit=}; {wallet_patch=}; {paper_wallet_patch=}; successfully.")
+        return version
 
+    except ConcurrentUpdateError:
+        raise
     except Exception as e:
-        logger.error(f"Error updating {name=}; {status=}; {balance=}; {wallet=}; {paper_balance=}; {paper_wallet=}; {buy_limit=}; {sell_limit=}; for profile with ID {id}: {e}", exc_info=True)
-        session.rollback()
-        return False
-
-    finally:
-        session.close()
+        logger.error(f"Error updating {name=}; {status=}; {balance=}; {wallet=}; {paper_balance=}; {paper_wallet=}; {buy_limit=}; {sell_limit=}; "
+                     f"{wallet_patch=}; {paper_wallet_patch=}; for profile with ID {id}: {e}", exc_info=True)
+        return None
 
 
 def delete_profile(
@@ -197,34 +281,32 @@ def delete_profile(
 
     :return: True if the profile was deleted, False if not found or on error.
     """
-    session = Session()
-
     try:
-        profile = None
-        if id is not None:
-            profile = session.get(ProfileModel, id)
-        elif name is not None:
-            profile = (
-                session.query(ProfileModel).filter_by(name=name).first()
-            )
+        with session_scope() as session:
+            profile = None
+            if id is not None:
+                profile = session.get(ProfileModel, id)
+            elif name is not None:
+                profile = (
+                    session.query(ProfileModel).filter_by(name=name).first()
+                )
+
+            if not profile:
+                logger.warning(
+                    f"Profile with ID {id} or name {name} not found."
+                )
+                return False
 
-        if profile:
             session.delete(profile)
-            session.commit()
-            logger.info(
-                f"Profile {id if id else name} deleted successfully."
-            )
-            return True
-        else:
-            logger.warning(
-                f"Profile with ID {id} or name {name} not found."
-            )
-            return False
+            # The Trading Components and plugins of the profile are deleted with it
+            read_cache.invalidate_on_commit(session, "profiles", "trading_components", "plugins")
+            change_notifier.publish(session, Change(table="profiles", op="delete", id=profile.id, profile_id=profile.id))
+
+        logger.info(
+            f"Profile {id if id else name} deleted successfully."
+        )
+        return True
 
     except Exception as e:
         logger.error(f"Error deleting profile with ID {id}: {e}", exc_info=True)
-        session.rollback()
         return False
-
-    finally:
-        session.close()
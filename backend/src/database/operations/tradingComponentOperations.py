@@ -1,11 +1,14 @@
 from logging import getLogger
+from typing import Optional
 
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import sessionmaker
-from src.database import TradingComponentDTO, TradingComponentModel, engine
+from sqlalchemy.orm.exc import StaleDataError
+from src.database import (Change, TradingComponentDTO, TradingComponentModel, change_notifier, read_cache,
+                          retry_on_conflict, session_scope)
+from src.exceptions import ConcurrentUpdateError
 
 logger = getLogger("oracle.app")
-Session = sessionmaker(bind=engine)
 
 def convert_to_dto(trading_component: TradingComponentModel) -> TradingComponentDTO | None:
     """
@@ -21,8 +24,26 @@ def convert_to_dto(trading_component: TradingComponentModel) -> TradingComponent
         ticker=trading_component.ticker,
         interval=trading_component.interval,
         settings=trading_component.settings,
+        version=trading_component.version,
     )
 
+def load_dtos(session, **filters) -> list[TradingComponentDTO]:
+    """
+    Loads the Trading Components matching the filters as plain rows, without building ORM objects or instances.
+
+    :param session: The session of the unit of work.
+    :param filters: The column values to filter by.
+
+    :return: The list of TradingComponentDTOs.
+    """
+    columns = [
+        TradingComponentModel.id, TradingComponentModel.profile_id, TradingComponentModel.name,
+        TradingComponentModel.weight, TradingComponentModel.ticker, TradingComponentModel.interval,
+        TradingComponentModel.settings, TradingComponentModel.version
+    ]
+    return [TradingComponentDTO(*row) for row in session.execute(select(*columns).filter_by(**filters))]
+
+
 def create_trading_component(
         profile_id: int,
         name: str,
@@ -43,21 +64,25 @@ def create_trading_component(
 
     :return: The newly created trading_component object.
     """
-    session = Session()
-
     try:
-        new_trading_component = TradingComponentModel(
-            profile_id=profile_id,
-            name=name,
-            weight=weight,
-            ticker=ticker,
-            interval=interval,
-            settings=settings,
-        )
-
-        session.add(new_trading_component)
-        session.commit()
-        session.refresh(new_trading_component)
+        with session_scope() as session:
+            new_trading_component = TradingComponentModel(
+                profile_id=profile_id,
+                name=name,
+                weight=weight,
+                ticker=ticker,
+                interval=interval,
+                settings=settings,
+            )
+
+            session.add(new_trading_component)
+            session.flush()
+            read_cache.invalidate_on_commit(session, "trading_components")
+            change_notifier.publish(session, Change(
+                table="trading_components", op="insert", id=new_trading_component.id, profile_id=profile_id,
+                version=new_trading_component.version,
+                fields={"name": name, "weight": weight, "ticker": ticker, "interval": interval, "settings": settings}
+            ))
 
         logger.info(
             f"Trading Component with {profile_id=}; {name=}; {weight=}; {ticker=}; {interval=}; {settings=} created successfully."
@@ -71,16 +96,14 @@ def create_trading_component(
             ticker=new_trading_component.ticker,
             interval=new_trading_component.interval,
             settings=new_trading_component.settings,
+            version=new_trading_component.version,
         )
 
     except IntegrityError as e:
         logger.error(f"Error creating Trading Component {name}: {e}", exc_info=True)
-        session.rollback()
-
-    finally:
-        session.close()
 
 
+@read_cache.cached("trading_components")
 def get_trading_component(
         profile_id: int = None, trade_component_id: int = None, ticker: str = None
 ) -> list[TradingComponentDTO] | TradingComponentDTO | None:
@@ -93,44 +116,32 @@ def get_trading_component(
     :param ticker: The ticker of the Trading Component.
     :return: TradeComponentDTO or a list of TradeComponentDTO, or None if no result found.
     """
-    session = Session()
-
     try:
-        if ticker and profile_id:
-            logger.info(f"Trading Component with {profile_id=}; {ticker=} retrieved.")
-            return [
-                convert_to_dto(trading_component) for trading_component in session.query(TradingComponentModel).filter_by(
-                profile_id=profile_id, ticker=ticker
-                ).all()
-            ]
-
-        if trade_component_id:
-            trading_component: TradingComponentModel = session.get(TradingComponentModel, trade_component_id)
-            if trading_component:
-                logger.info(f"Trading Component with ID {trade_component_id} retrieved.")
-                return convert_to_dto(trading_component)
-            else:
-                logger.error(f"Trading Component with ID {trade_component_id} not found.")
-                return None
-
-        if profile_id:
-            logger.info(f"Trading Components with {profile_id=} retrieved.")
-            return [
-                convert_to_dto(trading_component) for trading_component in session.query(TradingComponentModel).filter_by(
-                profile_id=profile_id
-                ).all()
-            ]
-
-        logger.info("All Trading Components retrieved.")
-        return [convert_to_dto(trading_component) for trading_component in session.query(TradingComponentModel).all()]
+        with session_scope() as session:
+            if ticker and profile_id:
+                logger.info(f"Trading Component with {profile_id=}; {ticker=} retrieved.")
+                return load_dtos(session, profile_id=profile_id, ticker=ticker)
+
+            if trade_component_id:
+                trading_component: TradingComponentModel = session.get(TradingComponentModel, trade_component_id)
+                if trading_component:
+                    logger.info(f"Trading Component with ID {trade_component_id} retrieved.")
+                    return convert_to_dto(trading_component)
+                else:
+                    logger.error(f"Trading Component with ID {trade_component_id} not found.")
+                    return None
+
+            if profile_id:
+                logger.info(f"Trading Components with {profile_id=} retrieved.")
+                return load_dtos(session, profile_id=profile_id)
+
+            logger.info("All Trading Components retrieved.")
+            return load_dtos(session)
 
     except Exception as e:
         logger.error(f"Error retrieving Trading Component: {e}", exc_info=True)
         return None
 
-    finally:
-        session.close()
-
 
 def update_trading_component(
         trading_component_id: int,
@@ -138,6 +149,7 @@ def update_trading_component(
         ticker: str = None,
         interval: str = None,
         settings: dict = None,
+        expected_version: Optional[int] = None,
 ) -> bool:
     """
     Updates an existing Trading Component in the database.
@@ -147,14 +159,24 @@ def update_trading_component(
     :param ticker: The ticker of the Trading Component.
     :param interval: The interval of the Trading Component when fetching data.
     :param settings: The settings of the Trading Component.
-    :return:
-    """
-    session = Session()
+    :param expected_version: The version of the Trading Component the changes were based on. If given, the update
+        is a compare-and-swap which fails instead of overwriting a concurrent change (optional).
+    :return: True if the Trading Component was updated successfully, False otherwise.
 
-    try:
-        trading_component = session.get(TradingComponentModel, trading_component_id)
+    :raises ConcurrentUpdateError: If the Trading Component is no longer at `expected_version`.
+    """
+    def apply() -> bool:
+        with session_scope() as session:
+            # Reloaded on every attempt, the flush only succeeds if the version is still the one read here
+            trading_component = session.get(TradingComponentModel, trading_component_id, populate_existing=True)
+
+            if not trading_component:
+                logger.warning(f"Trading Component with ID {trading_component_id} not found.")
+                return False
+            if expected_version is not None and trading_component.version != expected_version:
+                raise ConcurrentUpdateError(table="trading_components", id=trading_component_id,
+                                            expected_version=expected_version)
 
-        if trading_component:
             if weight is not None:
                 trading_component.weight = weight
             if ticker is not None:
@@ -163,23 +185,35 @@ def update_trading_component(
                 trading_component.interval = interval
             if settings is not None:
                 trading_component.settings = settings
+            # Flushed here to publish the incremented version
+            session.flush()
+            read_cache.invalidate_on_commit(session, "trading_components")
+            change_notifier.publish(session, Change(
+                table="trading_components", op="update", id=trading_component_id,
+                profile_id=trading_component.profile_id, version=trading_component.version,
+                fields={field: value for field, value in (
+                    ("weight", weight), ("ticker", ticker), ("interval", interval), ("settings", settings)
+                ) if value is not None}
+            ))
+        return True
 
-            session.add(trading_component)
-            session.commit()
-            logger.info(f"Trading Component with ID {trading_component_id} updated {weight=}; {ticker=}; {interval=}; {settings=}; successfully.")
-            return True
-        else:
-            logger.warning(f"Trading Component with ID {trading_component_id} not found.")
+    try:
+        # A fixed expected version can't match on a retry, the caller has to reload what it edited
+        if not (apply() if expected_version is not None else retry_on_conflict(apply)):
             return False
 
+        logger.info(f"Trading Component with ID {trading_component_id} updated {weight=}; {ticker=}; {interval=}; {settings=}; successfully.")
+        return True
+
+    except ConcurrentUpdateError:
+        raise
+    except StaleDataError as e:
+        raise ConcurrentUpdateError(table="trading_components", id=trading_component_id,
+                                    expected_version=expected_version) from e
     except Exception as e:
         logger.error(f"Error updating {weight}; {ticker}; {interval}; {settings}; for Trading Component with ID {trading_component_id}: {e}", exc_info=True)
-        session.rollback()
         return False
 
-    finally:
-        session.close()
-
 
 def delete_trading_component(trading_component_id: int) -> bool:
     """
@@ -188,24 +222,24 @@ def delete_trading_component(trading_component_id: int) -> bool:
     :param trading_component_id: The ID of the Trading Component to delete.
     :return: False if the Trading Component is not deleted successfully or not found, True if the Trading Component is deleted successfully.
     """
-    session = Session()
-
     try:
-        trading_component = session.get(TradingComponentModel, trading_component_id)
+        with session_scope() as session:
+            trading_component = session.get(TradingComponentModel, trading_component_id)
+
+            if not trading_component:
+                logger.warning(f"Trading Component with ID {trading_component_id} not found.")
+                return False
 
-        if trading_component:
             session.delete(trading_component)
-            session.commit()
-            logger.info(f"Trading Component with ID {trading_component_id} deleted successfully.")
-            return True
-        else:
-            logger.warning(f"Trading Component with ID {trading_component_id} not found.")
-            return False
+            read_cache.invalidate_on_commit(session, "trading_components")
+            change_notifier.publish(session, Change(
+                table="trading_components", op="delete", id=trading_component_id,
+                profile_id=trading_component.profile_id
+            ))
+
+        logger.info(f"Trading Component with ID {trading_component_id} deleted successfully.")
+        return True
 
     except Exception as e:
         logger.error(f"Error deleting Trading Component with ID {trading_component_id}: {e}", exc_info=True)
-        session.rollback()
         return False
-
-    finally:
-        session.close()
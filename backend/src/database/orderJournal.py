@@ -0,0 +1,284 @@
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from logging import getLogger
+from typing import Optional
+
+from src.database.operations import bulk_insert_orders
+from src.utils import load_config
+
+logger = getLogger("oracle.app")
+
+
+class OrderJournal:
+    """
+    Append-only journal of executed fills which is bulk loaded into the `orders` table.
+
+    `record` appends one json line to the journal file and returns, a background thread fsyncs the file
+    every `fsync_interval` seconds and inserts the new lines every `load_interval` seconds. The position up to
+    which the journal was loaded is kept in an offset file, so after a crash the remaining lines are replayed.
+    Every fill has a unique `fill_id`, lines which were inserted but not yet marked as loaded are skipped.
+
+    Fills recorded before `start` are only appended to the file, they are loaded once the journal is started,
+    so recording never waits for the database.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            fsync_interval: float = 0.05,
+            load_interval: float = 1.0,
+            batch_size: int = 5000,
+            max_size: int = 64 * 1024 * 1024
+    ):
+        """
+        :param path: The path of the journal file, the offset file is stored next to it.
+        :param fsync_interval: The seconds between two fsyncs of the journal.
+        :param load_interval: The seconds between two bulk loads into the database.
+        :param batch_size: The maximum amount of orders per insert transaction.
+        :param max_size: The size in bytes from which a completely loaded journal is truncated.
+        """
+        self.path: str = path
+        self.offset_path: str = f"{path}.offset"
+        self.fsync_interval: float = fsync_interval
+        self.load_interval: float = load_interval
+        self.batch_size: int = batch_size
+        self.max_size: int = max_size
+
+        self._fd: Optional[int] = None
+        self._lock: threading.Lock = threading.Lock()
+        # Serializes bulk loads, the offset file is only written by one loader at a time
+        self._load_lock: threading.Lock = threading.Lock()
+        self._synced: threading.Condition = threading.Condition()
+        self._written_seq: int = 0
+        self._synced_seq: int = 0
+        self._stopped: threading.Event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_config(cls) -> 'OrderJournal':
+        """
+        Creates the journal from `order_journal` in `DB_CONFIG`.
+        """
+        config: dict[str, any] = (load_config("DB_CONFIG") or {}).get("order_journal", {})
+        return cls(
+            path=config.get("path", "data/orders.journal"),
+            fsync_interval=config.get("fsync_interval", 0.05),
+            load_interval=config.get("load_interval", 1.0),
+            batch_size=config.get("batch_size", 5000),
+        )
+
+    def start(self) -> None:
+        """
+        Replays the not yet loaded part of the journal and starts the background thread.
+        """
+        with self._lock:
+            if self._thread is not None:
+                return
+
+            self._open()
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="order-journal", daemon=True)
+
+        self.load()
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def record(
+            self,
+            profile_id: int,
+            order_type: str,
+            ticker: str,
+            quantity: float,
+            price: float,
+            timestamp: Optional[float] = None,
+            durable: bool = False
+    ) -> str:
+        """
+        Appends an executed fill to the journal.
+
+        :param profile_id: The ID of the profile.
+        :param order_type: The side of the fill, e.g. "BUY" or "SELL".
+        :param ticker: The ticker of the asset.
+        :param quantity: The quantity of the asset which was traded.
+        :param price: The price at which the asset was traded.
+        :param timestamp: The unix timestamp of the fill in seconds, defaults to now.
+        :param durable: Whether to wait until the fill is fsynced instead of returning right away.
+
+        :return: The `fill_id` of the fill.
+        """
+        fill_id: str = uuid.uuid4().hex
+        line: bytes = (json.dumps({
+            "fill_id": fill_id,
+            "profile_id": profile_id,
+            "type": order_type,
+            "ticker": ticker,
+            "quantity": quantity,
+            "price": price,
+            "timestamp": time.time() if timestamp is None else timestamp,
+        }, separators=(",", ":")) + "\n").encode("utf-8")
+
+        with self._lock:
+            # Before `start` the fills are only appended to the file, `start` replays them
+            self._open()
+            # A single write of an O_APPEND file descriptor, lines are never interleaved
+            os.write(self._fd, line)
+            self._written_seq += 1
+            seq: int = self._written_seq
+
+        if durable:
+            self.sync(seq)
+
+        return fill_id
+
+    def sync(self, seq: Optional[int] = None) -> None:
+        """
+        Blocks until the journal is fsynced up to the given write, or up to the latest write if not given.
+        """
+        seq = self._written_seq if seq is None else seq
+        if self._thread is None:
+            # No background thread fsyncs the journal before `start`
+            self._fsync()
+            return
+
+        with self._synced:
+            while self._synced_seq < seq and not self._stopped.is_set():
+                self._synced.wait(self.fsync_interval * 2)
+
+        if self._synced_seq < seq:
+            self._fsync()
+
+    def load(self) -> int:
+        """
+        Inserts all lines of the journal after the loaded offset into the `orders` table.
+
+        :return: The amount of inserted orders.
+        """
+        with self._load_lock:
+            offset: int = self._read_offset()
+            inserted: int = 0
+
+            try:
+                with open(self.path, "rb") as f:
+                    f.seek(offset)
+                    while True:
+                        orders: list[dict[str, any]] = []
+                        end: int = offset
+
+                        for line in f:
+                            # A partially written last line is loaded once it is complete
+                            if not line.endswith(b"\n"):
+                                break
+
+                            end += len(line)
+                            try:
+                                order: dict[str, any] = json.loads(line)
+                            except ValueError:
+                                logger.error(f"Skipping corrupt order journal line at byte {end - len(line)}: {line!r}")
+                                continue
+
+                            order["timestamp"] = datetime.fromtimestamp(order["timestamp"], tz=timezone.utc).replace(tzinfo=None)
+                            orders.append(order)
+                            if len(orders) >= self.batch_size:
+                                break
+
+                        if end == offset:
+                            break
+
+                        inserted += bulk_insert_orders(orders)
+                        offset = end
+                        self._write_offset(offset)
+                        f.seek(offset)
+            except FileNotFoundError:
+                return 0
+            except Exception as e:
+                logger.error(f"Failed to load the order journal {self.path} from byte {offset}: {e}", exc_info=True)
+
+            self._truncate_if_loaded(offset)
+            return inserted
+
+    def stop(self) -> None:
+        """
+        Stops the background thread, fsyncs the journal and loads the remaining fills.
+        """
+        thread: Optional[threading.Thread] = self._thread
+        self._stopped.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+        self._fsync()
+        self.load()
+
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            self._thread = None
+
+    def _open(self) -> None:
+        if self._fd is not None:
+            return
+
+        directory: str = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def _fsync(self) -> None:
+        with self._lock:
+            if self._fd is None:
+                return
+            seq: int = self._written_seq
+            fd: int = self._fd
+
+        if seq != self._synced_seq:
+            os.fsync(fd)
+
+        with self._synced:
+            self._synced_seq = max(self._synced_seq, seq)
+            self._synced.notify_all()
+
+    def _truncate_if_loaded(self, offset: int) -> None:
+        with self._lock:
+            if self._fd is None or offset < self.max_size or os.fstat(self._fd).st_size != offset:
+                return
+
+            # Resetting the offset first, a crash in between replays lines whose fills are skipped as duplicates,
+            # the other way around new lines would be skipped up to the outdated offset
+            self._write_offset(0)
+            os.ftruncate(self._fd, 0)
+            logger.info(f"Truncated the fully loaded order journal {self.path} at {offset} bytes.")
+
+    def _read_offset(self) -> int:
+        try:
+            with open(self.offset_path, "r") as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _write_offset(self, offset: int) -> None:
+        tmp_path: str = f"{self.offset_path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(str(offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.offset_path)
+
+    def _run(self) -> None:
+        next_load: float = time.monotonic() + self.load_interval
+
+        while not self._stopped.wait(self.fsync_interval):
+            try:
+                self._fsync()
+                if time.monotonic() >= next_load:
+                    self.load()
+                    next_load = time.monotonic() + self.load_interval
+            except Exception as e:
+                logger.error(f"Order journal background task failed: {e}", exc_info=True)
+
+
+order_journal: OrderJournal = OrderJournal.from_config()
@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from logging import getLogger
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session as SessionType
+
+from src.database.sessionManager import run_after_commit
+from src.utils import load_config
+
+logger = getLogger("oracle.app")
+
+_MISSING = object()
+
+
+class ReadCache:
+    """
+    Read-through cache of the lookups of profiles, Trading Components and plugins.
+
+    Results are cached per lookup and its arguments for `ttl` seconds, which bounds how long writes of other
+    processes stay unseen. Writes through the operations layer invalidate every lookup of their table, once
+    when they happen and again after the commit, so a lookup never caches a state older than the last commit.
+    Returned lists are copies. Mutable DTOs are copied for every caller by the `copy` of their lookup,
+    frozen ones are shared.
+    """
+
+    def __init__(self, enabled: bool = True, ttl: float = 30, max_entries: int = 1024):
+        """
+        :param enabled: If False every lookup queries the database.
+        :param ttl: The seconds a lookup is cached.
+        :param max_entries: The maximum amount of cached lookups, the least recently used ones are evicted.
+        """
+        self.enabled: bool = enabled
+        self.ttl: float = ttl
+        self.max_entries: int = max_entries
+
+        # {(table, lookup, args, kwargs): (expires, value)}
+        self._entries: OrderedDict[tuple, tuple[float, any]] = OrderedDict()
+        # Incremented on every invalidation, a lookup which started before one isn't cached
+        self._generations: dict[str, int] = {}
+        self._lock: threading.Lock = threading.Lock()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    @classmethod
+    def from_config(cls) -> 'ReadCache':
+        """
+        Creates the cache from `read_cache` in `DB_CONFIG`.
+        """
+        config: dict[str, any] = (load_config("DB_CONFIG") or {}).get("read_cache", {})
+        return cls(
+            enabled=config.get("enabled", True),
+            ttl=config.get("ttl", 30),
+            max_entries=config.get("max_entries", 1024),
+        )
+
+    def cached(self, table: str, copy: Optional[Callable[[any], any]] = None) -> Callable[[Callable], Callable]:
+        """
+        Decorates a lookup of the given table. The uncached lookup stays available as `__wrapped__`.
+
+        :param table: The table the lookup reads, invalidated by `invalidate`.
+        :param copy: Copies a returned value, or every value of a returned list, so callers can't change
+            the cached one (optional).
+        """
+        def decorator(lookup: Callable) -> Callable:
+            @wraps(lookup)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return lookup(*args, **kwargs)
+
+                key: tuple = (table, lookup.__name__, args, tuple(sorted(kwargs.items())))
+                with self._lock:
+                    value: any = self._get(key)
+                    generation: int = self._generations.get(table, 0)
+
+                if value is _MISSING:
+                    self.misses += 1
+                    value = lookup(*args, **kwargs)
+                    # Errors and misses are not cached, the next lookup queries again
+                    if value is not None:
+                        with self._lock:
+                            if self._generations.get(table, 0) == generation:
+                                self._put(key, value)
+                else:
+                    self.hits += 1
+
+                # Callers may change the returned value, not the cached one
+                if isinstance(value, list):
+                    return [copy(item) for item in value] if copy is not None else list(value)
+                return copy(value) if copy is not None and value is not None else value
+
+            return wrapper
+        return decorator
+
+    def invalidate(self, *tables: str) -> None:
+        """
+        Drops every cached lookup of the given tables.
+        """
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+            for key in [key for key in self._entries if key[0] in tables]:
+                del self._entries[key]
+
+    def invalidate_on_commit(self, session: SessionType, *tables: str) -> None:
+        """
+        Drops every cached lookup of the given tables now and again after the transaction of the session commits.
+        """
+        self.invalidate(*tables)
+        run_after_commit(session, lambda: self.invalidate(*tables))
+
+    def clear(self) -> None:
+        with self._lock:
+            for table in {key[0] for key in self._entries}:
+                self._generations[table] = self._generations.get(table, 0) + 1
+            self._entries.clear()
+
+    def _get(self, key: tuple) -> any:
+        entry: tuple[float, any] | None = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return _MISSING
+
+        self._entries.move_to_end(key)
+        return value
+
+    def _put(self, key: tuple, value: any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+read_cache: ReadCache = ReadCache.from_config()
+
@@ -0,0 +1,231 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from logging import getLogger
+from typing import AsyncIterator, Callable, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session as SessionType
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+logger = getLogger("oracle.app")
+
+# The single session factory of the database layer, bound to the engine in `src.database`.
+# Objects stay readable after the commit, so DTOs can be built without reloading them.
+Session = sessionmaker(expire_on_commit=False)
+# The session factory of the async operations, bound to the async engine on first use
+AsyncSessionFactory = async_sessionmaker(expire_on_commit=False)
+
+_local = threading.local()
+# The session of the current async unit of work and the task which owns it
+_async_session: ContextVar[Optional[tuple[AsyncSession, asyncio.Task]]] = ContextVar("async_session", default=None)
+
+
+class PoolMetrics:
+    """
+    Thread safe counters of the connection checkouts of a `TimedQueuePool`.
+    """
+
+    def __init__(self):
+        self._lock: threading.Lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.checkouts: int = 0
+        self.timeouts: int = 0
+        self.total_wait: float = 0
+        self.max_wait: float = 0
+        self.peak_checked_out: int = 0
+
+    def record_checkout(self, wait: float, checked_out: int) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+    def record_timeout(self, wait: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+
+pool_metrics: PoolMetrics = PoolMetrics()
+
+
+class TimedQueuePool(QueuePool):
+    """
+    A `QueuePool` which measures how long every checkout waits for a connection.
+    """
+
+    def _do_get(self):
+        start: float = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.record_timeout(time.perf_counter() - start)
+            logger.warning(f"Timed out waiting for a database connection, {self.status()}")
+            raise
+
+        pool_metrics.record_checkout(time.perf_counter() - start, self.checkedout())
+        return connection
+
+
+def pool_options(db_config: dict[str, any]) -> dict[str, any]:
+    """
+    Builds the pool arguments of `create_engine` from the `DB_CONFIG`.
+
+    :param db_config: The `DB_CONFIG` of the config file.
+
+    :return: The keyword arguments for `create_engine`.
+    """
+    return {
+        "poolclass": TimedQueuePool,
+        "pool_size": db_config.get("pool_size", 10),
+        "max_overflow": db_config.get("max_overflow", 20),
+        "pool_timeout": db_config.get("pool_timeout", 30),
+        "pool_recycle": db_config.get("pool_recycle", 1800),
+        "pool_pre_ping": db_config.get("pool_pre_ping", True),
+    }
+
+
+def get_pool_metrics() -> dict[str, any]:
+    """
+    :return: The checkout wait times and the current and peak utilization of the connection pool.
+    """
+    engine = Session.kw.get("bind")
+    pool = engine.pool if engine is not None else None
+    capacity: int = pool.size() + max(pool._max_overflow, 0) if isinstance(pool, QueuePool) else 0
+    checked_out: int = pool.checkedout() if isinstance(pool, QueuePool) else 0
+
+    return {
+        "checkouts": pool_metrics.checkouts,
+        "timeouts": pool_metrics.timeouts,
+        "avg_wait": pool_metrics.total_wait / pool_metrics.checkouts if pool_metrics.checkouts else 0,
+        "max_wait": pool_metrics.max_wait,
+        "checked_out": checked_out,
+        "peak_checked_out": pool_metrics.peak_checked_out,
+        "capacity": capacity,
+        "utilization": checked_out / capacity if capacity else 0,
+        "peak_utilization": pool_metrics.peak_checked_out / capacity if capacity else 0,
+    }
+
+
+def run_after_commit(session: SessionType, callback: Callable[[], any]) -> None:
+    """
+    Calls the callback once the outermost transaction of the session commits. It is discarded if the
+    transaction, or the savepoint it was registered in, is rolled back.
+
+    :param session: The session of the unit of work.
+    :param callback: The function to call after the commit.
+    """
+    transaction = session.get_nested_transaction() or session.get_transaction()
+    session.info.setdefault("after_commit", []).append((transaction, callback))
+
+
+@event.listens_for(SessionType, "after_commit")
+def _run_after_commit_callbacks(session: SessionType) -> None:
+    # Also fired when a savepoint is released, the callbacks wait for the commit of the outermost transaction
+    if session.in_nested_transaction():
+        return
+
+    for _, callback in session.info.pop("after_commit", ()):
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"After commit callback failed: {e}", exc_info=True)
+
+
+@event.listens_for(SessionType, "after_soft_rollback")
+def _discard_after_commit_callbacks(session: SessionType, previous_transaction) -> None:
+    callbacks: Optional[list[tuple[any, Callable[[], any]]]] = session.info.get("after_commit")
+    if not callbacks:
+        return
+
+    def rolled_back(transaction) -> bool:
+        while transaction is not None:
+            if transaction is previous_transaction:
+                return True
+            transaction = transaction.parent
+        return False
+
+    session.info["after_commit"] = [(transaction, callback) for transaction, callback in callbacks
+                                    if not rolled_back(transaction)]
+
+
+@contextmanager
+def session_scope() -> Iterator[SessionType]:
+    """
+    Provides the session of the current unit of work.
+
+    The outermost scope of a thread opens a session, commits it when the block succeeds and rolls it back
+    otherwise. Scopes opened inside it reuse the same session and run in a savepoint, so a failed nested
+    operation only rolls back its own changes. Grouping several operations in one scope therefore
+    uses a single connection and a single commit.
+
+    :return: The session of the unit of work.
+    """
+    session: Optional[SessionType] = getattr(_local, "session", None)
+
+    if session is not None:
+        with session.begin_nested():
+            yield session
+        return
+
+    if Session.kw.get("bind") is None:
+        # The engine is created on first use, see `get_engine`
+        from src.database.backends import get_engine
+        get_engine()
+
+    session = Session()
+    _local.session = session
+    try:
+        yield session
+        session.commit()
+    except BaseException:
+        session.rollback()
+        raise
+    finally:
+        _local.session = None
+        session.close()
+
+
+@asynccontextmanager
+async def async_session_scope() -> AsyncIterator[AsyncSession]:
+    """
+    Provides the session of the current async unit of work, the async counterpart of `session_scope`.
+
+    Scopes opened inside it by the same task reuse the session and run in a savepoint. Other tasks,
+    even if started inside the scope, open their own session, as a session can't be used concurrently.
+
+    :return: The session of the unit of work.
+    """
+    current: Optional[tuple[AsyncSession, asyncio.Task]] = _async_session.get()
+
+    if current is not None and current[1] is asyncio.current_task():
+        async with current[0].begin_nested():
+            yield current[0]
+        return
+
+    if AsyncSessionFactory.kw.get("bind") is None:
+        # The async engine is created on first use, see `get_async_engine`
+        from src.database.backends import get_async_engine
+        get_async_engine()
+
+    session: AsyncSession = AsyncSessionFactory()
+    token = _async_session.set((session, asyncio.current_task()))
+    try:
+        yield session
+        await session.commit()
+    except BaseException:
+        await session.rollback()
+        raise
+    finally:
+        _async_session.reset(token)
+        await session.close()
@@ -0,0 +1,258 @@
+import atexit
+import threading
+from logging import getLogger
+from typing import Callable, Optional
+
+from src.database.operations import update_profile
+from src.database.sessionManager import session_scope
+from src.exceptions import ConcurrentUpdateError
+from src.utils import load_config
+
+logger = getLogger("oracle.app")
+
+# The patch fields of `update_profile` and the wallet they patch
+_WALLET_PATCHES: dict[str, str] = {"wallet_patch": "wallet", "paper_wallet_patch": "paper_wallet"}
+
+
+def merge_updates(pending: dict[str, any], fields: dict[str, any]) -> dict[str, any]:
+    """
+    Merges a newer update of a profile into a pending one. Wallet patches are combined entry by entry,
+    a patch of a pending full wallet is applied to it and a full wallet replaces a pending patch.
+
+    :param pending: The pending fields, modified in place.
+    :param fields: The newer fields.
+
+    :return: The merged fields.
+    """
+    for key, value in fields.items():
+        if key in _WALLET_PATCHES:
+            wallet_key: str = _WALLET_PATCHES[key]
+            if wallet_key in pending:
+                wallet: dict[str, float] = {**pending[wallet_key], **value}
+                pending[wallet_key] = {ticker: amount for ticker, amount in wallet.items() if amount is not None}
+            else:
+                pending[key] = {**pending.get(key, {}), **value}
+        else:
+            if key in _WALLET_PATCHES.values():
+                pending.pop(f"{key}_patch", None)
+            pending[key] = value
+
+    return pending
+
+
+class WriteBehindQueue:
+    """
+    Coalesces profile updates in memory and persists them in batches from a background thread.
+
+    Successive updates of the same profile are merged, so only the latest value of every field is written.
+    Pending updates are flushed every `flush_interval` seconds or as soon as `max_pending` profiles are waiting,
+    all of them in one transaction. Remaining updates are flushed when the queue is stopped or the process exits.
+    The version every write produced is passed to the listener of the profile, see `listen`.
+    """
+
+    def __init__(self, enabled: bool = True, flush_interval: float = 0.5, max_pending: int = 100, max_attempts: int = 3):
+        """
+        :param enabled: If False every update is written synchronously.
+        :param flush_interval: The seconds between two flushes.
+        :param max_pending: The amount of pending profiles which triggers an early flush.
+        :param max_attempts: The amount of failed flushes after which the updates of a profile are dropped.
+        """
+        self.enabled: bool = enabled
+        self.flush_interval: float = flush_interval
+        self.max_pending: int = max_pending
+        self.max_attempts: int = max_attempts
+
+        # {profile_id: {field: value}}
+        self._pending: dict[int, dict[str, any]] = {}
+        self._attempts: dict[int, int] = {}
+        self._lock: threading.Lock = threading.Lock()
+        # Serializes flushes, so an older batch is never written after a newer one
+        self._flush_lock: threading.Lock = threading.Lock()
+        self._wakeup: threading.Event = threading.Event()
+        self._stopped: bool = False
+        self._thread: Optional[threading.Thread] = None
+        self._listeners: dict[int, Callable[[int], None]] = {}
+
+    @classmethod
+    def from_config(cls) -> 'WriteBehindQueue':
+        """
+        Creates the queue from `write_behind` in `DB_CONFIG`.
+        """
+        config: dict[str, any] = (load_config("DB_CONFIG") or {}).get("write_behind", {})
+        return cls(
+            enabled=config.get("enabled", True),
+            flush_interval=config.get("flush_interval", 0.5),
+            max_pending=config.get("max_pending", 100),
+            max_attempts=config.get("max_attempts", 3),
+        )
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def has_pending(self, profile_id: int) -> bool:
+        """
+        :return: Whether updates of the profile are waiting to be written.
+        """
+        return profile_id in self._pending
+
+    def listen(self, profile_id: int, listener: Optional[Callable[[int], None]]) -> None:
+        """
+        Registers the listener of a profile, it is called with the new version after every written update
+        of the profile, e.g. to keep the version its in-memory state is based on. Called outside the queue locks.
+
+        :param profile_id: The ID of the profile.
+        :param listener: The listener, None removes the current one.
+        """
+        with self._lock:
+            if listener is None:
+                self._listeners.pop(profile_id, None)
+            else:
+                self._listeners[profile_id] = listener
+
+    def submit(self, profile_id: int, sync: bool = False, expected_version: Optional[int] = None, **fields) -> bool:
+        """
+        Queues an update of a profile, fields which are None are ignored.
+
+        :param profile_id: The ID of the profile.
+        :param sync: Whether to write the update, together with the pending ones of the profile, before returning.
+        :param expected_version: Writes the update synchronously as a compare-and-swap on this version (optional).
+        :param fields: The fields to update, see `update_profile`.
+
+        :return: True if the update was queued or, if synchronous, written successfully.
+
+        :raises ConcurrentUpdateError: If the profile is no longer at `expected_version`, the pending updates are kept.
+        """
+        # Wallets are copied, the caller may keep changing them in place
+        fields = {key: dict(value) if isinstance(value, dict) else value
+                  for key, value in fields.items() if value is not None}
+
+        if sync or expected_version is not None or not self.enabled or self._stopped:
+            with self._flush_lock:
+                with self._lock:
+                    pending: dict[str, any] = self._pending.pop(profile_id, {})
+                    self._attempts.pop(profile_id, None)
+
+                merged: dict[str, any] = merge_updates(dict(pending), fields)
+                try:
+                    version: Optional[int] = update_profile(profile_id, expected_version=expected_version, **merged)
+                except ConcurrentUpdateError:
+                    with self._lock:
+                        self._pending[profile_id] = merge_updates(pending, self._pending.get(profile_id, {}))
+                    raise
+
+            if version is None:
+                return False
+            # Without fields nothing was written, the version is the stored one
+            if merged:
+                self._notify({profile_id: version})
+            return True
+
+        if not fields:
+            return True
+
+        with self._lock:
+            merge_updates(self._pending.setdefault(profile_id, {}), fields)
+            pending: int = len(self._pending)
+            self._start()
+
+        if pending >= self.max_pending:
+            self._wakeup.set()
+
+        return True
+
+    def flush(self) -> bool:
+        """
+        Writes all pending updates in one transaction, failed ones are queued again.
+
+        :return: True if every pending update was written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch: dict[int, dict[str, any]] = self._pending
+                self._pending = {}
+
+            if not batch:
+                return True
+
+            failed: dict[int, dict[str, any]] = {}
+            versions: dict[int, int] = {}
+            try:
+                with session_scope():
+                    for profile_id, fields in batch.items():
+                        # Every update runs in its own savepoint, so one failing profile doesn't roll back the batch
+                        version: Optional[int] = update_profile(profile_id, **fields)
+                        if version is None:
+                            failed[profile_id] = fields
+                        else:
+                            versions[profile_id] = version
+            except Exception as e:
+                logger.error(f"Failed to flush {len(batch)} profile updates: {e}", exc_info=True)
+                failed, versions = batch, {}
+
+            with self._lock:
+                for profile_id in batch.keys() - failed.keys():
+                    self._attempts.pop(profile_id, None)
+
+                for profile_id, fields in failed.items():
+                    attempts: int = self._attempts.get(profile_id, 0) + 1
+                    if attempts >= self.max_attempts:
+                        self._attempts.pop(profile_id, None)
+                        logger.error(f"Dropped updates {fields} of Profile with ID {profile_id} after {attempts} attempts.",
+                                     extra={"profile_id": profile_id})
+                        continue
+
+                    self._attempts[profile_id] = attempts
+                    # Newer updates submitted during the flush take precedence
+                    self._pending[profile_id] = merge_updates(fields, self._pending.get(profile_id, {}))
+
+            logger.debug(f"Flushed {len(batch) - len(failed)} of {len(batch)} profile updates.")
+
+        self._notify(versions)
+        return not failed
+
+    def stop(self) -> bool:
+        """
+        Stops the background thread and writes all pending updates, later updates are written synchronously.
+
+        :return: True if every pending update was written.
+        """
+        with self._lock:
+            self._stopped = True
+            thread: Optional[threading.Thread] = self._thread
+
+        self._wakeup.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+        return self.flush()
+
+    def _notify(self, versions: dict[int, int]) -> None:
+        for profile_id, version in versions.items():
+            listener: Optional[Callable[[int], None]] = self._listeners.get(profile_id)
+            if listener is None:
+                continue
+            try:
+                listener(version)
+            except Exception as e:
+                logger.error(f"Listener of profile with id {profile_id} failed: {e}", exc_info=True)
+
+    def _start(self) -> None:
+        if self._thread is not None:
+            return
+
+        self._thread = threading.Thread(target=self._run, name="write-behind-queue", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Write-behind flush failed: {e}", exc_info=True)
+
+
+write_behind_queue: WriteBehindQueue = WriteBehindQueue.from_config()
@@ -1,2 +1,4 @@
 from .fetchDataException import DataFetchError
 from .registryException import DuplicateError, MissingKeyError, RegistryError
+from .databaseException import ConcurrentUpdateError
+from .rateLimitException import RateLimitError
@@ -0,0 +1,22 @@
+class ConcurrentUpdateError(Exception):
+    """
+    Custom exception raised when a row was changed by another writer since it was read,
+    so a compare-and-swap update on its version didn't match.
+    """
+
+    default_exception_message = "The row was updated concurrently."
+
+    def __init__(self, message: str | None = None, **kwargs):
+        """
+        Initializes the ConcurrentUpdateError with a default message and optional parameters.
+
+        :param message: The error message to be raised with the exception. (optional)
+        :key kwargs: Additional parameters to be passed to the exception message. They will be appended to the error message
+        """
+        message = (
+            message if message is not None else ConcurrentUpdateError.default_exception_message
+        )
+
+        message += "\nArguments passed: " + str(kwargs)
+
+        super().__init__(message)
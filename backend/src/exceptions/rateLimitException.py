@@ -0,0 +1,22 @@
+class RateLimitError(Exception):
+    """
+    Custom exception raised when a request couldn't get its request weight from the weight governor in time,
+    e.g. while the circuit breaker is open after Binance rate limited the requests.
+    """
+
+    default_exception_message = "Request weight limit reached."
+
+    def __init__(self, message: str | None = None, **kwargs):
+        """
+        Initializes the RateLimitError with a default message and optional parameters.
+
+        :param message: The error message to be raised with the exception. (optional)
+        :key kwargs: Additional parameters to be passed to the exception message. They will be appended to the error message
+        """
+        message = (
+            message if message is not None else RateLimitError.default_exception_message
+        )
+
+        message += "\nArguments passed: " + str(kwargs)
+
+        super().__init__(message)
@@ -0,0 +1 @@
+from .backtestCache import BacktestCache, normalize_backtest_config, resume_partitions
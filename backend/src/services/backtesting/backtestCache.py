@@ -0,0 +1,245 @@
+import hashlib
+import json
+import os
+from logging import getLogger
+from typing import Optional
+
+import numpy as np
+
+from src.analysis.backtestMetrics import EquityCurveWriter, iter_equity_curve_blocks
+from src.constants import DATA_STORE_VERSION
+from src.utils import load_config
+
+logger = getLogger("oracle.app")
+
+
+def normalize_backtest_config(
+        trading_components: list['TradingComponentDTO'],
+        plugins: list['PluginDTO'],
+        tickers: list[str],
+        buy_limit: float,
+        sell_limit: float,
+        balance: float,
+) -> dict[str, any]:
+    """
+    Builds an order independent representation of everything that influences a backtest.
+    Database ids are left out on purpose, so two profiles with the same setup share their results.
+
+    :param trading_components: The Trading Components of the profile.
+    :param plugins: The plugins of the profile.
+    :param tickers: The tickers which are traded in the backtest.
+    :param buy_limit: The buy limit of the profile.
+    :param sell_limit: The sell limit of the profile.
+    :param balance: The starting balance of the backtest.
+
+    :return: A json serializable dictionary.
+    """
+    components: list[dict[str, any]] = [
+        {"name": tc.name, "weight": tc.weight, "ticker": tc.ticker, "interval": tc.interval, "settings": tc.settings}
+        for tc in trading_components
+    ]
+    plugin_configs: list[dict[str, any]] = [
+        {"name": plugin.name, "settings": plugin.settings} for plugin in plugins
+    ]
+
+    return {
+        "trading_components": sorted(components, key=lambda c: json.dumps(c, sort_keys=True, default=str)),
+        "plugins": sorted(plugin_configs, key=lambda p: json.dumps(p, sort_keys=True, default=str)),
+        "tickers": sorted(tickers),
+        "buy_limit": buy_limit,
+        "sell_limit": sell_limit,
+        "balance": balance,
+    }
+
+
+class BacktestCache:
+    """
+    On disk cache for the results of `Profile.backtest`.
+
+    Results are addressed by the hash of the normalized configuration, the start of the data range
+    and the data store version. Inside that directory every entry is stored per end of the data range
+    and the amount of partitions, so a later run over a longer range can resume from the latest cached prefix.
+
+    Next to every entry its equity curve is stored, see `EquityCurveWriter`. The partitions of a resumed run
+    generally differ from the ones of its prefix, they are rebuilt from the curve, see `resume_partitions`.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        """
+        :param cache_dir: The directory to store the results in. Defaults to the `cache_dir` in `BACKTEST_CONFIG`.
+        """
+        if cache_dir is None:
+            cache_dir = (load_config("BACKTEST_CONFIG") or {}).get("cache_dir", "cache/backtests")
+
+        self.cache_dir: str = cache_dir
+
+    @staticmethod
+    def config_hash(config: dict[str, any], start: int) -> str:
+        """
+        Hashes the normalized configuration together with the start of the range and the data store version.
+
+        :param config: The normalized configuration, see `normalize_backtest_config`.
+        :param start: The start of the data range as unix timestamp in milliseconds.
+
+        :return: The hex digest of the configuration.
+        """
+        payload: str = json.dumps(
+            {"config": config, "start": start, "data_store_version": DATA_STORE_VERSION},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, config_hash: str, end: int, partition_amount: int) -> Optional[dict[str, any]]:
+        """
+        Retrieves the exact entry for the given range end and partition amount.
+
+        :param config_hash: The hash returned by `config_hash`.
+        :param end: The end of the data range as unix timestamp in milliseconds.
+        :param partition_amount: The amount of partitions the backtest was requested with.
+
+        :return: The cached entry or None if not cached.
+        """
+        return self._read(os.path.join(self.cache_dir, config_hash, f"{end}_{partition_amount}.json"))
+
+    def get_prefix(self, config_hash: str, end: int) -> Optional[dict[str, any]]:
+        """
+        Retrieves the entry with the latest range end up to `end` whose equity curve is stored.
+
+        :param config_hash: The hash returned by `config_hash`.
+        :param end: The end of the data range as unix timestamp in milliseconds.
+
+        :return: The cached entry with the path of its curve as `curve_path` or None if no prefix is cached.
+        """
+        config_dir: str = os.path.join(self.cache_dir, config_hash)
+        if not os.path.isdir(config_dir):
+            return None
+
+        best_entry: Optional[dict[str, any]] = None
+        for file_name in os.listdir(config_dir):
+            if not file_name.endswith(".json"):
+                continue
+
+            try:
+                cached_end: int = int(file_name.split("_")[0])
+            except ValueError:
+                continue
+
+            if cached_end > end or (best_entry is not None and cached_end <= best_entry["end"]):
+                continue
+
+            curve_path: str = os.path.join(config_dir, f"{file_name[:-len('.json')]}.curve")
+            if not os.path.exists(curve_path):
+                continue
+
+            entry: Optional[dict[str, any]] = self._read(os.path.join(config_dir, file_name))
+            if entry is not None:
+                best_entry = {**entry, "curve_path": curve_path}
+
+        return best_entry
+
+    def open_curve(self, config_hash: str, end: int, partition_amount: int) -> EquityCurveWriter:
+        """
+        Opens a temporary equity curve file for the entry, it is only stored together with the entry by `put`.
+
+        :param config_hash: The hash returned by `config_hash`.
+        :param end: The end of the data range as unix timestamp in milliseconds.
+        :param partition_amount: The amount of partitions the backtest was requested with.
+        """
+        config_dir: str = os.path.join(self.cache_dir, config_hash)
+        os.makedirs(config_dir, exist_ok=True)
+        return EquityCurveWriter(os.path.join(config_dir, f"{end}_{partition_amount}.curve.{os.getpid()}.tmp"))
+
+    def put(
+            self,
+            config_hash: str,
+            end: int,
+            partition_amount: int,
+            entry: dict[str, any],
+            curve: Optional[EquityCurveWriter] = None
+    ) -> None:
+        """
+        Stores an entry, the file is written atomically so concurrent readers never see partial results.
+
+        :param config_hash: The hash returned by `config_hash`.
+        :param end: The end of the data range as unix timestamp in milliseconds.
+        :param partition_amount: The amount of partitions the backtest was requested with.
+        :param entry: The json serializable entry to store. Must contain the `end`, the resumable `state`
+            and the `order_candles`, the indices of the candles which changed the wallet.
+        :param curve: The equity curve of every candle, opened with `open_curve` (optional).
+        """
+        config_dir: str = os.path.join(self.cache_dir, config_hash)
+        path: str = os.path.join(config_dir, f"{end}_{partition_amount}.json")
+        tmp_path: str = f"{path}.{os.getpid()}.tmp"
+
+        try:
+            if curve is not None:
+                curve.close()
+            os.makedirs(config_dir, exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump(entry, f)
+            # The curve is in place before the entry, the entry marks both as complete
+            if curve is not None:
+                os.replace(curve.path, os.path.join(config_dir, f"{end}_{partition_amount}.curve"))
+            os.replace(tmp_path, path)
+            logger.debug(f"Stored backtest result {config_hash=}; {end=}; {partition_amount=}")
+        except OSError as e:
+            logger.warning(f"Failed to store backtest result {config_hash=}; {end=}: {e}")
+        finally:
+            # An interrupted write must not leave its partial files behind
+            for partial_path in (tmp_path, curve.path if curve is not None else None):
+                if partial_path is not None and os.path.exists(partial_path):
+                    os.remove(partial_path)
+
+    @staticmethod
+    def _read(path: str) -> Optional[dict[str, any]]:
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable backtest cache entry {path}: {e}")
+            return None
+
+
+def resume_partitions(
+        entry: dict[str, any],
+        partition_size: int,
+        balance: float,
+        curve: Optional[EquityCurveWriter] = None
+) -> tuple[list[float], list[int], float, int]:
+    """
+    Rebuilds the partitions of the candles of a cached prefix for the partition size of a new run.
+    The net worth of a partition is the equity at its last candle, the orders are counted from `order_candles`.
+
+    :param entry: The prefix returned by `BacktestCache.get_prefix`.
+    :param partition_size: The amount of candles per partition of the new run.
+    :param balance: The starting balance of the backtest.
+    :param curve: If given, the equity curve of the prefix is copied into it.
+
+    :return: The net worth gain and the amount of orders of every complete partition,
+        the liquidity at the start and the amount of orders of the open partition.
+    """
+    candles: int = entry["state"]["candles"]
+    boundary_equity: list[float] = []
+    row: int = 0
+
+    for timestamps, equity in iter_equity_curve_blocks(entry["curve_path"]):
+        timestamps, equity = timestamps[:max(candles - row, 0)], equity[:max(candles - row, 0)]
+        if curve is not None:
+            curve.extend(timestamps, equity)
+
+        # The last candles of the partitions in this block
+        first_boundary: int = -(-(row + 1) // partition_size) * partition_size - 1
+        boundary_equity += equity[np.arange(first_boundary, row + len(equity), partition_size) - row].tolist()
+        row += len(equity)
+
+    liquidity: list[float] = [balance, *boundary_equity]
+    net_worth_history: list[float] = [new / old for old, new in zip(liquidity, liquidity[1:])]
+
+    orders: np.ndarray = np.bincount(np.asarray(entry["order_candles"], dtype="int64") // partition_size,
+                                     minlength=len(boundary_equity) + 1)
+    return (net_worth_history, orders[:len(boundary_equity)].tolist(), liquidity[-1],
+            int(orders[len(boundary_equity):].sum()))
@@ -1,10 +1,12 @@
+import dataclasses
 import os
 from contextlib import nullcontext
 from logging import getLogger
 from threading import Lock
 from concurrent.futures import ProcessPoolExecutor
 import time
-from typing import Optional
+from datetime import datetime, timezone
+from typing import Callable, Optional
 from math import ceil
 
 from apscheduler.events import EVENT_JOB_ERROR, EVENT_JOB_EXECUTED
@@ -13,15 +15,21 @@ from pandas import DataFrame
 
 from src.database import get_plugin, delete_profile
 
-from src.api import fetch_klines, fetch_ticker_price
-from src.database import (TradingComponentDTO, PluginDTO, ProfileDTO, get_trading_component,
-                          update_profile, delete_plugin, update_trading_component,
-                          create_plugin, create_trading_component, update_plugin, delete_trading_component)
+from src.api import KlineFeed, Priority, fetch_klines, fetch_ticker_price, request_priority
+from src.api.utils import interval_ms
+from src.database import (Change, TradingComponentDTO, PluginDTO, ProfileDTO, get_trading_component,
+                          delete_plugin, update_trading_component,
+                          create_plugin, create_trading_component, update_plugin, delete_trading_component,
+                          get_profile, retry_on_conflict, wallet_patch, write_behind_queue)
+from src.analysis import BacktestMetrics, EquityCurveWriter
+from src.services.backtesting import BacktestCache, normalize_backtest_config, resume_partitions
 from src.services.entities.profile.tradeAgent import TradeAgent
 from src.services.entities.utils.intervalCalcs import parse_interval
 
+from src.utils import load_config
 from src.utils.registry import profile_registry
 from src.constants import Status
+from src.exceptions import ConcurrentUpdateError
 
 from src.services.entities.plugin import PluginJob
 
@@ -31,7 +39,17 @@ logger = getLogger("oracle.app")
 
 
 class Profile:
-    def __init__(self, profile: ProfileDTO):
+    def __init__(
+            self,
+            profile: ProfileDTO,
+            trading_components: Optional[list[TradingComponentDTO]] = None,
+            plugins: Optional[list[PluginDTO]] = None
+    ):
+        """
+        :param profile: The profile to load.
+        :param trading_components: The already loaded Trading Components of the profile, fetched if not given.
+        :param plugins: The already loaded plugins of the profile, fetched if not given.
+        """
         self.id: int = profile.id
         self.name: str = profile.name
         self.status: Status = Status(profile.status)
@@ -43,13 +61,21 @@ class Profile:
         # REMAKE: dict[id, TradingComponentDTO] and also for plugin
         self.buy_limit: float = profile.buy_limit
         self.sell_limit: float = profile.sell_limit
+        # The stored version the in-memory fields are based on, see `update`
+        self.version: int = profile.version
+        self._version_lock: Lock = Lock()
 
-        self._trading_components: list[TradingComponentDTO] = get_trading_component(profile_id=profile.id)
-        self._plugins: list[PluginDTO] = get_plugin(profile_id=profile.id)
+        self._trading_components: list[TradingComponentDTO] = (
+            trading_components if trading_components is not None else get_trading_component(profile_id=profile.id)
+        )
+        self._plugins: list[PluginDTO] = plugins if plugins is not None else get_plugin(profile_id=profile.id)
 
         self.trade_agent: TradeAgent = TradeAgent(profile=self)
+        # The live klines per ticker, updated incrementally by every evaluation, see `prep_dfs`
+        self._feeds: dict[str, KlineFeed] = {}
 
         profile_registry.register([self.id], self)
+        write_behind_queue.listen(self.id, self._on_written)
 
         self._lock: Lock = Lock()
 
@@ -70,7 +96,14 @@ class Profile:
     def plugins(self):
         return self._plugins
 
-    def change_status(self, status: Status, run_on_start: bool = False):
+    def change_status(self, status: Status, run_on_start: bool = False, persist: bool = True):
+        """
+        Pauses or resumes the scheduler of the profile and stores the new status.
+
+        :param status: The new status.
+        :param run_on_start: Whether to evaluate the profile right away when it is activated.
+        :param persist: Whether to write the status, False if it was already written by another process.
+        """
         with self._lock:
             if status == Status.INACTIVE or status.value >= Status.UNKNOWN_ERROR.value:
                 if not self.scheduler_is_paused:
@@ -89,8 +122,10 @@ class Profile:
                     self.scheduler_is_paused = False
 
         self.status = status
+        if not persist:
+            return True
 
-        if update_profile(self.id, status=self.status.value):
+        if write_behind_queue.submit(self.id, status=self.status.value):
             logger.info(
                 f"Changed Status for Profile with ID {self.id} and name: {self.name} to {self.status}",
                 extra={"profile_id": self.id},
@@ -109,15 +144,54 @@ class Profile:
 
             return False
 
-    def prep_dfs(self, days: int) -> dict[int, DataFrame]:
+    def prep_dfs(self, days: int = 0, start: Optional[str] = None, end: Optional[str] = None) -> dict[int, DataFrame]:
+        """
+        Fetches the klines for every Trading Component.
+
+        Every ticker is fetched once, in the coarsest interval all its Trading Components can be resampled from,
+        see `KlineFeed`. Without a time range the feeds are kept, so later calls only fetch the new klines.
+        Intervals without a fixed width, i.e. months, are fetched as they are.
+
+        :param days: The number of days to go back from now, ignored if `start` is given.
+        :param start: The UTC start time in the format 'YYYY-MM-DD HH:MM:SS' (optional).
+        :param end: The UTC end time in the format 'YYYY-MM-DD HH:MM:SS' (optional).
+        """
         tc_dfs: dict[int, DataFrame] = {}
+        is_live: bool = start is None and end is None
+        intervals: dict[str, set[str]] = {}
 
         for trading_component in self.trading_components:
-            tc_dfs[trading_component.id] = fetch_klines(
-                ticker=trading_component.ticker,
-                interval=trading_component.interval,
-                days=days
-            )
+            try:
+                interval_ms(trading_component.interval)
+            except ValueError:
+                tc_dfs[trading_component.id] = fetch_klines(
+                    ticker=trading_component.ticker,
+                    interval=trading_component.interval,
+                    start=start,
+                    end=end,
+                    days=days if start is None else 0,
+                    is_utc_time=start is not None
+                )
+                continue
+
+            intervals.setdefault(trading_component.ticker, set()).add(trading_component.interval)
+
+        feeds: dict[str, KlineFeed] = {}
+        for ticker, ticker_intervals in intervals.items():
+            feed: Optional[KlineFeed] = self._feeds.get(ticker) if is_live else None
+            if feed is not None and feed.intervals == ticker_intervals:
+                feed.update(days=days or None)
+            else:
+                feed = KlineFeed(ticker, ticker_intervals)
+                feed.load(days=days, start=start, end=end)
+            feeds[ticker] = feed
+
+        if is_live:
+            self._feeds = feeds
+
+        for trading_component in self.trading_components:
+            if trading_component.id not in tc_dfs:
+                tc_dfs[trading_component.id] = feeds[trading_component.ticker].klines(trading_component.interval)
 
         return tc_dfs
 
@@ -183,50 +257,133 @@ class Profile:
         else:
             self.trade_agent.trade(orders)
 
+    @request_priority(Priority.BACKTEST)
     def backtest(
             self,
             balance: float = 1_000_000,
-            partition_amount: float = 0,
-            days: int = 7
-    ) -> Optional[list[float]]:
+            partition_amount: int = 1,
+            days: int = 7,
+            start: Optional[str] = None,
+            end: Optional[str] = None,
+            use_cache: Optional[bool] = None,
+            keep_equity_curve: bool = False,
+            equity_curve_path: Optional[str] = None
+    ) -> Optional[tuple[list[float], list[int], BacktestMetrics]]:
+        """
+        Simulates the profile on historical data.
+
+        The data range is aligned to the smallest interval of the Trading Components, which makes
+        repeated runs over the same range deterministic. Results are cached under the normalized configuration,
+        exact repeats are returned without fetching any data and runs which extend a cached range forward
+        only simulate the new candles, the partitions of the cached candles are rebuilt from their stored
+        equity curve. Cached results are not read when an equity curve is requested.
+
+        Risk and performance metrics are accumulated online per candle, marking the positions
+        to the latest close of the Trading Component data. The net worth of a partition is the marked equity
+        at its last candle, so apart from the Trading Component data only one entry per partition is kept in memory.
+
+        :param balance: The starting balance.
+        :param partition_amount: The number of partitions to divide the data into for recalculating the ROI,
+            one value per partition is returned.
+        :param days: The number of days to backtest, ignored if `start` is given.
+        :param start: The UTC start time in the format 'YYYY-MM-DD HH:MM:SS' (optional).
+        :param end: The UTC end time in the format 'YYYY-MM-DD HH:MM:SS', defaults to now (optional).
+        :param use_cache: Whether to use the backtest cache, defaults to `use_cache` in `BACKTEST_CONFIG`.
+        :param keep_equity_curve: Whether the returned metrics keep the equity curve in memory.
+        :param equity_curve_path: If given, the equity curve is written to this file, see `EquityCurveWriter`.
+
+        :return: The net worth gain per partition, the amount of orders done per partition and the metrics.
+        """
         if not self.check_status_valid():
             return
 
-        def liquidate_wallet(wallet: dict[str, float]) -> float:
-            value: float = 0
-            for ticker, amount in wallet.items():
-                if amount == 0:
-                    continue
-
-                value += fetch_klines(
-                    ticker,
-                    "1s",
-                    start=str(df.index[i])[:-6],
-                    max_klines=1,
-                    is_utc_time=True
-                )['Close'].iloc[0] * amount
-            return value
+        if use_cache is None:
+            use_cache = (load_config("BACKTEST_CONFIG") or {}).get("use_cache", False)
+
+        time_format: str = "%Y-%m-%d %H:%M:%S"
+        min_interval_ms: int = parse_interval(
+            min([t.interval for t in self._trading_components], key=parse_interval)) * 1000
+
+        if end is not None:
+            end_ms: int = int(datetime.strptime(end, time_format).replace(tzinfo=timezone.utc).timestamp() * 1000)
+        else:
+            end_ms: int = int(datetime.now(timezone.utc).timestamp() * 1000)
+        # Align to the smallest interval and exclude the candle which is still open
+        end_ms -= end_ms % min_interval_ms
+
+        if start is not None:
+            start_ms: int = int(datetime.strptime(start, time_format).replace(tzinfo=timezone.utc).timestamp() * 1000)
+        else:
+            start_ms: int = end_ms - days * 24 * 60 * 60 * 1000
+
+        wants_equity_curve: bool = keep_equity_curve or equity_curve_path is not None
+        cache: Optional[BacktestCache] = BacktestCache() if use_cache else None
+        config_hash: Optional[str] = None
+        if cache is not None:
+            config_hash = BacktestCache.config_hash(
+                normalize_backtest_config(self._trading_components, self._plugins, list(self.paper_wallet.keys()),
+                                          self.buy_limit, self.sell_limit, balance),
+                start_ms
+            )
+
+            cached_entry: Optional[dict[str, any]] = cache.get(config_hash, end_ms, partition_amount)
+            if cached_entry is not None and not wants_equity_curve:
+                logger.info(
+                    f"Backtest for Profile with ID {self.id} and name: {self.name} retrieved from cache",
+                    extra={"profile_id": self.id})
+                return (cached_entry["net_worth_history"], cached_entry["order_history"],
+                        BacktestMetrics.from_state(cached_entry["state"]["metrics"]))
 
         starting_status: Status = self.status
 
         base_liquidity: float = balance
-        balance: float = balance
         backtest_wallet: dict[str, float] = {t: 0 for t in self.paper_wallet.keys()}
 
         net_worth_history: list[float] = []
         order_history: list[int] = []
         orders_done: int = 0
 
-        tc_dfs: dict[int, DataFrame] = self.prep_dfs(days=days)
+        tc_dfs: dict[int, DataFrame] = self.prep_dfs(
+            start=datetime.fromtimestamp(start_ms / 1000, timezone.utc).strftime(time_format),
+            end=datetime.fromtimestamp((end_ms - 1000) / 1000, timezone.utc).strftime(time_format)
+        )
         longest_df: DataFrame = max(tc_dfs.values(), key=len)
         max_candles: int = len(longest_df)
 
         parsed_tc_intervals: dict[int, int] = {t.id: parse_interval(t.interval) for t in self._trading_components}
         min_parsed_interval: int = parse_interval(min([t.interval for t in self._trading_components], key=parse_interval))
 
-        partition_amount: int = ceil(max_candles / partition_amount) if partition_amount > 1 else 1
+        partition_size: int = max(ceil(max_candles / max(partition_amount, 1)), 1)
 
+        # The finest interval is applied last, so it sets the mark price of its ticker
+        mark_price_tcs: list[TradingComponentDTO] = sorted(
+            self._trading_components, key=lambda t: parsed_tc_intervals[t.id], reverse=True)
+        mark_prices: dict[str, float] = {}
+        metrics: BacktestMetrics = BacktestMetrics.for_interval(
+            min_parsed_interval, keep_equity_curve=keep_equity_curve, equity_curve_path=equity_curve_path)
 
+        start_candle: int = 0
+        # The equity of every candle and the candles which changed the wallet, stored with the result
+        cache_curve: Optional[EquityCurveWriter] = (
+            cache.open_curve(config_hash, end_ms, partition_amount) if cache is not None else None
+        )
+        order_candles: list[int] = []
+        if cache is not None and not wants_equity_curve:
+            prefix_entry: Optional[dict[str, any]] = cache.get_prefix(config_hash, end_ms)
+            if prefix_entry is not None and prefix_entry["state"]["candles"] <= max_candles:
+                state: dict[str, any] = prefix_entry["state"]
+                start_candle = state["candles"]
+                net_worth_history, order_history, base_liquidity, orders_done = resume_partitions(
+                    prefix_entry, partition_size, balance, curve=cache_curve)
+                balance = state["balance"]
+                backtest_wallet = state["wallet"]
+                metrics = BacktestMetrics.from_state(state["metrics"])
+                order_candles = list(prefix_entry["order_candles"])
+
+                logger.info(
+                    f"Resuming Backtest for Profile with ID {self.id} and name: {self.name} "
+                    f"from cached candle {start_candle}/{max_candles}",
+                    extra={"profile_id": self.id})
 
         with self._lock:
             self.status = Status.BACKTESTING
@@ -234,14 +391,13 @@ class Profile:
             # Main Loop
             iter_tc_dfs: dict[int, DataFrame] = {}
 
-            for i in range(max_candles):
-                print(f"Iteration: {i}/{max_candles}")
+            for i in range(start_candle, max_candles):
                 for tc_id, df in tc_dfs.items():
                     iter_tc_dfs[tc_id] = df[0:int((i * min_parsed_interval) / parsed_tc_intervals[tc_id])]
 
                 orders: dict[str, float] = self.evaluate(tc_dfs=iter_tc_dfs)
 
-                is_partition_cap_reached: bool = (i + 1) % partition_amount == 0
+                is_partition_cap_reached: bool = (i + 1) % partition_size == 0
 
                 if orders:
                     prices: dict[str, float] = {}
@@ -258,19 +414,36 @@ class Profile:
                         )['Close'].iloc[0]
 
                     old_wallet = backtest_wallet.copy()
+                    fills: list[tuple[str, str, float, float]] = []
 
                     backtest_wallet, balance = self.trade_agent.process_order(
                         orders=orders,
                         wallet=backtest_wallet,
                         balance=balance,
-                        prices=prices
+                        prices=prices,
+                        fills=fills
                     )
 
+                    for fill in fills:
+                        metrics.record_fill(*fill)
+
                     if old_wallet != backtest_wallet:
                         orders_done += 1
+                        order_candles.append(i)
+
+                for tc in mark_price_tcs:
+                    if len(iter_tc_dfs[tc.id]) > 0:
+                        mark_prices[tc.ticker] = iter_tc_dfs[tc.id]['Close'].iloc[-1]
+
+                position_value: float = sum(
+                    amount * mark_prices.get(ticker, 0) for ticker, amount in backtest_wallet.items())
+                timestamp: int = int(longest_df.index[i].timestamp() * 1000)
+                metrics.update(timestamp, balance + position_value, position_value)
+                if cache_curve is not None:
+                    cache_curve.append(timestamp, balance + position_value)
 
                 if is_partition_cap_reached:
-                    liquidity: float = balance + liquidate_wallet(backtest_wallet)
+                    liquidity: float = balance + position_value
                     net_worth_history.append(liquidity / base_liquidity)
                     base_liquidity = liquidity
 
@@ -284,11 +457,26 @@ class Profile:
 
             # Cleanup
             self.status = starting_status
+            metrics.close()
             logger.info(
                 f"Backtesting for Profile with ID {self.id} and name: {self.name}",
                 extra={"profile_id": self.id}, )
 
-        return net_worth_history, order_history
+        if cache is not None:
+            cache.put(config_hash, end_ms, partition_amount, {
+                "end": end_ms,
+                "net_worth_history": net_worth_history,
+                "order_history": order_history,
+                "order_candles": order_candles,
+                "state": {
+                    "candles": max_candles,
+                    "balance": balance,
+                    "wallet": backtest_wallet,
+                    "metrics": metrics.to_state(),
+                }
+            }, curve=cache_curve)
+
+        return net_worth_history, order_history, metrics
 
     def update(
             self,
@@ -298,37 +486,209 @@ class Profile:
             wallet: Optional[dict[str, float]] = None,
             paper_wallet: Optional[dict[str, float]] = None,
             buy_limit: Optional[float] = None,
-            sell_limit: Optional[float] = None
+            sell_limit: Optional[float] = None,
+            sync: bool = True
     ):
-        with self._lock:
-            if update_profile(self.id, name=name, balance=balance, paper_balance=paper_balance, buy_limit=buy_limit,
-                              sell_limit=sell_limit, wallet=wallet, paper_wallet=paper_wallet):
-                self.name = name if name is not None else None
-                self.balance = balance if balance is not None else None
-                self.paper_balance = paper_balance if paper_balance is not None else None
-                self.wallet = wallet if wallet is not None else None
-                self.paper_wallet = paper_wallet if paper_wallet is not None else None
-                self.buy_limit = buy_limit if buy_limit is not None else None
-                self.sell_limit = sell_limit if sell_limit is not None else None
-                logger.info(f"Updated Profile with id: {self.id} to "
-                            f"{f"name: {name}" if name is not None else self.name}; "
-                            f"{f"balance: {balance}" if balance is not None else self.balance}; "
-                            f"{f"paper_balance: {paper_balance}" if paper_balance is not None else self.paper_balance}; "
-                            f"{f"buy_limit: {buy_limit}" if buy_limit is not None else self.buy_limit}; "
-                            f"{f"sell_limit: {sell_limit}" if sell_limit is not None else self.sell_limit}; "
-                            f"{f"wallet: {wallet}" if wallet is not None else self.wallet}; "
-                            f"{f"paper_wallet: {paper_wallet}" if paper_wallet is not None else self.paper_wallet}")
+        """
+        Updates the profile in memory and in the database, fields which are None are left unchanged.
+        Only fields which differ from the current ones are written, wallets as a patch of their changed entries.
+
+        :param sync: Whether to wait for the database write. If True the update is a compare-and-swap on
+            the version of the profile, if another process updated it in the meantime the profile is
+            reloaded and the update retried. If False the update is queued in the write-behind queue,
+            which coalesces it with other updates of the profile.
+
+        :return: True if the update was written or queued successfully.
+        """
+        fields: dict[str, any] = {
+            field: value for field, value in (
+                ("name", name), ("balance", balance), ("paper_balance", paper_balance), ("wallet", wallet),
+                ("paper_wallet", paper_wallet), ("buy_limit", buy_limit), ("sell_limit", sell_limit)
+            ) if value is not None
+        }
+        return self.update_with(lambda profile: fields, sync=sync)
+
+    def update_with(self, compute: Callable[["Profile"], dict[str, any]], sync: bool = True) -> bool:
+        """
+        Updates the profile with the fields computed from its current state, see `update`.
+        If another process updated the profile in the meantime, `compute` is re-run on the reloaded profile,
+        so fields derived from e.g. the wallets are based on the stored ones instead of the outdated ones.
+
+        :param compute: Returns the fields to update, as the keyword arguments of `update`, for the profile.
+        :param sync: Whether to wait for the database write, see `update`.
+
+        :return: True if the update was written or queued successfully.
+        """
+        fields: dict[str, any] = {}
+
+        def write() -> bool:
+            nonlocal fields
+            fields = {field: value for field, value in compute(self).items() if value is not None}
+
+            changes: dict[str, any] = {
+                field: value for field, value in fields.items()
+                if field not in ("wallet", "paper_wallet") and value != getattr(self, field)
+            }
+            for field in ("wallet", "paper_wallet"):
+                if field in fields and (patch := wallet_patch(getattr(self, field), fields[field])):
+                    changes[f"{field}_patch"] = patch
+
+            if not changes:
                 return True
-            else:
+            if not sync:
+                return write_behind_queue.submit(self.id, **changes)
+
+            # The new version is set by `_on_written`
+            return write_behind_queue.submit(self.id, expected_version=self.version, **changes)
+
+        with self._lock:
+            try:
+                written: bool = retry_on_conflict(write, on_conflict=self.refresh)
+            except ConcurrentUpdateError as e:
+                logger.error(f"Failed to update Profile with id: {self.id}; {e}", extra={"profile_id": self.id})
+                written = False
+
+            if not written:
                 logger.error(f"Failed to update Profile with id: {self.id}; and name: {self.name}")
                 return False
 
+            for field, value in fields.items():
+                setattr(self, field, dict(value) if field in ("wallet", "paper_wallet") else value)
+            logger.info(f"Updated Profile with id: {self.id} to "
+                        f"{"; ".join(f"{field}: {value}" for field, value in fields.items())}")
+            return True
+
+    def _on_written(self, version: int) -> None:
+        """
+        Called by the write-behind queue after it wrote updates of the profile.
+        Only a write directly following the known version contains nothing but changes of this process.
+        """
+        with self._version_lock:
+            if version == self.version + 1:
+                self.version = version
+
+    def refresh(self) -> bool:
+        """
+        Writes the pending updates of the profile and reloads its stored fields, e.g. after another process updated it.
+
+        :return: True if the profile was reloaded.
+        """
+        write_behind_queue.flush()
+        # Bypasses the read cache, the profile is reloaded because the cached state may be outdated
+        profile: Optional[ProfileDTO] = get_profile.__wrapped__(id=self.id)
+        if profile is None:
+            logger.error(f"Failed to reload Profile with id: {self.id}", extra={"profile_id": self.id})
+            return False
+
+        self.name = profile.name
+        self.balance = profile.balance
+        self.wallet = profile.wallet
+        self.paper_balance = profile.paper_balance
+        self.paper_wallet = profile.paper_wallet
+        self.buy_limit = profile.buy_limit
+        self.sell_limit = profile.sell_limit
+        with self._version_lock:
+            self.version = profile.version
+        return True
+
+    def apply_change(self, change: Change) -> bool:
+        """
+        Applies a change of the profile, its Trading Components or its plugins published by `change_notifier`,
+        e.g. after the CLI updated it in another process. Only the changed fields are applied, changes which
+        the profile already contains are ignored.
+
+        :param change: The published change.
+
+        :return: True if the change was applied.
+        """
+        if change.table == "profiles":
+            return self._apply_profile_change(change)
+        if change.table in ("trading_components", "plugins"):
+            return self._apply_component_change(change)
+        return False
+
+    def _apply_profile_change(self, change: Change) -> bool:
+        def patched(wallet: dict[str, float], patch: dict[str, Optional[float]]) -> dict[str, float]:
+            return {ticker: amount for ticker, amount in {**wallet, **patch}.items() if amount is not None}
+
+        with self._lock:
+            # Pending updates of this process are newer, the change they publish once written is applied instead
+            if (change.version is not None and change.version <= self.version) or write_behind_queue.has_pending(self.id):
+                return False
+
+            if change.reload:
+                return self.refresh()
+
+            fields: dict[str, any] = change.fields
+            for field in ("name", "balance", "paper_balance", "buy_limit", "sell_limit"):
+                if field in fields:
+                    setattr(self, field, fields[field])
+
+            if "wallet" in fields:
+                self.wallet = dict(fields["wallet"])
+            elif "wallet_patch" in fields:
+                self.wallet = patched(self.wallet, fields["wallet_patch"])
+            if "paper_wallet" in fields:
+                self.paper_wallet = dict(fields["paper_wallet"])
+            elif "paper_wallet_patch" in fields:
+                self.paper_wallet = patched(self.paper_wallet, fields["paper_wallet_patch"])
+
+            if change.version is not None:
+                with self._version_lock:
+                    self.version = change.version
+
+        logger.info(f"Applied change {fields} to Profile with id: {self.id}", extra={"profile_id": self.id})
+        if "status" in fields and Status(fields["status"]) != self.status:
+            self.change_status(Status(fields["status"]), persist=False)
+        return True
+
+    def _apply_component_change(self, change: Change) -> bool:
+        is_trading_component: bool = change.table == "trading_components"
+        attribute: str = "_trading_components" if is_trading_component else "_plugins"
+
+        with self._lock:
+            components: list[TradingComponentDTO | PluginDTO] = getattr(self, attribute)
+            current: Optional[TradingComponentDTO | PluginDTO] = next(
+                (component for component in components if component.id == change.id), None
+            )
+
+            if change.op == "delete":
+                if current is None:
+                    return False
+                setattr(self, attribute, [component for component in components if component.id != change.id])
+                return True
+
+            if current is not None and change.version is not None and change.version <= current.version:
+                return False
+
+            if change.reload or (current is None and change.op != "insert"):
+                component: Optional[TradingComponentDTO | PluginDTO] = (
+                    get_trading_component.__wrapped__(trade_component_id=change.id) if is_trading_component
+                    else get_plugin.__wrapped__(id=change.id)
+                )
+                if component is None:
+                    return False
+            elif current is None:
+                dto_class = TradingComponentDTO if is_trading_component else PluginDTO
+                component = dto_class(id=change.id, profile_id=self.id, version=change.version, **change.fields)
+            else:
+                # A new DTO, its instance is built from the changed settings on first use
+                component = dataclasses.replace(current, version=change.version, **change.fields)
+
+            setattr(self, attribute, [component if c.id == change.id else c for c in components] if current is not None
+                    else [*components, component])
+
+        logger.info(f"Applied change of {change.table} with id {change.id} to Profile with id: {self.id}",
+                    extra={"profile_id": self.id})
+        return True
+
     def delete(self, instance):
         if not delete_profile(self.id):
             return False
 
         self.change_status(Status.INACTIVE)
         profile_registry.remove(self.id)
+        write_behind_queue.listen(self.id, None)
 
         return True
 
@@ -360,24 +720,35 @@ class Profile:
             name: str, weight: float,
             ticker: str,
             interval: str,
-            settings: dict[str, any]
+            settings: dict[str, any],
+            expected_version: Optional[int] = None
     ):
+        """
+        :param expected_version: The version of the trading component the changes are based on, if given the
+            update fails instead of overwriting the trading component if it was updated in the meantime.
+        """
         with self._lock:
-            if update_trading_component(trading_component_id=trading_component_id, weight=weight, ticker=ticker,
-                                        interval=interval, settings=settings):
+            try:
+                updated_stored: bool = update_trading_component(
+                    trading_component_id=trading_component_id, weight=weight, ticker=ticker, interval=interval,
+                    settings=settings, expected_version=expected_version)
+            except ConcurrentUpdateError as e:
+                logger.error(f"Failed to update trading_component with ID {trading_component_id} in profile with ID "
+                             f"{self.id}; {e}", extra={"profile_id": self.id})
+                return False
+
+            if updated_stored:
+                # Rebuilt from the stored row, so it carries the incremented version
+                updated: Optional[TradingComponentDTO] = get_trading_component.__wrapped__(
+                    trade_component_id=trading_component_id)
+                if updated is None:
+                    logger.error(f"Failed to reload trading_component with ID {trading_component_id} "
+                                 f"in profile with ID {self.id}.", extra={"profile_id": self.id})
+                    return False
+
                 self._trading_components = [trading_component for trading_component in self.trading_components if
                                             trading_component.id != trading_component_id]
-                self.trading_components.append(
-                    TradingComponentDTO(
-                        id=trading_component_id,
-                        profile_id=self.id,
-                        name=name,
-                        weight=weight,
-                        ticker=ticker,
-                        interval=interval,
-                        settings=settings
-                    )
-                )
+                self.trading_components.append(updated)
                 logger.info(f"Updated trading_component with ID {trading_component_id} in profile with ID {self.id}.",
                             extra={"profile_id": self.id})
                 return True
@@ -420,11 +791,29 @@ class Profile:
                         extra={"profile_id": self.id})
             return True
 
-    def update_plugin(self, id: int, name: str, settings: dict[str, any]):
+    def update_plugin(self, id: int, name: str, settings: dict[str, any], expected_version: Optional[int] = None):
+        """
+        :param expected_version: The version of the plugin the changes are based on, if given the update fails
+            instead of overwriting the plugin if it was updated in the meantime.
+        """
         with self._lock:
-            if update_plugin(id=id, settings=settings):
+            try:
+                updated_stored: bool = update_plugin(id=id, settings=settings, expected_version=expected_version)
+            except ConcurrentUpdateError as e:
+                logger.error(f"Failed to update plugin with ID {id} in profile with ID {self.id}; {e}",
+                             extra={"profile_id": self.id})
+                return False
+
+            if updated_stored:
+                # Rebuilt from the stored row, so it carries the incremented version
+                updated: Optional[PluginDTO] = get_plugin.__wrapped__(id=id)
+                if updated is None:
+                    logger.error(f"Failed to reload plugin with ID {id} in profile with ID {self.id}.",
+                                 extra={"profile_id": self.id})
+                    return False
+
                 self._plugins = [plugin for plugin in self.plugins if plugin.id != id]
-                self.plugins.append(PluginDTO(id=id, profile_id=self.id, name=name, settings=settings))
+                self.plugins.append(updated)
                 logger.info(f"Updated plugin with ID {id} in profile with ID {self.id}.",
                             extra={"profile_id": self.id})
                 return True
@@ -462,7 +851,8 @@ class Profile:
             self._on_job_execution, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR
         )
 
-        self.scheduler.add_job(self.evaluate, "interval", seconds=20)
+        # The requests of live trading are served before the ones of backtests
+        self.scheduler.add_job(request_priority(Priority.LIVE)(self.evaluate), "interval", seconds=20)
         self.scheduler.start()
         self.scheduler.pause()
         self.scheduler_is_paused = True
@@ -1,7 +1,8 @@
 from typing import Optional
 
-from src.api import fetch_ticker_price
+from src.api import price_snapshot
 from src.constants import Status
+from src.database import order_journal
 
 from logging import getLogger
 logger = getLogger("oracle.app")
@@ -29,7 +30,8 @@ class TradeAgent:
             orders: dict[str, float],
             wallet: dict[str, float],
             balance: float,
-            prices: Optional[dict[str, float]] = None
+            prices: Optional[dict[str, float]] = None,
+            fills: Optional[list[tuple[str, str, float, float]]] = None
     ) -> tuple[dict[str, float], float]:
         """
         Processes the order
@@ -38,21 +40,29 @@ class TradeAgent:
         :param wallet: The wallet to be updated
         :param balance: The available balance to be updated
         :param prices: Custom prices in the format of {ticker: price}
+        :param fills: If given, every executed order is appended in the format of (ticker, side, quantity, price)
 
         :return: Updated wallet and balance
         """
         if prices is None:
             prices = {}
 
+        # The missing prices are taken from the snapshot shared by every profile, so all orders use one price set
+        missing_tickers: list[str] = [ticker for ticker, percentage_change in orders.items()
+                                      if percentage_change != 0 and ticker not in prices]
+        if missing_tickers:
+            prices = {**price_snapshot.get(missing_tickers), **prices}
+
         for ticker, percentage_change in orders.items():
             if percentage_change == 0:
                 continue
 
-            # Is only used for backtesting
-            if ticker in prices.keys():
-                ticker_current_price: float = prices[ticker]
-            else:
-                ticker_current_price: float = fetch_ticker_price(ticker)
+            if ticker not in prices:
+                logger.warning(f"Profile with id {self.profile.id} skipped the order of {ticker}, it has no price.",
+                               extra={"profile_id": self.profile.id, "ticker": ticker})
+                continue
+
+            ticker_current_price: float = prices[ticker]
 
             if percentage_change < 0 < wallet[ticker]:
                 num_of_assets: float = wallet[ticker]
@@ -61,6 +71,9 @@ class TradeAgent:
                 balance += num_of_assets_to_sell * ticker_current_price
                 wallet[ticker] = num_of_assets - num_of_assets_to_sell
 
+                if fills is not None:
+                    fills.append((ticker, "SELL", num_of_assets_to_sell, ticker_current_price))
+
                 logger.info(
                     f"Profile with id {self.profile.id} Sold {num_of_assets_to_sell} of {ticker} at {ticker_current_price}",
                     extra={"profile_id": self.profile.id, "ticker": ticker})
@@ -72,6 +85,9 @@ class TradeAgent:
                 wallet[ticker] += num_of_assets_to_buy
                 balance -= dedicated_balance
 
+                if fills is not None:
+                    fills.append((ticker, "BUY", num_of_assets_to_buy, ticker_current_price))
+
                 logger.info(
                     f"Profile with id {self.profile.id} Bought {num_of_assets_to_buy} of {ticker} at {ticker_current_price}",
                     extra={"profile_id": self.profile.id, "ticker": ticker})
@@ -80,26 +96,30 @@ class TradeAgent:
 
 
     def _paper_trade_agent(self, orders: dict[str, float]):
-        # Fallback in case of db doesn't update
-        fallback_wallet: dict[str, float] = self.profile.paper_wallet.copy()
-        fallback_balance: float = self.profile.paper_balance
+        fills: list[tuple[str, str, float, float]] = []
 
-        self.profile.paper_wallet, self.profile.paper_balance = self.process_order(
+        # Trades on a copy, so the profile can diff the wallet and keeps it if the db doesn't update
+        paper_wallet, paper_balance = self.process_order(
             orders,
-            self.profile.paper_wallet,
-            self.profile.paper_balance
+            self.profile.paper_wallet.copy(),
+            self.profile.paper_balance,
+            fills=fills
         )
 
-        if fallback_balance == self.profile.paper_balance and fallback_wallet == self.profile.paper_wallet:
+        if paper_balance == self.profile.paper_balance and paper_wallet == self.profile.paper_wallet:
             return
 
-        if not self.profile.update(paper_balance=self.profile.paper_balance, paper_wallet=self.profile.paper_wallet):
-            self.profile.paper_wallet = fallback_wallet
-            self.profile.paper_balance = fallback_balance
+        # Queued in the write-behind queue, so the evaluation doesn't wait for the commit
+        if not self.profile.update(paper_balance=paper_balance, paper_wallet=paper_wallet, sync=False):
             logger.error(
-                f"Failed to update Profile with id: {self.profile.id}; and name: {self.profile.name}; Used Fallback!",
+                f"Failed to update Profile with id: {self.profile.id}; and name: {self.profile.name}; Kept the previous paper wallet!",
                 extra={"profile_id": self.profile.id},
             )
+            return
+
+        # Only fills the wallet was updated with are journaled
+        for ticker, side, quantity, price in fills:
+            order_journal.record(self.profile.id, side, ticker, quantity, price)
 
 
     def _live_trade_agent(self, orders: dict[str, float]):
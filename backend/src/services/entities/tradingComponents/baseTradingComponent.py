@@ -42,7 +42,7 @@ class BaseTradingComponent(ABC):
         ...
 
     def backtest(self, df: DataFrame, partition_amount: int,
-                 sell_limit: float, buy_limit: float) -> list[float]:
+                 sell_limit: float, buy_limit: float, warmup: int = 0) -> list[float]:
         """
         Conducts a backtest on the provided market data to evaluate the performance of a trading strategy.
 
@@ -53,6 +53,7 @@ class BaseTradingComponent(ABC):
         :param partition_amount: The number of partitions to divide the data into for recalculating the Return on Investment (ROI). Must be greater than 0.
         :param sell_limit: The percentage of when to sell, (default is 0.2).
         :param buy_limit: The percentage of when to buy, (default is 0.8).
+        :param warmup: The number of leading candles which are only used as history for the evaluation and not traded.
 
         :returns: A list of floats representing the ROI for each partition.
 
@@ -65,14 +66,14 @@ class BaseTradingComponent(ABC):
         shares: float = 0
         net_worth_history: list[float] = []
 
-        partition_amount: int = ceil((len(df)) / partition_amount) if partition_amount > 1 else 1
+        partition_amount: int = ceil((len(df) - warmup) / partition_amount) if partition_amount > 1 else 1
 
         is_partition_cap_reached: bool = False
-        for i in range(len(df)):
+        for i in range(warmup, len(df)):
             trade_signal: float = self.evaluate(df.iloc[:i])
 
             is_partition_cap_reached: bool = (
-                    (i + 1) % partition_amount == 0) if partition_amount > 1 else False
+                    (i - warmup + 1) % partition_amount == 0) if partition_amount > 1 else False
 
             base_liquidity, balance, shares = BaseTradingComponent.process_trade_signal(
                 base_liquidity, balance, shares,
@@ -15,7 +15,16 @@ class MovingAverageConvergenceDivergence(BaseTradingComponent):
     This strategy uses the MACD and signal line crossovers, momentum, and pullbacks to generate buy and sell signals.
     """
 
-    _EA_SETTINGS = {}
+    _GA_SETTINGS: dict[str, dict[str, int | float]] = {
+        "fast_period": {"start": 5, "stop": 20, "step": 1, "type": "int"},
+        "slow_period": {"start": 21, "stop": 50, "step": 1, "type": "int"},
+        "signal_line_period": {"start": 5, "stop": 15, "step": 1, "type": "int"},
+        "momentum_max_lookback": {"start": 50, "stop": 150, "step": 10, "type": "int"},
+        "momentum_signal_weight": {"start": 0, "stop": 1, "step": 0.25, "type": "float"},
+        "zero_line_crossover_weight": {"start": 0, "stop": 1, "step": 0.25, "type": "float"},
+        "zero_line_pullback_lookback": {"start": 5, "stop": 20, "step": 5, "type": "int"},
+        "weight_impact": {"start": 0.5, "stop": 1, "step": 0.25, "type": "float"},
+    }
 
     def __init__(self, fast_period: int = 12, slow_period: int = 26,
                  signal_line_period: int = 9, momentum_max_lookback: int = 100, momentum_signal_weight: float = 1,
@@ -1,16 +1,22 @@
 import re
 
+# The seconds per unit, a month is counted as 30 days
 unit_mapping: dict[str, int] = {
     "s": 1,
     "m": 60,
-    "h": 24 * 60,
-    "d": 7 * 24 * 60,
-    "w": 30 * 24 * 60,
-    "M": 12 * 30 * 24 * 60
+    "h": 60 * 60,
+    "d": 24 * 60 * 60,
+    "w": 7 * 24 * 60 * 60,
+    "M": 30 * 24 * 60 * 60
 }
 
 
 def parse_interval(interval: str) -> int:
+    """
+    :param interval: A Binance kline interval, e.g. `15m` or `1h`.
+
+    :return: The length of the interval in seconds.
+    """
     match = re.findall(r"(\d+)(s|m|h|d|w|M)", interval)
 
     return int(match[0][0]) * unit_mapping[match[0][1]]
\ No newline at end of file
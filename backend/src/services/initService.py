@@ -1,20 +1,55 @@
 from logging import getLogger
+from typing import Optional
 
+from src.constants import Status
 from src.services.entities import Profile
+from src.utils.registry import profile_registry
 
 logger = getLogger("oracle.app")
 
 
 def init_service():
-    from src.database import get_profile, ProfileDTO
+    from src.database import get_profile_bundles, ProfileDTO, TradingComponentDTO, PluginDTO
 
-    profiles: list[ProfileDTO] = get_profile()
     logger.info("Initializing Service, Loading Profiles...")
+    bundles: list[tuple[ProfileDTO, list[TradingComponentDTO], list[PluginDTO]]] = get_profile_bundles()
 
-    if profiles is None:
+    if bundles is None:
         return
 
-    for profile in profiles:
-        Profile(profile)
+    for profile, trading_components, plugins in bundles:
+        Profile(profile, trading_components=trading_components, plugins=plugins)
+
+    from src.database import change_notifier
+    change_notifier.subscribe(apply_change)
 
     logger.info("Initialized Service Successfully, all profiles loaded!")
+
+
+def apply_change(change: 'Change') -> None:
+    """
+    Applies a change published by `change_notifier` to the loaded profiles.
+    Created profiles are loaded and deleted profiles are deactivated and unloaded.
+
+    :param change: The published change.
+    """
+    from src.database import get_profile
+
+    profile: Optional[Profile] = profile_registry.get().get(change.profile_id)
+
+    if change.table == "profiles" and change.op == "insert":
+        if profile is None and (profile_dto := get_profile.__wrapped__(id=change.id)) is not None:
+            Profile(profile_dto)
+            logger.info(f"Loaded Profile with ID {change.id} created by another process.")
+        return
+
+    if profile is None:
+        return
+
+    if change.table == "profiles" and change.op == "delete":
+        profile.change_status(Status.INACTIVE, persist=False)
+        profile_registry.remove(profile.id)
+        logger.info(f"Unloaded Profile with ID {change.id} deleted by another process.")
+        return
+
+    profile.apply_change(change)
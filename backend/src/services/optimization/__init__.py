@@ -0,0 +1,5 @@
+from .fitness import backtest_fitness, init_worker_data, resolve_fitness_cache, worker_cache, worker_data
+from .fitnessCache import FitnessCache, data_range_hash
+from .settingsSpace import grid_size, iter_settings_grid, sample_settings, settings_axes
+from .walkForward import FoldResult, WalkForwardResult, make_folds, walk_forward
+from .successiveHalving import HalvingResult, Rung, halving_schedule, hyperband, successive_halving
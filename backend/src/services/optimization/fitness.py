@@ -0,0 +1,119 @@
+from logging import getLogger
+from math import prod
+from typing import Optional
+
+from pandas import DataFrame
+
+# Registers all Trading Components, worker processes only import this module
+import src.services.entities.tradingComponents  # noqa: F401
+from src.services.optimization.fitnessCache import FitnessCache, data_range_hash
+from src.utils import load_config
+from src.utils.registry import tc_registry
+
+logger = getLogger("oracle.app")
+
+# Candle data and fitness cache of a worker process, set once by `init_worker_data` instead of being sent with every task
+_worker_df: Optional[DataFrame] = None
+_worker_cache: Optional[FitnessCache] = None
+_worker_data_hashes: dict[tuple[int, int], str] = {}
+
+
+def init_worker_data(df: DataFrame, cache: Optional[FitnessCache] = None) -> None:
+    """
+    Initializer of the optimization worker pools, stores the shared candle data in the worker process.
+
+    :param df: The candle data every task of the pool works on.
+    :param cache: The fitness cache the tasks consult (optional).
+    """
+    global _worker_df, _worker_cache
+    _worker_df = df
+    _worker_cache = cache
+    _worker_data_hashes.clear()
+
+
+def worker_data() -> DataFrame:
+    """
+    :return: The candle data set by `init_worker_data`.
+    """
+    return _worker_df
+
+
+def worker_cache() -> Optional[FitnessCache]:
+    """
+    :return: The fitness cache set by `init_worker_data`.
+    """
+    return _worker_cache
+
+
+def worker_data_hash(start: int, stop: int) -> str:
+    """
+    :return: The `data_range_hash` of the rows [start, stop) of the worker data, hashed once per worker.
+    """
+    if (start, stop) not in _worker_data_hashes:
+        _worker_data_hashes[(start, stop)] = data_range_hash(_worker_df.iloc[start:stop])
+    return _worker_data_hashes[(start, stop)]
+
+
+def resolve_fitness_cache(use_cache: Optional[bool] = None) -> Optional[FitnessCache]:
+    """
+    :param use_cache: Whether to use the fitness cache, defaults to `use_cache` in `OPTIMIZATION_CONFIG`.
+
+    :return: The fitness cache or None if it is not used.
+    """
+    if use_cache is None:
+        use_cache = (load_config("OPTIMIZATION_CONFIG") or {}).get("use_cache", False)
+    return FitnessCache() if use_cache else None
+
+
+def backtest_fitness(
+        tc_name: str,
+        settings: dict[str, any],
+        df: DataFrame,
+        buy_limit: float = 0.8,
+        sell_limit: float = -0.8,
+        warmup: int = 0,
+        cache: Optional[FitnessCache] = None,
+        ticker: Optional[str] = None,
+        interval: Optional[str] = None,
+        data_hash: Optional[str] = None
+) -> float:
+    """
+    Backtests a Trading Component with the given settings and returns its total return.
+
+    :param tc_name: The registered name of the Trading Component.
+    :param settings: The settings passed to the Trading Component, missing ones use the defaults.
+    :param df: The candle data to backtest on.
+    :param buy_limit: The confidence from which to buy.
+    :param sell_limit: The confidence from which to sell.
+    :param warmup: The number of leading candles which are only used as history.
+    :param cache: The fitness cache to consult first and store the result in (optional).
+    :param ticker: The ticker of the candle data, part of the cache key.
+    :param interval: The interval of the candle data, part of the cache key.
+    :param data_hash: The `data_range_hash` of `df`, calculated if not given.
+
+    :return: The total return, e.g. 0.05 for +5%. -inf if the settings are invalid.
+    """
+    key: Optional[str] = None
+    if cache is not None:
+        data_hash = data_hash or data_range_hash(df)
+        key = cache.key(tc_name, settings, ticker, interval, f"{data_hash}:{warmup}", buy_limit, sell_limit)
+
+        cached_fitness: Optional[float] = cache.get(key)
+        if cached_fitness is not None:
+            return cached_fitness
+
+    try:
+        tc = tc_registry.get(tc_name)(**settings)
+    except ValueError as e:
+        logger.debug(f"Invalid settings {settings=} for {tc_name}: {e}")
+        fitness: float = float("-inf")
+    else:
+        net_worth_history: list[float] = tc.backtest(
+            df, partition_amount=1, sell_limit=sell_limit, buy_limit=buy_limit, warmup=warmup
+        )
+        fitness: float = float(prod(net_worth_history) - 1)
+
+    if cache is not None:
+        cache.put(key, fitness, tc_name, settings, ticker, interval, data_hash)
+
+    return fitness
@@ -0,0 +1,224 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from logging import getLogger
+from typing import Optional
+
+import numpy as np
+from pandas import DataFrame
+
+from src.constants import DATA_STORE_VERSION
+from src.utils import load_config
+
+logger = getLogger("oracle.app")
+
+_CANDLE_COLUMNS: list[str] = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def data_range_hash(df: DataFrame) -> str:
+    """
+    Hashes the candles a fitness was calculated on, so a changed or extended history never hits old entries.
+
+    :param df: The candle data.
+
+    :return: The hex digest of the index and the OHLCV columns.
+    """
+    digest = hashlib.sha256()
+    digest.update(str(DATA_STORE_VERSION).encode("utf-8"))
+    digest.update(np.ascontiguousarray(df.index.asi8 if hasattr(df.index, "asi8") else df.index.to_numpy()).tobytes())
+
+    columns: list[str] = [column for column in _CANDLE_COLUMNS if column in df.columns]
+    digest.update(np.ascontiguousarray(df[columns].to_numpy(dtype="float64")).tobytes())
+
+    return digest.hexdigest()
+
+
+class FitnessCache:
+    """
+    Persistent memo table of backtest fitnesses, shared by every optimizer and process.
+
+    Entries are keyed by the Trading Component, its normalized settings, the ticker, the interval,
+    the hash of the candle data and the buy and sell limits. The table is a SQLite database in WAL mode,
+    so worker processes read concurrently while writes are serialized by SQLite. Once the table holds more
+    than `max_entries` rows, the least recently used ones are evicted.
+
+    Hits only update the recency in memory, it is written in one transaction per `_TOUCH_EVERY` hits
+    and before every eviction, so reads don't write to the database.
+    """
+
+    _EVICT_EVERY: int = 256
+    _TOUCH_EVERY: int = 256
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None, timeout: float = 30):
+        """
+        :param path: The path of the database file. Defaults to `fitness_cache_path` in `OPTIMIZATION_CONFIG`.
+        :param max_entries: The maximum amount of entries. Defaults to `fitness_cache_max_entries` in `OPTIMIZATION_CONFIG`.
+        :param timeout: The seconds to wait for a lock held by another process.
+        """
+        config: dict[str, any] = load_config("OPTIMIZATION_CONFIG") or {}
+
+        self.path: str = path if path is not None else config.get("fitness_cache_path", "cache/fitness.sqlite3")
+        self.max_entries: int = max_entries if max_entries is not None else config.get("fitness_cache_max_entries", 1_000_000)
+        self.timeout: float = timeout
+
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._writes: int = 0
+        # The time of the last hit per key, not yet written to `last_used`
+        self._touched: dict[str, float] = {}
+
+    def __getstate__(self) -> dict[str, any]:
+        # Connections can't be shared between processes, every worker opens its own
+        state: dict[str, any] = self.__dict__.copy()
+        state["_connection"] = None
+        state["_pid"] = None
+        state["_touched"] = {}
+        return state
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is not None and self._pid == os.getpid():
+            return self._connection
+
+        directory: str = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        connection: sqlite3.Connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS fitness ("
+            "key TEXT PRIMARY KEY, tc_name TEXT NOT NULL, settings TEXT NOT NULL, ticker TEXT, interval TEXT, "
+            "data_hash TEXT NOT NULL, fitness REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS fitness_last_used ON fitness (last_used)")
+
+        self._connection, self._pid = connection, os.getpid()
+        return connection
+
+    @staticmethod
+    def key(
+            tc_name: str,
+            settings: dict[str, any],
+            ticker: Optional[str],
+            interval: Optional[str],
+            data_hash: str,
+            buy_limit: float,
+            sell_limit: float
+    ) -> str:
+        """
+        :return: The hex digest identifying a fitness, independent of the order of the settings.
+        """
+        payload: str = json.dumps(
+            [tc_name, settings, ticker, interval, data_hash, buy_limit, sell_limit], sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[float]:
+        """
+        :param key: The key returned by `key`.
+
+        :return: The cached fitness or None if not cached.
+        """
+        try:
+            connection: sqlite3.Connection = self._connect()
+            row: Optional[tuple[float]] = connection.execute(
+                "SELECT fitness FROM fitness WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to read the fitness cache {self.path}: {e}")
+            return None
+
+        self._touched[key] = time.time()
+        if len(self._touched) >= self._TOUCH_EVERY:
+            self.flush_touches()
+        return row[0]
+
+    def flush_touches(self) -> None:
+        """
+        Writes the recency of the entries hit since the last flush.
+        """
+        if not self._touched:
+            return
+
+        touched: list[tuple[float, str]] = [(last_used, key) for key, last_used in self._touched.items()]
+        self._touched = {}
+        try:
+            connection: sqlite3.Connection = self._connect()
+            connection.execute("BEGIN")
+            try:
+                connection.executemany("UPDATE fitness SET last_used = MAX(last_used, ?) WHERE key = ?", touched)
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to write the recency to the fitness cache {self.path}: {e}")
+
+    def put(
+            self,
+            key: str,
+            fitness: float,
+            tc_name: str,
+            settings: dict[str, any],
+            ticker: Optional[str],
+            interval: Optional[str],
+            data_hash: str
+    ) -> None:
+        """
+        Stores a fitness, the remaining arguments are stored for inspection only.
+
+        :param key: The key returned by `key`.
+        :param fitness: The fitness to store.
+        """
+        try:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO fitness (key, tc_name, settings, ticker, interval, data_hash, fitness, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, tc_name, json.dumps(settings, sort_keys=True, default=str), ticker, interval, data_hash,
+                 fitness, time.time())
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to write the fitness cache {self.path}: {e}")
+            return
+
+        self._writes += 1
+        if self._writes % self._EVICT_EVERY == 0:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Deletes the least recently used entries above `max_entries`.
+
+        :return: The amount of deleted entries.
+        """
+        self.flush_touches()
+        try:
+            connection: sqlite3.Connection = self._connect()
+            count: int = connection.execute("SELECT COUNT(*) FROM fitness").fetchone()[0]
+            if count <= self.max_entries:
+                return 0
+
+            connection.execute(
+                "DELETE FROM fitness WHERE key IN (SELECT key FROM fitness ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,)
+            )
+            logger.debug(f"Evicted {count - self.max_entries} entries from the fitness cache {self.path}")
+            return count - self.max_entries
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to evict from the fitness cache {self.path}: {e}")
+            return 0
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM fitness").fetchone()[0]
+
+    def close(self) -> None:
+        self.flush_touches()
+        if self._connection is not None and self._pid == os.getpid():
+            self._connection.close()
+        self._connection, self._pid = None, None
@@ -0,0 +1,81 @@
+from random import Random
+from typing import Iterator, Optional
+
+
+def settings_axes(tc_cls: type) -> dict[str, list[int | float]]:
+    """
+    Expands the `_GA_SETTINGS` of a Trading Component into the values of every parameter.
+    `stop` is inclusive, so `{"start": 10, "stop": 50, "step": 1}` results in 41 values.
+
+    :param tc_cls: The Trading Component class.
+
+    :return: The values per parameter in the order of `_GA_SETTINGS`.
+    """
+    axes: dict[str, list[int | float]] = {}
+
+    for name, setting in tc_cls.GA_SETTINGS().items():
+        start, stop, step = setting["start"], setting["stop"], setting["step"]
+        count: int = int(round((stop - start) / step)) + 1
+
+        if setting.get("type", "int") == "int":
+            axes[name] = [int(start + i * step) for i in range(count)]
+        else:
+            axes[name] = [round(start + i * step, 10) for i in range(count)]
+
+    return axes
+
+
+def grid_size(tc_cls: type) -> int:
+    """
+    :param tc_cls: The Trading Component class.
+
+    :return: The amount of combinations of the full grid.
+    """
+    size: int = 1
+    for values in settings_axes(tc_cls).values():
+        size *= len(values)
+    return size
+
+
+def settings_at(axes: dict[str, list[int | float]], index: int) -> dict[str, int | float]:
+    """
+    Decodes the index of a grid combination into its settings, the last parameter changes fastest.
+
+    :param axes: The axes returned by `settings_axes`.
+    :param index: The index of the combination in the full grid.
+    """
+    settings: dict[str, int | float] = {}
+    for name, values in reversed(axes.items()):
+        index, position = divmod(index, len(values))
+        settings[name] = values[position]
+
+    return {name: settings[name] for name in axes}
+
+
+def iter_settings_grid(tc_cls: type) -> Iterator[dict[str, int | float]]:
+    """
+    Iterates over every combination of the `_GA_SETTINGS` of a Trading Component.
+
+    :param tc_cls: The Trading Component class.
+    """
+    axes: dict[str, list[int | float]] = settings_axes(tc_cls)
+    for index in range(grid_size(tc_cls)):
+        yield settings_at(axes, index)
+
+
+def sample_settings(tc_cls: type, amount: int, seed: Optional[int] = None) -> list[dict[str, int | float]]:
+    """
+    Samples distinct combinations of the `_GA_SETTINGS` without materializing the grid.
+    Returns the full grid if it is smaller than `amount`.
+
+    :param tc_cls: The Trading Component class.
+    :param amount: The amount of combinations to sample.
+    :param seed: The seed of the random generator (optional).
+    """
+    axes: dict[str, list[int | float]] = settings_axes(tc_cls)
+    size: int = grid_size(tc_cls)
+
+    if amount >= size:
+        return list(iter_settings_grid(tc_cls))
+
+    return [settings_at(axes, index) for index in Random(seed).sample(range(size), amount)]
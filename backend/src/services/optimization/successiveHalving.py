@@ -0,0 +1,261 @@
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from logging import getLogger
+from math import ceil, floor, log
+from random import Random
+from typing import Optional
+
+from pandas import DataFrame
+
+from src.api import Priority, fetch_klines, request_priority
+from src.services.optimization.fitness import (backtest_fitness, init_worker_data, resolve_fitness_cache,
+                                               worker_cache, worker_data, worker_data_hash)
+from src.services.optimization.fitnessCache import FitnessCache
+from src.services.optimization.settingsSpace import grid_size, sample_settings
+from src.utils.registry import tc_registry
+
+logger = getLogger("oracle.app")
+
+
+@dataclass
+class Rung:
+    # The amount of trailing candles every candidate of the rung is backtested on
+    budget: int
+    candidates: int
+    best_fitness: float
+
+
+@dataclass
+class HalvingResult:
+    tc_name: str
+    best_settings: Optional[dict[str, any]]
+    best_fitness: float
+    rungs: list[Rung] = field(default_factory=list)
+    # The amount of backtested candles summed over every evaluation
+    candles_evaluated: int = 0
+    # The amount of candles a full grid over the whole history would backtest
+    grid_candles: int = 0
+
+    @property
+    def cpu_fraction(self) -> float:
+        return self.candles_evaluated / self.grid_candles if self.grid_candles else 0
+
+
+def halving_schedule(n_candidates: int, max_budget: int, eta: int = 3, min_budget: int = 1) -> list[tuple[int, int]]:
+    """
+    Calculates the rungs of a successive halving run. Every rung keeps the best `1/eta` of the
+    candidates of the previous rung and backtests them on `eta` times as many candles.
+
+    :param n_candidates: The amount of candidates of the first rung.
+    :param max_budget: The amount of candles of the last rung.
+    :param eta: The factor by which the candidates shrink and the budget grows per rung.
+    :param min_budget: The minimum amount of candles of the first rung.
+
+    :return: A list of (candidates, budget) per rung.
+    """
+    if eta < 2:
+        raise ValueError("eta must be at least 2.")
+    if n_candidates <= 0 or max_budget <= 0:
+        raise ValueError("n_candidates and max_budget must be greater than 0.")
+
+    rungs: int = floor(log(n_candidates, eta) + 1e-9)
+    while rungs > 0 and max_budget / eta ** rungs < min_budget:
+        rungs -= 1
+
+    return [
+        (max(1, floor(n_candidates / eta ** i)), max(1, floor(max_budget / eta ** (rungs - i))))
+        for i in range(rungs + 1)
+    ]
+
+
+def _evaluate(
+        settings: dict[str, any],
+        tc_name: str,
+        ticker: str,
+        interval: str,
+        budget: int,
+        buy_limit: float,
+        sell_limit: float
+) -> float:
+    df: DataFrame = worker_data()
+    start: int = max(0, len(df) - budget)
+    cache: Optional[FitnessCache] = worker_cache()
+    data_hash: Optional[str] = worker_data_hash(start, len(df)) if cache is not None else None
+
+    return backtest_fitness(tc_name, settings, df.iloc[start:], buy_limit, sell_limit, cache=cache,
+                            ticker=ticker, interval=interval, data_hash=data_hash)
+
+
+def _run_bracket(
+        executor: Executor,
+        max_workers: int,
+        tc_name: str,
+        ticker: str,
+        interval: str,
+        candidates: list[dict[str, any]],
+        schedule: list[tuple[int, int]],
+        buy_limit: float,
+        sell_limit: float,
+        result: HalvingResult
+) -> None:
+    for n_keep, budget in schedule:
+        candidates = candidates[:n_keep]
+
+        evaluate = partial(_evaluate, tc_name=tc_name, ticker=ticker, interval=interval, budget=budget,
+                           buy_limit=buy_limit, sell_limit=sell_limit)
+        chunksize: int = max(1, len(candidates) // (max_workers * 4))
+        fitnesses: list[float] = list(executor.map(evaluate, candidates, chunksize=chunksize))
+
+        ranked: list[tuple[float, dict[str, any]]] = sorted(
+            zip(fitnesses, candidates), key=lambda pair: pair[0], reverse=True
+        )
+        candidates = [settings for _, settings in ranked]
+
+        result.candles_evaluated += len(candidates) * budget
+        result.rungs.append(Rung(budget=budget, candidates=len(candidates), best_fitness=ranked[0][0]))
+        logger.debug(f"Rung of {tc_name}: {len(candidates)} candidates on {budget} candles, "
+                     f"best fitness {ranked[0][0]:.4f}")
+
+    # Only the survivors of the last rung were backtested on the full budget
+    best_fitness, best_settings = result.rungs[-1].best_fitness, candidates[0]
+    if best_fitness > result.best_fitness:
+        result.best_settings, result.best_fitness = best_settings, best_fitness
+
+
+def _prepare(tc_name: str, ticker: str, interval: str, days: float, df: Optional[DataFrame]) -> tuple[DataFrame, HalvingResult]:
+    if df is None:
+        with request_priority(Priority.BACKTEST):
+            df = fetch_klines(ticker=ticker, interval=interval, days=days)
+
+    result: HalvingResult = HalvingResult(
+        tc_name=tc_name, best_settings=None, best_fitness=float("-inf"),
+        grid_candles=grid_size(tc_registry.get(tc_name)) * len(df)
+    )
+    return df, result
+
+
+def successive_halving(
+        tc_name: str,
+        ticker: str,
+        interval: str,
+        days: float = 30,
+        n_candidates: int = 81,
+        eta: int = 3,
+        min_budget: int = 200,
+        candidates: Optional[list[dict[str, any]]] = None,
+        buy_limit: float = 0.8,
+        sell_limit: float = -0.8,
+        max_workers: Optional[int] = None,
+        seed: Optional[int] = None,
+        df: Optional[DataFrame] = None,
+        use_cache: Optional[bool] = None
+) -> HalvingResult:
+    """
+    Searches the `_GA_SETTINGS` of a Trading Component with successive halving.
+
+    All candidates are backtested on the most recent `min_budget` candles, only the best `1/eta`
+    are promoted to a history `eta` times as long, until the survivors are backtested on the whole history.
+    Every rung is evaluated in a pool of worker processes which receive the candle data once.
+
+    :param tc_name: The registered name of the Trading Component.
+    :param ticker: The ticker to optimize on.
+    :param interval: The interval of the candles.
+    :param days: The number of past days of candles to use.
+    :param n_candidates: The amount of settings sampled from `_GA_SETTINGS`, ignored if `candidates` is given.
+    :param eta: The factor by which the candidates shrink and the history grows per rung.
+    :param min_budget: The minimum amount of candles of the first rung.
+    :param candidates: The settings to search (optional).
+    :param buy_limit: The confidence from which to buy.
+    :param sell_limit: The confidence from which to sell.
+    :param max_workers: The amount of worker processes, defaults to the cpu count.
+    :param seed: The seed for sampling the candidates (optional).
+    :param df: Candle data to use instead of fetching it (optional).
+    :param use_cache: Whether to use the fitness cache, defaults to `use_cache` in `OPTIMIZATION_CONFIG`.
+
+    :return: The best settings, the rungs and the amount of backtested candles.
+    """
+    df, result = _prepare(tc_name, ticker, interval, days, df)
+
+    if candidates is None:
+        candidates = sample_settings(tc_registry.get(tc_name), n_candidates, seed)
+
+    schedule: list[tuple[int, int]] = halving_schedule(len(candidates), len(df), eta, min_budget)
+    max_workers = max_workers or os.cpu_count() or 1
+
+    logger.info(f"Successive halving of {tc_name} on {ticker} {interval}: {len(candidates)} candidates, "
+                f"{len(schedule)} rungs, {max_workers} workers")
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker_data,
+                             initargs=(df, resolve_fitness_cache(use_cache))) as executor:
+        _run_bracket(executor, max_workers, tc_name, ticker, interval, candidates, schedule, buy_limit, sell_limit,
+                     result)
+
+    logger.info(f"Successive halving of {tc_name} finished with fitness {result.best_fitness:.4f} "
+                f"using {result.cpu_fraction:.2%} of the candles of a full grid")
+    return result
+
+
+def hyperband(
+        tc_name: str,
+        ticker: str,
+        interval: str,
+        days: float = 30,
+        eta: int = 3,
+        min_budget: int = 200,
+        buy_limit: float = 0.8,
+        sell_limit: float = -0.8,
+        max_workers: Optional[int] = None,
+        seed: Optional[int] = None,
+        df: Optional[DataFrame] = None,
+        use_cache: Optional[bool] = None
+) -> HalvingResult:
+    """
+    Searches the `_GA_SETTINGS` of a Trading Component with Hyperband.
+
+    Runs several successive halving brackets, from many candidates starting on `min_budget` candles
+    to few candidates on the whole history, so settings which only pay off on long histories are not
+    discarded early. All brackets share one pool of worker processes.
+
+    :param tc_name: The registered name of the Trading Component.
+    :param ticker: The ticker to optimize on.
+    :param interval: The interval of the candles.
+    :param days: The number of past days of candles to use.
+    :param eta: The factor by which the candidates shrink and the history grows per rung.
+    :param min_budget: The minimum amount of candles of a rung.
+    :param buy_limit: The confidence from which to buy.
+    :param sell_limit: The confidence from which to sell.
+    :param max_workers: The amount of worker processes, defaults to the cpu count.
+    :param seed: The seed for sampling the candidates (optional).
+    :param df: Candle data to use instead of fetching it (optional).
+    :param use_cache: Whether to use the fitness cache, defaults to `use_cache` in `OPTIMIZATION_CONFIG`.
+
+    :return: The best settings over all brackets, the rungs and the amount of backtested candles.
+    """
+    df, result = _prepare(tc_name, ticker, interval, days, df)
+
+    max_budget: int = len(df)
+    s_max: int = max(0, floor(log(max_budget / min_budget, eta) + 1e-9)) if max_budget > min_budget else 0
+    max_workers = max_workers or os.cpu_count() or 1
+    rng: Random = Random(seed)
+
+    logger.info(f"Hyperband of {tc_name} on {ticker} {interval}: {s_max + 1} brackets, {max_workers} workers")
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker_data,
+                             initargs=(df, resolve_fitness_cache(use_cache))) as executor:
+        for s in range(s_max, -1, -1):
+            n_candidates: int = ceil((s_max + 1) / (s + 1) * eta ** s)
+            candidates: list[dict[str, any]] = sample_settings(
+                tc_registry.get(tc_name), n_candidates, rng.randrange(2 ** 32)
+            )
+            schedule: list[tuple[int, int]] = [
+                (max(1, floor(n_candidates / eta ** i)), max(1, floor(max_budget / eta ** (s - i))))
+                for i in range(s + 1)
+            ]
+            _run_bracket(executor, max_workers, tc_name, ticker, interval, candidates, schedule, buy_limit,
+                         sell_limit, result)
+
+    logger.info(f"Hyperband of {tc_name} finished with fitness {result.best_fitness:.4f} "
+                f"using {result.cpu_fraction:.2%} of the candles of a full grid")
+    return result
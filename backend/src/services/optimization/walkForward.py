@@ -0,0 +1,199 @@
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from logging import getLogger
+from math import prod
+from typing import Optional
+
+from pandas import DataFrame, Timestamp
+
+from src.api import Priority, fetch_klines, request_priority
+from src.services.optimization.fitness import (backtest_fitness, init_worker_data, resolve_fitness_cache,
+                                               worker_cache, worker_data, worker_data_hash)
+from src.services.optimization.fitnessCache import FitnessCache
+from src.services.optimization.settingsSpace import sample_settings
+from src.utils.registry import tc_registry
+
+logger = getLogger("oracle.app")
+
+
+@dataclass
+class FoldResult:
+    index: int
+    train_start: Timestamp
+    test_start: Timestamp
+    test_end: Timestamp
+    settings: Optional[dict[str, any]]
+    train_fitness: float
+    test_net_worth_history: list[float] = field(default_factory=list)
+
+    @property
+    def test_return(self) -> float:
+        return prod(self.test_net_worth_history) - 1
+
+
+@dataclass
+class WalkForwardResult:
+    tc_name: str
+    folds: list[FoldResult]
+    # Stitched out-of-sample net worth, relative to 1 at the start of the first test fold
+    oos_equity: list[float]
+
+    @property
+    def total_return(self) -> float:
+        return self.oos_equity[-1] - 1 if self.oos_equity else 0
+
+
+def make_folds(length: int, train_size: int, test_size: int, step: Optional[int] = None) -> list[tuple[int, int, int]]:
+    """
+    Splits a candle history into rolling train and test folds.
+
+    :param length: The amount of candles.
+    :param train_size: The amount of candles per train fold.
+    :param test_size: The amount of candles per test fold, directly following its train fold.
+    :param step: The amount of candles the window moves per fold, defaults to `test_size` so test folds don't overlap.
+
+    :return: A list of (train_start, train_end, test_end) indices, the test fold is [train_end, test_end).
+    """
+    if train_size <= 0 or test_size <= 0:
+        raise ValueError("train_size and test_size must be greater than 0.")
+
+    step = test_size if step is None else step
+    if step <= 0:
+        raise ValueError("step must be greater than 0.")
+
+    folds: list[tuple[int, int, int]] = []
+    start: int = 0
+    while start + train_size + test_size <= length:
+        folds.append((start, start + train_size, start + train_size + test_size))
+        start += step
+
+    return folds
+
+
+def _run_fold(
+        index: int,
+        fold: tuple[int, int, int],
+        tc_name: str,
+        ticker: str,
+        interval: str,
+        candidates: list[dict[str, any]],
+        buy_limit: float,
+        sell_limit: float,
+        test_partitions: int
+) -> FoldResult:
+    train_start, train_end, test_end = fold
+    df: DataFrame = worker_data()
+    train_df: DataFrame = df.iloc[train_start:train_end]
+    cache: Optional[FitnessCache] = worker_cache()
+    data_hash: Optional[str] = worker_data_hash(train_start, train_end) if cache is not None else None
+
+    best_settings: Optional[dict[str, any]] = None
+    best_fitness: float = float("-inf")
+    for settings in candidates:
+        fitness: float = backtest_fitness(tc_name, settings, train_df, buy_limit, sell_limit, cache=cache,
+                                          ticker=ticker, interval=interval, data_hash=data_hash)
+        if fitness > best_fitness:
+            best_settings, best_fitness = settings, fitness
+
+    result: FoldResult = FoldResult(
+        index=index,
+        train_start=df.index[train_start],
+        test_start=df.index[train_end],
+        test_end=df.index[test_end - 1],
+        settings=best_settings,
+        train_fitness=best_fitness,
+    )
+
+    if best_settings is None:
+        result.test_net_worth_history = [1.0]
+        return result
+
+    # The train candles are passed as history, so the indicators are warmed up when the test fold starts
+    result.test_net_worth_history = tc_registry.get(tc_name)(**best_settings).backtest(
+        df.iloc[train_start:test_end], partition_amount=test_partitions,
+        sell_limit=sell_limit, buy_limit=buy_limit, warmup=train_end - train_start
+    )
+    return result
+
+
+def walk_forward(
+        tc_name: str,
+        ticker: str,
+        interval: str,
+        train_size: int,
+        test_size: int,
+        days: float = 30,
+        step: Optional[int] = None,
+        n_candidates: int = 64,
+        candidates: Optional[list[dict[str, any]]] = None,
+        buy_limit: float = 0.8,
+        sell_limit: float = -0.8,
+        test_partitions: int = 1,
+        max_workers: Optional[int] = None,
+        seed: Optional[int] = None,
+        df: Optional[DataFrame] = None,
+        use_cache: Optional[bool] = None
+) -> WalkForwardResult:
+    """
+    Runs a walk-forward optimization of the `_GA_SETTINGS` of a Trading Component.
+
+    Every train fold is optimized in its own worker process and the best settings are evaluated
+    on the following test fold. The candle data is fetched once and handed to every worker once,
+    folds only receive their indices.
+
+    :param tc_name: The registered name of the Trading Component.
+    :param ticker: The ticker to optimize on.
+    :param interval: The interval of the candles.
+    :param train_size: The amount of candles per train fold.
+    :param test_size: The amount of candles per test fold.
+    :param days: The number of past days of candles to use.
+    :param step: The amount of candles the window moves per fold, defaults to `test_size`.
+    :param n_candidates: The amount of settings sampled from `_GA_SETTINGS`, ignored if `candidates` is given.
+    :param candidates: The settings to evaluate on every train fold (optional).
+    :param buy_limit: The confidence from which to buy.
+    :param sell_limit: The confidence from which to sell.
+    :param test_partitions: The amount of partitions per test fold in the stitched equity.
+    :param max_workers: The amount of worker processes, defaults to one per fold up to the cpu count.
+    :param seed: The seed for sampling the candidates (optional).
+    :param df: Candle data to use instead of fetching it (optional).
+    :param use_cache: Whether to use the fitness cache, defaults to `use_cache` in `OPTIMIZATION_CONFIG`.
+
+    :return: The per fold results and the stitched out-of-sample equity.
+    """
+    if df is None:
+        with request_priority(Priority.BACKTEST):
+            df = fetch_klines(ticker=ticker, interval=interval, days=days)
+
+    folds: list[tuple[int, int, int]] = make_folds(len(df), train_size, test_size, step)
+    if not folds:
+        raise ValueError(f"Not enough candles ({len(df)}) for a train size of {train_size} and test size of {test_size}.")
+
+    if candidates is None:
+        candidates = sample_settings(tc_registry.get(tc_name), n_candidates, seed)
+
+    max_workers = max_workers or min(len(folds), os.cpu_count() or 1)
+    cache: Optional[FitnessCache] = resolve_fitness_cache(use_cache)
+
+    logger.info(f"Walk-forward of {tc_name} on {ticker} {interval}: {len(folds)} folds, "
+                f"{len(candidates)} candidates, {max_workers} workers")
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker_data, initargs=(df, cache)) as executor:
+        futures: list[Future] = [
+            executor.submit(_run_fold, i, fold, tc_name, ticker, interval, candidates, buy_limit, sell_limit,
+                            test_partitions)
+            for i, fold in enumerate(folds)
+        ]
+        fold_results: list[FoldResult] = [future.result() for future in futures]
+
+    oos_equity: list[float] = []
+    equity: float = 1
+    for fold_result in fold_results:
+        for net_worth in fold_result.test_net_worth_history:
+            equity *= net_worth
+            oos_equity.append(equity)
+
+    result: WalkForwardResult = WalkForwardResult(tc_name=tc_name, folds=fold_results, oos_equity=oos_equity)
+    logger.info(f"Walk-forward of {tc_name} finished with an out-of-sample return of {result.total_return:.2%}")
+
+    return result
@@ -0,0 +1,15 @@
+import os
+import tempfile
+
+import pytest
+
+# The tests run on the embedded SQLite backend unless another backend is chosen explicitly
+os.environ.setdefault("ORACLE_DB_BACKEND", "sqlite")
+os.environ.setdefault("ORACLE_SQLITE_PATH", os.path.join(tempfile.mkdtemp(prefix="oracle-tests-"), "oracle.sqlite3"))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database_schema() -> None:
+    # The database layer doesn't migrate on its own, like the app the tests migrate the schema once
+    from src.database import migrate
+    migrate()
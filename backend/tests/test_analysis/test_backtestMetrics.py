@@ -0,0 +1,68 @@
+from math import sqrt
+
+import numpy as np
+import pytest
+from src.analysis import BacktestMetrics, load_equity_curve
+
+EQUITY = [100, 110, 99, 120, 90, 95]
+TIMESTAMPS = [i * 60_000 for i in range(len(EQUITY))]
+
+
+def feed(metrics: BacktestMetrics) -> BacktestMetrics:
+    for timestamp, equity in zip(TIMESTAMPS, EQUITY):
+        metrics.update(timestamp, equity, position_value=equity / 2)
+    return metrics
+
+
+def test_metrics_match_batch_computation():
+    metrics: BacktestMetrics = feed(BacktestMetrics(periods_per_year=1))
+
+    returns = np.array(EQUITY[1:]) / np.array(EQUITY[:-1]) - 1
+    downside = np.minimum(returns, 0)
+
+    assert metrics.total_return == pytest.approx(95 / 100 - 1)
+    assert metrics.max_drawdown == pytest.approx(1 - 90 / 120)
+    assert metrics.sharpe_ratio == pytest.approx(returns.mean() / returns.std(ddof=1))
+    assert metrics.sortino_ratio == pytest.approx(returns.mean() / sqrt((downside ** 2).mean()))
+    assert metrics.exposure == pytest.approx(0.5)
+    assert metrics.equity_curve is None
+
+
+def test_win_rate_and_turnover():
+    metrics: BacktestMetrics = feed(BacktestMetrics(periods_per_year=1))
+
+    metrics.record_fill("BTCEUR", "BUY", 1, 10)
+    metrics.record_fill("BTCEUR", "BUY", 1, 20)
+    metrics.record_fill("BTCEUR", "SELL", 1, 16)
+    metrics.record_fill("BTCEUR", "SELL", 1, 14)
+
+    assert metrics.closed_trades == 2
+    assert metrics.win_rate == pytest.approx(0.5)
+    assert metrics.turnover == pytest.approx(60 / (sum(EQUITY) / len(EQUITY)))
+
+
+def test_state_roundtrip_resumes_accumulation():
+    full: BacktestMetrics = feed(BacktestMetrics(periods_per_year=1))
+
+    first: BacktestMetrics = BacktestMetrics(periods_per_year=1)
+    for timestamp, equity in zip(TIMESTAMPS[:3], EQUITY[:3]):
+        first.update(timestamp, equity, position_value=equity / 2)
+
+    resumed: BacktestMetrics = BacktestMetrics.from_state(first.to_state())
+    for timestamp, equity in zip(TIMESTAMPS[3:], EQUITY[3:]):
+        resumed.update(timestamp, equity, position_value=equity / 2)
+
+    assert resumed.summary() == pytest.approx(full.summary())
+
+
+def test_equity_curve_file(tmp_path):
+    path = str(tmp_path / "equity.bin")
+    metrics: BacktestMetrics = BacktestMetrics(periods_per_year=1, keep_equity_curve=True, equity_curve_path=path,
+                                               equity_curve_block_size=4)
+    feed(metrics)
+    metrics.close()
+
+    df = load_equity_curve(path)
+    assert list(df["Equity"]) == EQUITY
+    assert [int(ts.timestamp() * 1000) for ts in df.index] == TIMESTAMPS
+    assert metrics.equity_curve == list(zip(TIMESTAMPS, EQUITY))
@@ -0,0 +1,60 @@
+import pytest
+from src.api import ExchangeInfo, QuoteAssetTickers
+from src.api import exchangeInfo
+
+
+@pytest.fixture
+def requests(monkeypatch) -> list[int]:
+    requests: list[int] = []
+
+    def fetch_exchange_info() -> dict:
+        requests.append(1)
+        if len(requests) > 1:
+            raise ConnectionError("Offline.")
+        return {"symbols": [
+            {"symbol": "BTCEUR", "status": "TRADING", "baseAsset": "BTC", "quoteAsset": "EUR", "filters": []},
+            {"symbol": "ETHEUR", "status": "TRADING", "baseAsset": "ETH", "quoteAsset": "EUR", "filters": []},
+            {"symbol": "BTCUSDT", "status": "TRADING", "baseAsset": "BTC", "quoteAsset": "USDT", "filters": []},
+            {"symbol": "BTCAEUR", "status": "TRADING", "baseAsset": "BTC", "quoteAsset": "AEUR", "filters": []},
+            {"symbol": "EURUSDT", "status": "TRADING", "baseAsset": "EUR", "quoteAsset": "USDT", "filters": []},
+        ]}
+
+    monkeypatch.setattr(exchangeInfo, "fetch_exchange_info", fetch_exchange_info)
+    return requests
+
+
+def test_exchange_info_is_loaded_lazily_and_persisted(requests: list[int], tmp_path):
+    path: str = str(tmp_path / "exchange_info.json")
+    tickers: QuoteAssetTickers = QuoteAssetTickers(ExchangeInfo(path=path), "EUR")
+    assert requests == []
+
+    assert "BTCEUR" in tickers
+    assert "BTCUSDT" not in tickers
+    assert sorted(tickers) == ["BTCEUR", "ETHEUR"]
+    assert tickers["ETHEUR"]["baseAsset"] == "ETH"
+    assert requests == [1]
+
+    # Another process reads the stored symbols without fetching them
+    stored: ExchangeInfo = ExchangeInfo(path=path)
+    assert stored.is_valid("BTCUSDT", quote_asset="USDT")
+    assert requests == [1]
+
+
+def test_failed_refresh_keeps_the_stored_symbols(requests: list[int], tmp_path):
+    path: str = str(tmp_path / "exchange_info.json")
+    ExchangeInfo(path=path).tickers()
+
+    stale: ExchangeInfo = ExchangeInfo(path=path, refresh_interval=0)
+    assert stale.is_valid("BTCEUR")
+    assert requests == [1, 1]
+
+
+def test_quote_asset_suffix_matches_every_quote_asset_ending_with_it(requests: list[int], tmp_path):
+    info: ExchangeInfo = ExchangeInfo(path=str(tmp_path / "exchange_info.json"))
+    tickers: QuoteAssetTickers = QuoteAssetTickers(info, "EUR", suffix=True)
+
+    assert sorted(tickers) == ["BTCAEUR", "BTCEUR", "ETHEUR"]
+    assert "EURUSDT" not in tickers
+    assert tickers["BTCAEUR"]["quoteAsset"] == "AEUR"
+    # Without the suffix only the exact quote asset matches
+    assert sorted(info.tickers("EUR")) == ["BTCEUR", "ETHEUR"]
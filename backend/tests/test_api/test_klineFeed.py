@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.api import KlineFeed
+from src.api import klineFeed
+from src.api.fetchData import columns
+from src.api.utils import base_interval, resample_klines
+
+# A monday, so daily and weekly buckets start with the klines
+START: int = 1_700_438_400_000
+MINUTE: int = 60_000
+
+
+def klines(start: int, amount: int) -> pd.DataFrame:
+    open_times: np.ndarray = start + np.arange(amount, dtype="int64") * MINUTE
+    rng: np.random.Generator = np.random.default_rng(start // MINUTE)
+    close: np.ndarray = 100 + rng.standard_normal(amount).cumsum()
+    df: pd.DataFrame = pd.DataFrame({
+        "OpenTime": open_times.astype(float),
+        "Open": close + rng.standard_normal(amount),
+        "High": close + 2,
+        "Low": close - 2,
+        "Close": close,
+        "Volume": rng.random(amount),
+        "CloseTime": (open_times + MINUTE - 1).astype(float),
+        "QuoteAssetVolume": rng.random(amount),
+        "NumberOfTrades": rng.integers(1, 10, amount).astype(float),
+        "TakerBuyBaseAssetVolume": rng.random(amount),
+        "TakerBuyQuoteAssetVolume": rng.random(amount),
+    }, columns=[column for column in columns if column != "unused"])
+    df.index = pd.to_datetime(df["OpenTime"], unit="ms", utc=True)
+    df.index.name = "timestamp"
+    return df
+
+
+def test_resample_matches_pandas_resample():
+    df: pd.DataFrame = klines(START + 3 * MINUTE, 500)
+    resampled: pd.DataFrame = resample_klines(df, "45m")
+
+    expected: pd.DataFrame = df.resample("45min", origin="epoch").agg(
+        {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}).dropna()
+    pd.testing.assert_frame_equal(resampled[expected.columns], expected, check_freq=False)
+    assert (resampled["CloseTime"] - resampled["OpenTime"] == 45 * MINUTE - 1).all()
+
+    assert base_interval(["7m", "45m"]) == "1m"
+    assert base_interval(["1h", "4h", "1d"]) == "1h"
+    assert base_interval(["1w", "2w"]) == "1w"
+
+
+@pytest.fixture
+def fetches(monkeypatch) -> list[tuple[str, str]]:
+    fetches: list[tuple[str, str]] = []
+    data: dict[str, pd.DataFrame] = {"1m": klines(START, 1000)}
+
+    def fetch_klines(ticker: str, interval: str, start=None, **kwargs) -> pd.DataFrame:
+        fetches.append((ticker, interval))
+        if start is None:
+            return data["1m"].iloc[:900]
+        return data["1m"][data["1m"].index >= pd.Timestamp(start, tz="UTC")]
+
+    monkeypatch.setattr(klineFeed, "fetch_klines", fetch_klines)
+    return fetches
+
+
+def test_feed_fetches_one_stream_and_updates_incrementally(fetches: list[tuple[str, str]]):
+    feed: KlineFeed = KlineFeed("BTCEUR", ["7m", "15m", "1m"])
+    feed.load(days=1)
+    for interval in ["7m", "15m"]:
+        feed.klines(interval)
+
+    assert feed.update() == 101
+    assert fetches == [("BTCEUR", "1m"), ("BTCEUR", "1m")]
+
+    full: pd.DataFrame = klines(START, 1000)
+    for interval in ["7m", "15m"]:
+        # The first 7m bucket started before the first kline
+        expected: pd.DataFrame = resample_klines(full, interval)
+        expected = expected[expected["OpenTime"] >= START]
+        pd.testing.assert_frame_equal(feed.klines(interval), expected, check_freq=False)
+    pd.testing.assert_frame_equal(feed.klines("1m"), full)
+
+    # Dropping old klines drops the buckets which lost some of them
+    feed.update(days=500 * MINUTE / (24 * 60 * 60 * 1000))
+    assert feed.klines("7m")["OpenTime"].iloc[0] >= feed.klines("1m")["OpenTime"].iloc[0]
+
+
+def test_load_fetches_only_the_klines_missing_from_the_store(monkeypatch):
+    from src.database import store_candles
+
+    full: pd.DataFrame = klines(START, 1000)
+    fetched: list[tuple[int, int]] = []
+
+    def fetch_klines(ticker: str, interval: str, start: str, end=None, **kwargs) -> pd.DataFrame:
+        df: pd.DataFrame = full[full.index >= pd.Timestamp(start, tz="UTC")]
+        if end is not None:
+            df = df[df.index <= pd.Timestamp(end, tz="UTC")]
+        fetched.append((int(df["OpenTime"].iloc[0]), int(df["OpenTime"].iloc[-1])))
+        return df
+
+    monkeypatch.setattr(klineFeed, "fetch_klines", fetch_klines)
+    store_candles("STOREEUR", "1m", full.iloc[100:600])
+
+    start, end = (pd.Timestamp(START + i * MINUTE, unit="ms", tz="UTC").strftime(klineFeed.time_format) for i in (0, 999))
+    feed: KlineFeed = KlineFeed("STOREEUR", ["1m", "15m"])
+    feed.load(start=start, end=end)
+
+    # Only the klines before and after the stored ones were fetched
+    assert fetched == [(START, START + 99 * MINUTE), (START + 600 * MINUTE, START + 999 * MINUTE)]
+    pd.testing.assert_frame_equal(feed.klines("1m"), full)
+
+    # The fetched klines were stored, so loading again reads all of them from the store
+    fetched.clear()
+    KlineFeed("STOREEUR", ["1m"]).load(start=start, end=end)
+    assert fetched == []
@@ -0,0 +1,60 @@
+import pytest
+from src.api import PriceSnapshot
+from src.api import priceSnapshot
+from src.exceptions import DataFetchError
+
+
+@pytest.fixture
+def requests(monkeypatch) -> list[list[str]]:
+    requests: list[list[str]] = []
+
+    def fetch_ticker_prices(tickers: list[str]) -> dict[str, float]:
+        requests.append(tickers)
+        if "INVALID" in tickers:
+            raise RuntimeError("Invalid symbol.")
+        # Binance leaves out symbols it has no price for
+        return {ticker: float(len(requests)) for ticker in tickers if ticker != "DELISTED"}
+
+    monkeypatch.setattr(priceSnapshot, "fetch_ticker_prices", fetch_ticker_prices)
+    return requests
+
+
+def test_snapshot_is_shared_until_it_expires(requests: list[list[str]]):
+    snapshot: PriceSnapshot = PriceSnapshot(ttl=60)
+
+    assert snapshot.get(["BTCEUR"]) == {"BTCEUR": 1}
+    # A new ticker fetches every known ticker, later requests within the ttl reuse the snapshot
+    assert snapshot.get(["ETHEUR", "BTCEUR"]) == {"BTCEUR": 2, "ETHEUR": 2}
+    assert snapshot.price("BTCEUR") == 2
+    assert requests == [["BTCEUR"], ["BTCEUR", "ETHEUR"]]
+
+    snapshot.ttl = 0
+    assert snapshot.get(["BTCEUR"]) == {"BTCEUR": 3}
+    assert requests[-1] == ["BTCEUR", "ETHEUR"]
+
+
+def test_invalid_ticker_is_forgotten(requests: list[list[str]]):
+    snapshot: PriceSnapshot = PriceSnapshot(ttl=0)
+    snapshot.get(["BTCEUR"])
+
+    with pytest.raises(RuntimeError):
+        snapshot.get(["INVALID"])
+
+    assert snapshot.get(["BTCEUR"]) == {"BTCEUR": 3}
+    assert requests[-1] == ["BTCEUR"]
+
+
+def test_ticker_without_price_is_left_out(requests: list[list[str]]):
+    snapshot: PriceSnapshot = PriceSnapshot(ttl=60)
+
+    assert snapshot.get(["BTCEUR", "DELISTED"]) == {"BTCEUR": 1}
+    with pytest.raises(DataFetchError):
+        snapshot.price("DELISTED")
+
+    # The missing ticker is forgotten instead of forcing a new snapshot on every request
+    assert snapshot.get(["BTCEUR"]) == {"BTCEUR": 2}
+    assert len(requests) == 2
+
+    snapshot.ttl = 0
+    assert snapshot.get(["BTCEUR"]) == {"BTCEUR": 3}
+    assert requests[-1] == ["BTCEUR"]
@@ -0,0 +1,119 @@
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+import pytest
+from src.api import LatencyHistogram, Priority, Transport, fetch_ticker_prices, request_priority, set_transport
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        time.sleep(self.server.delay)
+        self.server.clients.add(self.client_address)
+        self.server.encodings.append(self.headers.get("Accept-Encoding"))
+        if self.server.status != 200:
+            self.send_response(self.server.status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body: bytes = json.dumps([{"symbol": "BTCEUR", "price": "50000.0"}, {"symbol": "ETHEUR", "price": "2500.5"}]).encode()
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_response(200)
+            self.send_header("Content-Encoding", "gzip")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def servers() -> Iterator[list[ThreadingHTTPServer]]:
+    servers: list[ThreadingHTTPServer] = []
+    for _ in range(2):
+        server: ThreadingHTTPServer = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+        server.clients = set()
+        server.encodings = []
+        server.delay = 0
+        server.status = 200
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+
+    yield servers
+
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def transport(servers: list[ThreadingHTTPServer]) -> Iterator[Transport]:
+    transport: Transport = Transport(base_url=f"http://127.0.0.1:{servers[0].server_port}",
+                                     mirrors=[f"http://127.0.0.1:{servers[1].server_port}"],
+                                     timeouts={"/api/v3/ticker/price": (1, 2)}, hedge_delay=0.05)
+    transport.server = servers[0]
+    previous = set_transport(transport)
+    yield transport
+
+    set_transport(previous)
+    transport.close()
+
+
+def test_requests_reuse_the_pooled_connection(transport: Transport):
+    for _ in range(5):
+        assert fetch_ticker_prices(["BTCEUR", "ETHEUR"]) == {"BTCEUR": 50000.0, "ETHEUR": 2500.5}
+
+    # Every request was sent over the same kept alive connection and asked for a compressed response
+    assert len(transport.server.clients) == 1
+    assert all("gzip" in encoding for encoding in transport.server.encodings)
+
+    latencies: dict[str, any] = transport.latencies()["/api/v3/ticker/price"]
+    assert latencies["count"] == 5
+    assert sum(latencies["buckets"].values()) == 5
+
+
+def test_slow_live_requests_are_hedged(transport: Transport, servers: list[ThreadingHTTPServer]):
+    servers[0].delay = 0.5
+
+    with request_priority(Priority.LIVE):
+        start: float = time.monotonic()
+        assert fetch_ticker_prices(["BTCEUR"])["BTCEUR"] == 50000.0
+        assert time.monotonic() - start < 0.4
+    assert (transport.hedges, transport.hedge_wins) == (1, 1)
+
+    # Requests of a lower priority wait for the host
+    with request_priority(Priority.BACKTEST):
+        fetch_ticker_prices(["BTCEUR"])
+    assert transport.hedges == 1
+
+
+def test_failed_hedge_does_not_win(transport: Transport, servers: list[ThreadingHTTPServer]):
+    servers[0].delay = 0.3
+    servers[1].status = 503
+
+    with request_priority(Priority.LIVE):
+        assert fetch_ticker_prices(["BTCEUR"])["BTCEUR"] == 50000.0
+    # The mirror answered first with an error, the slower response of the host was used
+    assert (transport.hedges, transport.hedge_wins) == (1, 0)
+
+
+def test_latency_histogram_quantiles():
+    histogram: LatencyHistogram = LatencyHistogram()
+    for seconds in [0.001] * 98 + [0.3, 20]:
+        histogram.record(seconds)
+
+    assert histogram.quantile(0.5) == 0.005
+    assert histogram.quantile(0.99) == 0.5
+    assert histogram.quantile(1) == 20
+    assert histogram.snapshot()["buckets"]["inf"] == 1
@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+from requests import Response
+from src.api import Priority, WeightGovernor, request_priority
+from src.exceptions import RateLimitError
+
+
+def response(status_code: int = 200, **headers: str) -> Response:
+    response: Response = Response()
+    response.status_code = status_code
+    response.headers.update(headers)
+    return response
+
+
+def test_used_weight_header_lowers_the_bucket():
+    governor: WeightGovernor = WeightGovernor(limit=100, interval=60, headroom=1)
+
+    assert governor.weight("/api/v3/ticker/price", {"symbol": "BTCEUR"}) == 2
+    assert governor.weight("/api/v3/ticker/price", {"symbols": '["BTCEUR"]'}) == 4
+    assert governor.weight("/api/v3/exchangeInfo") == 20
+
+    governor.acquire(10)
+    # Other processes on the same IP used weight too
+    governor.observe(response(**{"X-MBX-USED-WEIGHT-1M": "95"}))
+    assert governor.status()["tokens"] == pytest.approx(5, abs=0.1)
+
+    with pytest.raises(RateLimitError):
+        governor.acquire(20, timeout=0.05)
+
+
+def test_rate_limit_trips_the_circuit_breaker():
+    governor: WeightGovernor = WeightGovernor(limit=6000, interval=60)
+
+    governor.observe(response(429, **{"Retry-After": "0.2"}))
+    assert governor.status()["open_for"] > 0
+
+    with pytest.raises(RateLimitError):
+        governor.acquire(1, timeout=0.05)
+
+    start: float = time.monotonic()
+    governor.acquire(1)
+    assert time.monotonic() - start >= 0.1
+
+    # Without Retry-After the breaker backs off exponentially
+    governor.trip(418)
+    governor.trip(418)
+    assert governor.status()["open_for"] > 1.5
+
+
+def test_waiting_callers_are_served_by_priority():
+    governor: WeightGovernor = WeightGovernor(limit=10, interval=1, headroom=1)
+    governor.acquire(10)
+    served: list[Priority] = []
+
+    def request(priority: Priority) -> None:
+        with request_priority(priority):
+            governor.acquire(10)
+        served.append(priority)
+
+    threads: list[threading.Thread] = []
+    for priority in (Priority.BACKTEST, Priority.DEFAULT, Priority.LIVE):
+        threads.append(threading.Thread(target=request, args=(priority,)))
+        threads[-1].start()
+        # Every caller is queued before the bucket refills
+        while governor.status()["waiting"] < len(threads):
+            time.sleep(0.001)
+
+    for thread in threads:
+        thread.join()
+
+    assert served == [Priority.LIVE, Priority.DEFAULT, Priority.BACKTEST]
@@ -0,0 +1,41 @@
+import pytest
+from src.database import (Change, ProfileDTO, change_notifier, create_profile, delete_profile, session_scope,
+                          update_profile)
+from src.exceptions import ConcurrentUpdateError
+
+
+def test_changes_are_published_after_commit():
+    changes: list[Change] = []
+    change_notifier.subscribe(changes.append)
+    profile: ProfileDTO = create_profile("change_notifier_profile", 100, {"BTC": 1}, 100, 0.8, -0.8)
+    try:
+        with pytest.raises(ConcurrentUpdateError):
+            with session_scope():
+                update_profile(profile.id, balance=10)
+                update_profile(profile.id, balance=20, expected_version=profile.version)
+
+        with session_scope():
+            assert update_profile(profile.id, balance=50, wallet_patch={"BTC": None, "ETH": 2})
+            try:
+                update_profile(profile.id, buy_limit=0.5, expected_version=profile.version)
+            except ConcurrentUpdateError:
+                pass
+
+        change_notifier.wait()
+        # The rolled back transaction and savepoint published nothing
+        assert [(change.op, change.version, change.fields) for change in changes] == [
+            ("insert", 1, {"name": "change_notifier_profile", "status": 0, "balance": 100, "wallet": {"BTC": 1},
+                           "paper_balance": 100, "paper_wallet": {"BTC": 1}, "buy_limit": 0.8, "sell_limit": -0.8}),
+            ("update", 2, {"balance": 50, "wallet_patch": {"BTC": None, "ETH": 2}}),
+        ]
+    finally:
+        change_notifier.unsubscribe(changes.append)
+        delete_profile(profile.id)
+
+
+def test_large_change_requires_a_reload():
+    change: Change = Change(table="plugins", op="update", id=1, profile_id=1, version=2,
+                            fields={"settings": {"data": "x" * 10_000}})
+
+    assert Change.from_json(change.to_json()) == Change(table="plugins", op="update", id=1, profile_id=1, version=2,
+                                                        reload=True)
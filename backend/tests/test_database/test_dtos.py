@@ -0,0 +1,33 @@
+import dataclasses
+
+import pytest
+from src.database import PluginDTO, TradingComponentDTO
+from src.utils.registry import tc_registry
+
+
+def test_instance_is_created_lazily_and_cached():
+    calls: list[dict[str, any]] = []
+
+    class Indicator:
+        def __init__(self, **settings):
+            calls.append(settings)
+
+    tc_dto: TradingComponentDTO = TradingComponentDTO(
+        id=1, profile_id=1, name="Indicator", weight=1, ticker="BTCUSDT", interval="1h", settings={"period": 14}
+    )
+    assert calls == []
+
+    tc_registry.register("Indicator", Indicator)
+    try:
+        assert tc_dto.instance is tc_dto.instance
+        assert calls == [{"period": 14}]
+    finally:
+        tc_registry.registry.pop("Indicator", None)
+
+
+def test_dtos_are_frozen_and_slotted():
+    plugin_dto: PluginDTO = PluginDTO(id=1, profile_id=1, name="NotRegistered", settings={})
+
+    assert not hasattr(plugin_dto, "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        plugin_dto.name = "Other"
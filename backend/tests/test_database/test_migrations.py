@@ -0,0 +1,28 @@
+import sqlite3
+
+from sqlalchemy import Engine, inspect
+from src.database import create_database_engine, migrate
+
+
+def test_migrate_updates_an_existing_schema(tmp_path):
+    path: str = str(tmp_path / "old.sqlite3")
+    with sqlite3.connect(path) as connection:
+        connection.executescript(
+            "CREATE TABLE profiles (id INTEGER PRIMARY KEY, name VARCHAR(50) UNIQUE, status INTEGER, balance FLOAT, "
+            "wallet JSON, paper_balance FLOAT, paper_wallet JSON, buy_limit FLOAT, sell_limit FLOAT);"
+            "INSERT INTO profiles (name, balance, wallet, paper_balance, paper_wallet, buy_limit, sell_limit) "
+            "VALUES ('old', 1, '{}', 1, '{}', 0.8, -0.8);"
+        )
+
+    engine: Engine = create_database_engine({"backend": "sqlite", "sqlite_path": path})
+    applied: list[str] = migrate(engine)
+
+    assert "Added column profiles.version" in applied
+    assert "Created table orders" in applied
+    assert {"id", "name", "version"} <= {column["name"] for column in inspect(engine).get_columns("profiles")}
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT version FROM profiles").scalar() == 1
+
+    # Migrating an up to date schema changes nothing
+    assert migrate(engine) == []
+    engine.dispose()
@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+from src.database import (ProfileDTO, async_session_scope, asyncOperations, create_profile, delete_profile,
+                          dispose_async_engine, get_profile)
+
+pytest.importorskip("aiosqlite")
+
+PROFILE_NAME = "test_profile_async"
+
+
+@pytest.fixture
+def profile():
+    if get_profile(name=PROFILE_NAME) is not None:
+        raise Exception(f"Profile already exists, with the test name ``{PROFILE_NAME}``")
+
+    yield create_profile(PROFILE_NAME, 1000, {"BTCUSDT": 1.0}, 1000, 0.8, -0.8)
+
+    delete_profile(name=PROFILE_NAME)
+
+
+def test_concurrent_wallet_patches(profile):
+    async def run() -> ProfileDTO:
+        results: list[bool] = await asyncio.gather(*(
+            asyncOperations.update_profile(profile.id, paper_wallet_patch={f"T{i}USDT": float(i)}) for i in range(20)
+        ))
+        assert all(results)
+
+        updated: ProfileDTO = await asyncOperations.get_profile(id=profile.id)
+        await dispose_async_engine()
+        return updated
+
+    updated: ProfileDTO = asyncio.run(run())
+
+    assert len(updated.paper_wallet) == 21
+    assert updated.version == profile.version + 20
+
+
+def test_nested_scope_rolls_back_only_the_savepoint(profile):
+    async def run() -> ProfileDTO:
+        async with async_session_scope():
+            await asyncOperations.update_profile(profile.id, balance=1.0)
+            with pytest.raises(ZeroDivisionError):
+                async with async_session_scope():
+                    await asyncOperations.update_profile(profile.id, paper_balance=1.0)
+                    1 / 0
+
+        updated: ProfileDTO = await asyncOperations.get_profile(id=profile.id)
+        await dispose_async_engine()
+        return updated
+
+    updated: ProfileDTO = asyncio.run(run())
+
+    assert updated.balance == 1.0
+    assert updated.paper_balance == 1000
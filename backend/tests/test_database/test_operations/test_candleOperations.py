@@ -0,0 +1,39 @@
+import time
+
+import numpy as np
+from pandas import DataFrame
+from src.database import latest_candle_time, load_candle_columns, load_candles, store_candles
+from src.database.operations.candleOperations import KLINE_COLUMNS
+
+
+def klines(count: int, start: int = 0) -> DataFrame:
+    minute: int = 60_000
+    return DataFrame(
+        [[(start + i) * minute, 1 + i, 2 + i, i, 1.5 + i, 10, (start + i + 1) * minute - 1, 100, 7, 3, 30]
+         for i in range(count)],
+        columns=list(KLINE_COLUMNS)
+    ).astype(float)
+
+
+def test_store_and_load_candles():
+    assert latest_candle_time("CANDLETEST", "1m") is None
+
+    assert store_candles("CANDLETEST", "1m", klines(5)) == 5
+    # Stored candles are skipped, only the new ones are inserted
+    assert store_candles("CANDLETEST", "1m", klines(5, start=3)) == 3
+    assert latest_candle_time("CANDLETEST", "1m") == 8 * 60_000 - 1
+
+    columns: dict[str, np.ndarray] = load_candle_columns("CANDLETEST", "1m", batch_size=3)
+    assert columns["open_time"].tolist() == [i * 60_000 for i in range(8)]
+    assert columns["close"].flags["C_CONTIGUOUS"]
+
+    df: DataFrame = load_candles("CANDLETEST", "1m", start=2 * 60_000, end=4 * 60_000)
+    assert list(df.columns) == list(KLINE_COLUMNS)
+    assert df["Close"].tolist() == [3.5, 4.5, 5.5]
+    assert str(df.index.tz) == "UTC"
+
+
+def test_open_candle_is_not_stored():
+    # The kline of the current minute closes in the future
+    df: DataFrame = klines(1, start=int(time.time() * 1000) // 60_000)
+    assert store_candles("CANDLETEST_OPEN", "1m", df) == 0
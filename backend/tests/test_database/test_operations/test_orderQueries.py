@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+import pytest
+from src.database import (ProfileDTO, bulk_insert_orders, create_profile, delete_profile, get_order_aggregates,
+                          get_orders_page, get_profile, order_partition_statements, update_profile)
+from src.exceptions import ConcurrentUpdateError
+
+PROFILE_NAME = "test_profile_orders"
+WALLET = {"BTCUSDT": 1.0, "ETHUSDT": 2.0}
+START = datetime(2025, 1, 1)
+
+
+@pytest.fixture
+def profile():
+    if get_profile(name=PROFILE_NAME) is not None:
+        raise Exception(f"Profile already exists, with the test name ``{PROFILE_NAME}``")
+
+    profile_dto: ProfileDTO = create_profile(PROFILE_NAME, 1000, WALLET, 1000, 0.8, -0.8)
+    yield profile_dto
+
+    delete_profile(name=PROFILE_NAME)
+
+
+def make_orders(profile_id: int, amount: int) -> list[dict[str, any]]:
+    return [{
+        "fill_id": f"fill{i}",
+        "profile_id": profile_id,
+        "type": "BUY" if i % 2 else "SELL",
+        "ticker": "BTCUSDT" if i % 3 else "ETHUSDT",
+        "quantity": 1.0,
+        "price": 10.0 + i,
+        "timestamp": START + timedelta(hours=7 * i),
+    } for i in range(amount)]
+
+
+def test_bulk_insert_orders_skips_duplicates(profile):
+    orders: list[dict[str, any]] = make_orders(profile.id, 20)
+
+    assert bulk_insert_orders(orders) == 20
+    assert bulk_insert_orders(orders) == 0
+
+
+def test_get_orders_page_covers_every_order_once(profile):
+    bulk_insert_orders(make_orders(profile.id, 50))
+
+    ids, cursor = [], None
+    while True:
+        page, cursor = get_orders_page(profile.id, after=cursor, limit=7)
+        ids += [order.id for order in page]
+        if cursor is None:
+            break
+
+    assert len(ids) == len(set(ids)) == 50
+    assert ids == sorted(ids, reverse=True)
+
+
+def test_get_order_aggregates(profile):
+    bulk_insert_orders(make_orders(profile.id, 4))
+
+    aggregates = get_order_aggregates(profile.id, ticker="BTCUSDT")
+
+    # fill1 and fill2 are on the first day, one buy at 11 and one sell at 12
+    assert aggregates[0].day == "2025-01-01"
+    assert aggregates[0].orders == 2
+    assert aggregates[0].pnl == pytest.approx(1.0)
+
+
+def test_update_profile_wallet_patch_and_version(profile):
+    assert update_profile(profile.id, wallet_patch={"BTCUSDT": 3.0, "ETHUSDT": None, "SOLUSDT": 1.0},
+                          expected_version=profile.version)
+
+    updated: ProfileDTO = get_profile(id=profile.id)
+    assert updated.wallet == {"BTCUSDT": 3.0, "SOLUSDT": 1.0}
+    assert updated.version == profile.version + 1
+
+    with pytest.raises(ConcurrentUpdateError):
+        update_profile(profile.id, balance=1.0, expected_version=profile.version)
+
+
+def test_order_partitions_move_default_rows_before_attaching():
+    statements: list[str] = order_partition_statements(months_ahead=1, now=datetime(2025, 12, 15))
+
+    # The default partition exists first, rows of a new month are moved out of it before its partition is attached
+    assert statements[0] == "CREATE TABLE IF NOT EXISTS orders_default PARTITION OF orders DEFAULT"
+    assert len(statements) == 3
+    for statement, (partition, start, end) in zip(statements[1:], [("orders_2025_12", "2025-12-01", "2026-01-01"),
+                                                                   ("orders_2026_01", "2026-01-01", "2026-02-01")]):
+        assert f"IF to_regclass('{partition}') IS NULL" in statement
+        assert "PARTITION OF" not in statement
+        assert statement.index("DELETE FROM orders_default") < statement.index(f"INSERT INTO {partition}") \
+               < statement.index(f"ATTACH PARTITION {partition} FOR VALUES FROM ('{start}') TO ('{end}')")
@@ -0,0 +1,29 @@
+import pytest
+from src.database import (ProfileDTO, TradingComponentDTO, create_profile, create_trading_component, delete_profile,
+                          get_trading_component, update_trading_component)
+from src.exceptions import ConcurrentUpdateError
+
+PROFILE_NAME = "test_profile_trading_components"
+
+
+@pytest.fixture
+def trading_component():
+    profile: ProfileDTO = create_profile(PROFILE_NAME, 1000, {}, 1000, 0.8, -0.8)
+    yield create_trading_component(profile.id, "MACD", 1.0, "BTCUSDT", "1h", {"fast": 12})
+
+    delete_profile(name=PROFILE_NAME)
+
+
+def test_update_with_expected_version_rejects_stale_edits(trading_component: TradingComponentDTO):
+    assert update_trading_component(trading_component.id, settings={"fast": 10},
+                                    expected_version=trading_component.version)
+
+    # Edited from the same, now outdated, version
+    with pytest.raises(ConcurrentUpdateError):
+        update_trading_component(trading_component.id, weight=0.5, expected_version=trading_component.version)
+
+    stored: TradingComponentDTO = get_trading_component.__wrapped__(trade_component_id=trading_component.id)
+    assert (stored.weight, stored.settings, stored.version) == (1.0, {"fast": 10}, trading_component.version + 1)
+
+    # Without an expected version the update overwrites
+    assert update_trading_component(trading_component.id, weight=0.5)
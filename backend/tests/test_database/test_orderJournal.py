@@ -0,0 +1,100 @@
+import json
+import os
+from datetime import datetime
+from typing import Iterator
+
+import pytest
+from sqlalchemy import func, select
+from src.database import OrderJournal, OrderModel, ProfileDTO, create_profile, delete_profile, session_scope
+from src.database import orderJournal
+from src.database.operations import bulk_insert_orders
+
+
+@pytest.fixture
+def profile(request) -> Iterator[ProfileDTO]:
+    profile: ProfileDTO = create_profile(f"order_journal_{request.node.name}", 100, {"BTC": 1}, 100, 0.8, -0.8)
+    yield profile
+    delete_profile(profile.id)
+
+
+@pytest.fixture
+def journal(tmp_path) -> Iterator[OrderJournal]:
+    journal: OrderJournal = OrderJournal(str(tmp_path / "orders.journal"), batch_size=2, max_size=1)
+    yield journal
+    # The journal is never stopped, like after a crash
+    if journal._fd is not None:
+        os.close(journal._fd)
+
+
+def stored_fill_ids(fill_ids: list[str]) -> dict[str, int]:
+    with session_scope() as session:
+        return dict(session.execute(
+            select(OrderModel.fill_id, func.count()).where(OrderModel.fill_id.in_(fill_ids)).group_by(OrderModel.fill_id)
+        ).all())
+
+
+def test_replay_after_crash_inserts_every_fill_once(journal: OrderJournal, profile: ProfileDTO):
+    fill_ids: list[str] = [journal.record(profile.id, "BUY", "BTCEUR", 0.1 * i, 100.0 + i, durable=True)
+                           for i in range(1, 4)]
+    # Recording before `start` doesn't touch the database
+    assert stored_fill_ids(fill_ids) == {}
+
+    # The first fill was inserted, but the crash happened before the offset was written
+    with open(journal.path, "rb") as f:
+        first: dict[str, any] = json.loads(f.readline())
+    first["timestamp"] = datetime.fromtimestamp(first["timestamp"])
+    assert bulk_insert_orders([first]) == 1
+
+    restarted: OrderJournal = OrderJournal(journal.path, batch_size=2, max_size=2 ** 30)
+    assert restarted.load() == 2
+    assert stored_fill_ids(fill_ids) == {fill_id: 1 for fill_id in fill_ids}
+    assert restarted.load() == 0
+
+
+def test_journal_is_truncated_only_when_fully_loaded(journal: OrderJournal, profile: ProfileDTO, monkeypatch):
+    fill_ids: list[str] = [journal.record(profile.id, "SELL", "ETHEUR", 1, 2000.0) for _ in range(3)]
+    size: int = os.path.getsize(journal.path)
+
+    batches: list[int] = []
+
+    def bulk_insert_orders_failing(orders: list[dict[str, any]]) -> int:
+        batches.append(len(orders))
+        if len(batches) > 1:
+            raise ConnectionError("Database went away.")
+        return bulk_insert_orders(orders)
+
+    monkeypatch.setattr(orderJournal, "bulk_insert_orders", bulk_insert_orders_failing)
+    assert journal.load() == 2
+
+    # Only the first batch is marked as loaded and nothing was truncated
+    assert os.path.getsize(journal.path) == size
+    assert 0 < journal._read_offset() < size
+    assert stored_fill_ids(fill_ids) == {fill_id: 1 for fill_id in fill_ids[:2]}
+
+    monkeypatch.setattr(orderJournal, "bulk_insert_orders", bulk_insert_orders)
+    assert journal.load() == 1
+    assert os.path.getsize(journal.path) == 0
+    assert journal._read_offset() == 0
+    assert stored_fill_ids(fill_ids) == {fill_id: 1 for fill_id in fill_ids}
+
+
+def test_crash_while_truncating_loses_no_fills(journal: OrderJournal, profile: ProfileDTO, monkeypatch):
+    fill_ids: list[str] = [journal.record(profile.id, "BUY", "BTCEUR", 1, 100.0, durable=True) for _ in range(2)]
+    write_offset = journal._write_offset
+
+    def write_offset_crashing(offset: int) -> None:
+        if offset == 0:
+            raise SystemExit("Crashed while truncating.")
+        write_offset(offset)
+
+    monkeypatch.setattr(journal, "_write_offset", write_offset_crashing)
+    with pytest.raises(SystemExit):
+        journal.load()
+
+    # The journal and its offset still match, so the fill recorded after the restart isn't skipped
+    restarted: OrderJournal = OrderJournal(journal.path, batch_size=2, max_size=2 ** 30)
+    fill_ids.append(restarted.record(profile.id, "SELL", "BTCEUR", 1, 110.0, durable=True))
+    assert restarted.load() == 1
+    assert stored_fill_ids(fill_ids) == {fill_id: 1 for fill_id in fill_ids}
+    if restarted._fd is not None:
+        os.close(restarted._fd)
@@ -0,0 +1,53 @@
+from src.database import ProfileDTO, ReadCache, create_profile, delete_profile, get_profile, read_cache, update_profile
+
+
+def test_cached_lookup_is_invalidated_per_table():
+    cache: ReadCache = ReadCache(ttl=60)
+    calls: list[str] = []
+
+    @cache.cached("profiles")
+    def lookup(name: str) -> dict[str, str]:
+        calls.append(name)
+        return {"name": name}
+
+    assert lookup("a") is lookup("a")
+    assert calls == ["a"]
+
+    cache.invalidate("plugins")
+    lookup("a")
+    assert calls == ["a"]
+
+    cache.invalidate("profiles")
+    lookup("a")
+    assert calls == ["a", "a"]
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_get_profile_is_invalidated_after_commit():
+    profile: ProfileDTO = create_profile("read_cache_profile", 100, {}, 100, 0.8, -0.8)
+    try:
+        assert get_profile(id=profile.id) == get_profile(id=profile.id)
+
+        assert update_profile(profile.id, balance=50)
+        assert get_profile(id=profile.id).balance == 50
+    finally:
+        delete_profile(profile.id)
+        read_cache.clear()
+
+
+def test_cached_profiles_are_copied_for_every_caller():
+    profile: ProfileDTO = create_profile("read_cache_copies", 100, {"BTC": 1}, 100, 0.8, -0.8)
+    try:
+        first: ProfileDTO = get_profile(id=profile.id)
+        first.wallet["BTC"] = 2
+        first.paper_wallet["ETH"] = 3
+        first.balance = 0
+
+        hits: int = read_cache.hits
+        second: ProfileDTO = get_profile(id=profile.id)
+        assert read_cache.hits == hits + 1
+        assert (second.balance, second.wallet, second.paper_wallet) == (100, {"BTC": 1}, {"BTC": 1})
+        assert [p.wallet for p in get_profile() if p.id == profile.id] == [{"BTC": 1}]
+    finally:
+        delete_profile(profile.id)
+        read_cache.clear()
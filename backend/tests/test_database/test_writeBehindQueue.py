@@ -0,0 +1,118 @@
+from typing import Iterator, Optional
+
+import pytest
+from src.database import ProfileDTO, WriteBehindQueue, create_profile, delete_profile, get_profile
+from src.database import writeBehindQueue
+from src.database.writeBehindQueue import merge_updates
+from src.exceptions import ConcurrentUpdateError
+
+
+@pytest.fixture
+def profile(request) -> Iterator[ProfileDTO]:
+    profile: ProfileDTO = create_profile(f"write_behind_{request.node.name}", 100, {"BTC": 1}, 100, 0.8, -0.8)
+    yield profile
+    delete_profile(profile.id)
+
+
+@pytest.fixture
+def queue() -> Iterator[WriteBehindQueue]:
+    # Flushes only happen when the tests call them
+    queue: WriteBehindQueue = WriteBehindQueue(flush_interval=60, max_pending=1000, max_attempts=2)
+    yield queue
+    queue.stop()
+
+
+def test_merge_updates_combines_wallet_patches():
+    assert merge_updates({"wallet_patch": {"BTC": 1}}, {"wallet_patch": {"BTC": None, "ETH": 2}}) == \
+           {"wallet_patch": {"BTC": None, "ETH": 2}}
+    # A patch of a pending full wallet is applied to it, a full wallet replaces a pending patch
+    assert merge_updates({"wallet": {"BTC": 1}}, {"wallet_patch": {"BTC": None, "ETH": 2}}) == {"wallet": {"ETH": 2}}
+    assert merge_updates({"wallet_patch": {"BTC": 1}, "balance": 5}, {"wallet": {"SOL": 3}}) == \
+           {"balance": 5, "wallet": {"SOL": 3}}
+
+
+def test_successive_updates_are_coalesced(queue: WriteBehindQueue, profile: ProfileDTO):
+    queue.submit(profile.id, balance=1)
+    queue.submit(profile.id, wallet_patch={"BTC": None, "ETH": 2})
+    queue.submit(profile.id, balance=5, wallet_patch={"SOL": 3})
+    assert queue.pending == 1
+
+    assert queue.flush()
+    stored: ProfileDTO = get_profile(profile.id)
+    assert (stored.balance, stored.wallet) == (5, {"ETH": 2, "SOL": 3})
+    # The three updates were written as one
+    assert stored.version == profile.version + 1
+
+
+def test_compare_and_swap_writes_synchronously(queue: WriteBehindQueue, profile: ProfileDTO):
+    queue.submit(profile.id, balance=7)
+    assert queue.submit(profile.id, expected_version=profile.version, buy_limit=0.5)
+
+    # The pending update was written together with the synchronous one
+    assert not queue.has_pending(profile.id)
+    stored: ProfileDTO = get_profile(profile.id)
+    assert (stored.balance, stored.buy_limit, stored.version) == (7, 0.5, profile.version + 1)
+
+    queue.submit(profile.id, balance=8)
+    with pytest.raises(ConcurrentUpdateError):
+        queue.submit(profile.id, expected_version=profile.version, balance=9)
+    # The pending updates are kept, the rejected one is not
+    assert queue._pending[profile.id] == {"balance": 8}
+    assert get_profile(profile.id).balance == 7
+
+
+def test_failed_updates_are_requeued_and_dropped(queue: WriteBehindQueue, monkeypatch):
+    calls: list[tuple[int, dict[str, any]]] = []
+
+    def update_profile(profile_id: int, **fields) -> Optional[int]:
+        calls.append((profile_id, fields))
+        if len(calls) == 1:
+            # A newer update arrives while the batch is written
+            queue.submit(profile_id, balance=2)
+        return None
+
+    monkeypatch.setattr(writeBehindQueue, "update_profile", update_profile)
+
+    queue.submit(1, balance=1, wallet_patch={"BTC": 1})
+    assert not queue.flush()
+    assert queue._pending[1] == {"balance": 2, "wallet_patch": {"BTC": 1}}
+
+    assert not queue.flush()
+    assert calls[1] == (1, {"balance": 2, "wallet_patch": {"BTC": 1}})
+    # Dropped after `max_attempts` failed flushes
+    assert not queue.has_pending(1)
+    assert queue.flush()
+    assert len(calls) == 2
+
+
+def test_stop_flushes_pending_updates(queue: WriteBehindQueue, profile: ProfileDTO):
+    queue.submit(profile.id, balance=42)
+    assert queue.has_pending(profile.id)
+
+    assert queue.stop()
+    assert get_profile(profile.id).balance == 42
+
+    # Updates after the stop are written synchronously
+    queue.submit(profile.id, balance=43)
+    assert get_profile(profile.id).balance == 43
+
+
+def test_listeners_receive_written_versions(queue: WriteBehindQueue, profile: ProfileDTO):
+    versions: list[int] = []
+    queue.listen(profile.id, versions.append)
+
+    queue.submit(profile.id, balance=1)
+    queue.submit(profile.id, balance=2)
+    assert versions == []
+    assert queue.flush()
+    assert versions == [profile.version + 1]
+
+    assert queue.submit(profile.id, expected_version=profile.version + 1, buy_limit=0.5)
+    # Nothing is written without changes
+    assert queue.submit(profile.id, expected_version=profile.version + 2)
+    assert versions == [profile.version + 1, profile.version + 2]
+
+    queue.listen(profile.id, None)
+    queue.submit(profile.id, balance=3)
+    assert queue.flush()
+    assert len(versions) == 2
@@ -1,5 +1,5 @@
 import pytest
-from src.exceptions import DataFetchError
+from src.exceptions import ConcurrentUpdateError, DataFetchError
 
 
 def test_data_fetch_error():
@@ -16,3 +16,11 @@ def test_data_fetch_error_with_custom_message():
         raise DataFetchError(message=f"Custom message.", ticker=ticker)
     except DataFetchError as e:
         assert str(e) == "Custom message.\nArguments passed: {'ticker': 'BTC-USD'}"
+
+
+def test_concurrent_update_error():
+    try:
+        raise ConcurrentUpdateError(table="profiles", id=1, expected_version=3)
+    except ConcurrentUpdateError as e:
+        assert str(
+            e) == "The row was updated concurrently.\nArguments passed: {'table': 'profiles', 'id': 1, 'expected_version': 3}"
@@ -0,0 +1,124 @@
+import os
+
+import pytest
+from src.database import PluginDTO, TradingComponentDTO
+from src.analysis.backtestMetrics import iter_equity_curve_blocks
+from src.services.backtesting import BacktestCache, normalize_backtest_config, resume_partitions
+from src.services.backtesting import backtestCache
+
+START: int = 1_700_000_000_000
+HOUR: int = 60 * 60 * 1000
+
+
+def components(reverse: bool = False) -> list[TradingComponentDTO]:
+    tcs: list[TradingComponentDTO] = [
+        TradingComponentDTO(1, 1, "SimpleMovingAverage", 1.0, "BTCEUR", "1h", {"short_period": 10, "long_period": 50}),
+        TradingComponentDTO(2, 1, "RelativeStrengthIndex", 0.5, "ETHEUR", "4h", {"period": 14}),
+    ]
+    if reverse:
+        # Other ids and settings in another order describe the same backtest
+        tcs = [TradingComponentDTO(7, 3, tc.name, tc.weight, tc.ticker, tc.interval,
+                                   dict(reversed(tc.settings.items()))) for tc in reversed(tcs)]
+    return tcs
+
+
+def config(reverse: bool = False, balance: float = 1000, buy_limit: float = 0.8) -> dict[str, any]:
+    plugins: list[PluginDTO] = [PluginDTO(1, 1, "StopLoss", {"threshold": 0.1, "trailing": True})]
+    return normalize_backtest_config(components(reverse), plugins, ["ETHEUR", "BTCEUR"][::-1 if reverse else 1],
+                                     buy_limit, -0.8, balance)
+
+
+def entry(end: int) -> dict[str, any]:
+    return {"end": end, "net_worth_history": [1000], "order_history": [0], "order_candles": [],
+            "state": {"candles": (end - START) // HOUR}}
+
+
+def put_with_curve(cache: BacktestCache, config_hash: str, end: int, equity: list[float],
+                   order_candles: list[int]) -> None:
+    curve = cache.open_curve(config_hash, end, 1)
+    for i, value in enumerate(equity):
+        curve.append(START + i * HOUR, value)
+    cache.put(config_hash, end, 1, {**entry(end), "order_candles": order_candles,
+                                    "state": {"candles": len(equity)}}, curve=curve)
+
+
+@pytest.fixture
+def cache(tmp_path) -> BacktestCache:
+    return BacktestCache(str(tmp_path / "backtests"))
+
+
+def test_config_hash_ignores_order_and_ids():
+    assert config() == config(reverse=True)
+    assert BacktestCache.config_hash(config(), START) == BacktestCache.config_hash(config(reverse=True), START)
+
+
+def test_config_hash_changes_with_backtest_inputs(monkeypatch):
+    config_hash: str = BacktestCache.config_hash(config(), START)
+    assert BacktestCache.config_hash(config(balance=2000), START) != config_hash
+    assert BacktestCache.config_hash(config(buy_limit=0.5), START) != config_hash
+    assert BacktestCache.config_hash(config(), START + HOUR) != config_hash
+
+    monkeypatch.setattr(backtestCache, "DATA_STORE_VERSION", backtestCache.DATA_STORE_VERSION + 1)
+    assert BacktestCache.config_hash(config(), START) != config_hash
+
+
+def test_get_and_put_roundtrip(cache: BacktestCache):
+    config_hash: str = BacktestCache.config_hash(config(), START)
+    assert cache.get(config_hash, START + 10 * HOUR, 1) is None
+
+    cache.put(config_hash, START + 10 * HOUR, 1, entry(START + 10 * HOUR))
+    assert cache.get(config_hash, START + 10 * HOUR, 1) == entry(START + 10 * HOUR)
+    # The partition amount is part of the key
+    assert cache.get(config_hash, START + 10 * HOUR, 2) is None
+
+
+def test_longer_range_resumes_from_latest_prefix_with_curve(cache: BacktestCache):
+    config_hash: str = BacktestCache.config_hash(config(), START)
+    put_with_curve(cache, config_hash, START + 4 * HOUR, [1000, 1010, 990, 1100], [1])
+    put_with_curve(cache, config_hash, START + 6 * HOUR, [1000, 1010, 990, 1100, 1050, 1210], [1, 4])
+    # Entries without a stored curve can't be resumed
+    cache.put(config_hash, START + 7 * HOUR, 1, entry(START + 7 * HOUR))
+
+    assert cache.get_prefix(config_hash, START + 8 * HOUR)["end"] == START + 6 * HOUR
+    assert cache.get_prefix(config_hash, START + 5 * HOUR)["end"] == START + 4 * HOUR
+    assert cache.get_prefix(config_hash, START + 3 * HOUR) is None
+    assert cache.get_prefix(BacktestCache.config_hash(config(balance=2000), START), START + 8 * HOUR) is None
+
+
+def test_resume_partitions_rebuilds_any_partition_size(cache: BacktestCache):
+    config_hash: str = BacktestCache.config_hash(config(), START)
+    put_with_curve(cache, config_hash, START + 6 * HOUR, [1000, 1010, 990, 1100, 1050, 1210], [1, 4])
+    prefix: dict[str, any] = cache.get_prefix(config_hash, START + 10 * HOUR)
+
+    net_worth_history, order_history, base_liquidity, orders_done = resume_partitions(prefix, 4, 1000)
+    assert net_worth_history == [pytest.approx(1.1)]
+    assert (order_history, base_liquidity, orders_done) == ([1], 1100, 1)
+
+    # The curve is copied block by block into the curve of the new run
+    curve = cache.open_curve(config_hash, START + 10 * HOUR, 1)
+    curve.block_size = 2
+    net_worth_history, order_history, base_liquidity, orders_done = resume_partitions(prefix, 2, 1000, curve=curve)
+    assert net_worth_history == pytest.approx([1010 / 1000, 1100 / 1010, 1210 / 1100])
+    assert (order_history, base_liquidity, orders_done) == ([1, 0, 1], 1210, 0)
+
+    curve.close()
+    assert [equity.tolist() for _, equity in iter_equity_curve_blocks(curve.path)] == \
+           [[1000, 1010, 990, 1100, 1050, 1210]]
+
+
+def test_interrupted_put_leaves_no_partial_file(cache: BacktestCache, monkeypatch):
+    config_hash: str = BacktestCache.config_hash(config(), START)
+    cache.put(config_hash, START + 10 * HOUR, 1, entry(START + 10 * HOUR))
+
+    def dump(obj: any, f) -> None:
+        f.write('{"end": ')
+        raise OSError("No space left on device.")
+
+    monkeypatch.setattr(backtestCache.json, "dump", dump)
+    cache.put(config_hash, START + 10 * HOUR, 1, {**entry(START + 10 * HOUR), "state": {}})
+    put_with_curve(cache, config_hash, START + 20 * HOUR, [1000, 1010], [])
+    monkeypatch.undo()
+
+    # The stored entry is unchanged and neither the new one nor a temporary file exist
+    assert os.listdir(os.path.join(cache.cache_dir, config_hash)) == [f"{START + 10 * HOUR}_1.json"]
+    assert cache.get(config_hash, START + 10 * HOUR, 1) == entry(START + 10 * HOUR)
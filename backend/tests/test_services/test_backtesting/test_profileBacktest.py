@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Optional
+
+import numpy as np
+import pytest
+from pandas import DataFrame, Timestamp, date_range
+from src.database import ProfileDTO, TradingComponentDTO, create_profile, delete_profile
+from src.services.backtesting import BacktestCache
+from src.services.entities.profile import profile as profile_module
+from src.services.entities.profile.profile import Profile
+from src.utils.registry import profile_registry
+
+START: datetime = datetime(2024, 1, 1, tzinfo=timezone.utc)
+TIME_FORMAT: str = "%Y-%m-%d %H:%M:%S"
+
+
+def hours(amount: int) -> str:
+    return (START + timedelta(hours=amount)).strftime(TIME_FORMAT)
+
+
+@pytest.fixture
+def klines() -> DataFrame:
+    index = date_range(START, periods=48, freq="1h", tz="UTC")
+    close: np.ndarray = 100 + 10 * np.sin(np.arange(48) / 3)
+    return DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": 1.0}, index=index)
+
+
+@pytest.fixture
+def profile(request, klines: DataFrame, tmp_path, monkeypatch) -> Iterator[Profile]:
+    dto: ProfileDTO = create_profile(f"backtest_{request.node.name}", 100, {"BTCEUR": 0}, 100, 0.8, -0.8)
+    tc: TradingComponentDTO = TradingComponentDTO(1, dto.id, "SimpleMovingAverage", 1.0, "BTCEUR", "1h",
+                                                  {"short_period": 10, "long_period": 50})
+    profile: Profile = Profile(dto, trading_components=[tc], plugins=[])
+    profile.evaluated = []
+
+    def prep_dfs(days: int = 0, start: Optional[str] = None, end: Optional[str] = None) -> dict[int, DataFrame]:
+        return {tc.id: klines[start:end]}
+
+    # Buys after rising and sells after falling closes, records every simulated candle
+    def evaluate(tc_dfs: dict[int, DataFrame]) -> dict[str, float]:
+        df: DataFrame = tc_dfs[tc.id]
+        profile.evaluated.append(len(df))
+        if len(df) < 2:
+            return {}
+        return {"BTCEUR": 0.5 if df["Close"].iloc[-1] > df["Close"].iloc[-2] else -0.5}
+
+    def fetch_klines(ticker: str, interval: str, start: str, **kwargs) -> DataFrame:
+        return DataFrame({"Close": [klines.loc[Timestamp(start, tz="UTC"), "Close"]]})
+
+    class TmpBacktestCache(BacktestCache):
+        def __init__(self):
+            super().__init__(str(tmp_path / "backtests"))
+
+    monkeypatch.setattr(profile, "prep_dfs", prep_dfs)
+    monkeypatch.setattr(profile, "evaluate", evaluate)
+    monkeypatch.setattr(profile_module, "fetch_klines", fetch_klines)
+    monkeypatch.setattr(profile_module, "BacktestCache", TmpBacktestCache)
+
+    yield profile
+
+    profile.scheduler.shutdown(wait=False)
+    profile_registry.remove(dto.id)
+    delete_profile(dto.id)
+
+
+def test_extended_range_only_simulates_the_new_candles(profile: Profile):
+    profile.backtest(balance=1000, partition_amount=4, start=hours(0), end=hours(24), use_cache=True)
+    assert len(profile.evaluated) == 24
+
+    profile.evaluated = []
+    net_worth_history, order_history, metrics = profile.backtest(
+        balance=1000, partition_amount=3, start=hours(0), end=hours(36), use_cache=True)
+    # The first 24 candles are resumed from the cache
+    assert profile.evaluated == list(range(24, 36))
+
+    # An exact repeat doesn't simulate anything
+    profile.evaluated = []
+    assert profile.backtest(balance=1000, partition_amount=3, start=hours(0), end=hours(36), use_cache=True)[:2] == \
+           (net_worth_history, order_history)
+    assert profile.evaluated == []
+
+    # The partitions of the resumed candles are rebuilt for the new partition size
+    fresh_net_worth_history, fresh_order_history, fresh_metrics = profile.backtest(
+        balance=1000, partition_amount=3, start=hours(0), end=hours(36), use_cache=False)
+    assert len(profile.evaluated) == 36
+    assert net_worth_history == pytest.approx(fresh_net_worth_history)
+    assert order_history == fresh_order_history
+    assert len(net_worth_history) == 3 and sum(order_history) > 0
+    assert metrics.summary() == pytest.approx(fresh_metrics.summary())
@@ -0,0 +1,56 @@
+from typing import Iterator
+
+import pytest
+from src.database import (ProfileDTO, TradingComponentDTO, create_profile, create_trading_component, delete_profile,
+                          get_profile, update_profile)
+from src.services.entities.profile.profile import Profile
+from src.utils.registry import profile_registry
+
+
+@pytest.fixture
+def profile(request) -> Iterator[Profile]:
+    dto: ProfileDTO = create_profile(f"update_{request.node.name}", 100, {"BTCEUR": 1}, 100, 0.8, -0.8)
+    tc: TradingComponentDTO = create_trading_component(dto.id, "SimpleMovingAverage", 1.0, "BTCEUR", "1h",
+                                                       {"short_period": 10, "long_period": 50})
+    profile: Profile = Profile(dto, trading_components=[tc], plugins=[])
+
+    yield profile
+
+    profile.scheduler.shutdown(wait=False)
+    profile_registry.remove(profile.id)
+    delete_profile(dto.id)
+
+
+def test_update_tracks_the_written_version(profile: Profile):
+    assert profile.update(balance=50)
+    assert profile.update(buy_limit=0.5)
+    assert profile.version == get_profile.__wrapped__(id=profile.id).version
+
+
+def test_update_with_recomputes_on_a_concurrent_update(profile: Profile):
+    stale_version: int = profile.version
+    # Another process buys ETH, its change hasn't reached this one yet
+    update_profile(profile.id, wallet_patch={"ETHEUR": 2}, expected_version=stale_version)
+    profile.wallet, profile.version = {"BTCEUR": 1}, stale_version
+
+    computed: list[dict[str, float]] = []
+
+    def buy_btc(current: Profile) -> dict[str, dict[str, float]]:
+        computed.append(dict(current.wallet))
+        return {"wallet": {**current.wallet, "BTCEUR": current.wallet["BTCEUR"] + 1}}
+
+    assert profile.update_with(buy_btc)
+    # Re-run on the reloaded wallet, which keeps the ETH of the other process
+    assert computed == [{"BTCEUR": 1}, {"BTCEUR": 1, "ETHEUR": 2}]
+    assert get_profile.__wrapped__(id=profile.id).wallet == profile.wallet == {"BTCEUR": 2, "ETHEUR": 2}
+    assert profile.version == get_profile.__wrapped__(id=profile.id).version
+
+
+def test_stale_trading_component_edits_are_rejected(profile: Profile):
+    tc: TradingComponentDTO = profile.trading_components[0]
+    assert profile.update_trading_component(tc.id, tc.name, 0.5, tc.ticker, tc.interval, tc.settings,
+                                            expected_version=tc.version)
+    # Edited from the version before the first update
+    assert not profile.update_trading_component(tc.id, tc.name, 0.2, tc.ticker, tc.interval, tc.settings,
+                                                expected_version=tc.version)
+    assert profile.trading_components[0].weight == 0.5
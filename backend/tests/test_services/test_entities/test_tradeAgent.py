@@ -0,0 +1,36 @@
+from types import SimpleNamespace
+
+import pytest
+from src.services.entities.profile import tradeAgent
+from src.services.entities.profile.tradeAgent import TradeAgent
+
+
+class FakeProfile(SimpleNamespace):
+    def update(self, paper_balance: float, paper_wallet: dict[str, float], sync: bool = True) -> bool:
+        if not self.updatable:
+            return False
+        self.paper_balance, self.paper_wallet = paper_balance, paper_wallet
+        return True
+
+
+@pytest.fixture
+def journaled(monkeypatch) -> list[tuple]:
+    journaled: list[tuple] = []
+    monkeypatch.setattr(tradeAgent.order_journal, "record", lambda *fill: journaled.append(fill))
+    monkeypatch.setattr(tradeAgent.price_snapshot, "get", lambda tickers: {ticker: 10.0 for ticker in tickers})
+    return journaled
+
+
+@pytest.mark.parametrize("updatable", [True, False])
+def test_paper_fills_are_journaled_after_the_update(journaled: list[tuple], updatable: bool):
+    profile = FakeProfile(id=1, name="paper", paper_balance=100.0, paper_wallet={"BTCEUR": 0.0}, updatable=updatable)
+
+    TradeAgent(profile)._paper_trade_agent({"BTCEUR": 0.5})
+
+    if updatable:
+        assert journaled == [(1, "BUY", "BTCEUR", 5.0, 10.0)]
+        assert (profile.paper_balance, profile.paper_wallet) == (50.0, {"BTCEUR": 5.0})
+    else:
+        # The wallet kept the previous amounts, so the fill never happened
+        assert journaled == []
+        assert (profile.paper_balance, profile.paper_wallet) == (100.0, {"BTCEUR": 0.0})
@@ -0,0 +1,65 @@
+import numpy as np
+from pandas import DataFrame, date_range
+
+from src.services.optimization import FitnessCache, data_range_hash
+
+
+def _candles(length: int) -> DataFrame:
+    close = np.linspace(100, 110, length)
+    return DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1.0},
+                     index=date_range("2024-01-01", periods=length, freq="1h", tz="UTC"))
+
+
+def test_data_range_hash_changes_with_data():
+    df = _candles(50)
+    assert data_range_hash(df) == data_range_hash(df.copy())
+    assert data_range_hash(df) != data_range_hash(df.iloc[1:])
+
+    changed = df.copy()
+    changed.iloc[-1, changed.columns.get_loc("Close")] += 1
+    assert data_range_hash(df) != data_range_hash(changed)
+
+
+def test_fitness_cache_roundtrip(tmp_path):
+    cache = FitnessCache(str(tmp_path / "fitness.sqlite3"), max_entries=10)
+    key = cache.key("SimpleMovingAverage", {"short_period": 10, "long_period": 50}, "BTCUSDT", "1h", "abc", 0.8, -0.8)
+
+    assert key == cache.key("SimpleMovingAverage", {"long_period": 50, "short_period": 10}, "BTCUSDT", "1h", "abc", 0.8, -0.8)
+    assert cache.get(key) is None
+
+    cache.put(key, float("-inf"), "SimpleMovingAverage", {"short_period": 10, "long_period": 50}, "BTCUSDT", "1h", "abc")
+    assert cache.get(key) == float("-inf")
+
+
+def test_fitness_cache_evicts_least_recently_used(tmp_path):
+    cache = FitnessCache(str(tmp_path / "fitness.sqlite3"), max_entries=3)
+
+    for i in range(5):
+        cache.put(str(i), i, "SimpleMovingAverage", {}, None, None, "abc")
+    cache.get("0")
+
+    assert cache.evict() == 2
+    assert len(cache) == 3
+    assert cache.get("0") == 0
+    assert cache.get("1") is None
+
+
+def test_fitness_cache_hits_write_their_recency_in_batches(tmp_path, monkeypatch):
+    cache = FitnessCache(str(tmp_path / "fitness.sqlite3"), max_entries=10)
+    monkeypatch.setattr(FitnessCache, "_TOUCH_EVERY", 2)
+    cache.put("0", 0, "SimpleMovingAverage", {}, None, None, "abc")
+    cache.put("1", 1, "SimpleMovingAverage", {}, None, None, "abc")
+
+    def last_used() -> dict[str, float]:
+        return dict(cache._connect().execute("SELECT key, last_used FROM fitness").fetchall())
+
+    stored: dict[str, float] = last_used()
+    assert cache.get("0") == 0
+    # The hit is only remembered in memory
+    assert last_used() == stored
+    hit: float = cache._touched["0"]
+
+    # Written together with the second hit
+    assert cache.get("1") == 1
+    assert cache._touched == {}
+    assert last_used()["0"] == max(hit, stored["0"])
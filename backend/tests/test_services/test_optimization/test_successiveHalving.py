@@ -0,0 +1,114 @@
+import json
+import sqlite3
+
+import numpy as np
+import pytest
+from pandas import DataFrame, date_range
+
+from src.services.optimization import (FitnessCache, HalvingResult, data_range_hash, halving_schedule, hyperband,
+                                       successive_halving)
+from src.services.optimization import successiveHalving
+
+
+def test_halving_schedule_promotes_top_fraction():
+    assert halving_schedule(81, 8100, eta=3) == [(81, 100), (27, 300), (9, 900), (3, 2700), (1, 8100)]
+
+
+def test_halving_schedule_respects_min_budget():
+    assert halving_schedule(81, 2000, eta=3, min_budget=200) == [(81, 222), (27, 666), (9, 2000)]
+
+
+def test_halving_schedule_single_rung():
+    assert halving_schedule(5, 100, eta=3, min_budget=100) == [(5, 100)]
+
+
+def test_halving_schedule_invalid_eta():
+    with pytest.raises(ValueError):
+        halving_schedule(10, 100, eta=1)
+
+
+class Parabola:
+    """
+    Trading Component stub whose fitness only depends on its distance to `x = 13`.
+    """
+
+    @classmethod
+    def GA_SETTINGS(cls) -> dict[str, dict[str, any]]:
+        return {"x": {"start": 0, "stop": 26, "step": 1, "type": "int"}}
+
+    def __init__(self, x: int):
+        self.x: int = x
+
+    def backtest(self, df: DataFrame, partition_amount: int, sell_limit: float, buy_limit: float,
+                 warmup: int) -> list[float]:
+        return [1 - (self.x - 13) ** 2 / 1000]
+
+
+@pytest.fixture
+def df() -> DataFrame:
+    close: np.ndarray = np.linspace(100, 110, 90)
+    return DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1.0},
+                     index=date_range("2024-01-01", periods=90, freq="1h", tz="UTC"))
+
+
+@pytest.fixture
+def cache_path(tmp_path, monkeypatch) -> str:
+    path: str = str(tmp_path / "fitness.sqlite3")
+    get = successiveHalving.tc_registry.get
+
+    # The worker processes are forked after patching, so they see the stub and the cache too
+    monkeypatch.setattr(successiveHalving.tc_registry, "get", lambda name: Parabola if name == "Parabola" else get(name))
+    monkeypatch.setattr(successiveHalving, "resolve_fitness_cache", lambda use_cache: FitnessCache(path))
+    return path
+
+
+def evaluated(cache_path: str, df: DataFrame, budget: int) -> set[int]:
+    """
+    :return: The `x` of every candidate the cache holds a fitness of the trailing `budget` candles for.
+    """
+    with sqlite3.connect(cache_path) as connection:
+        rows = connection.execute("SELECT settings FROM fitness WHERE data_hash = ?",
+                                  (data_range_hash(df.iloc[len(df) - budget:]),)).fetchall()
+    return {json.loads(settings)["x"] for settings, in rows}
+
+
+def test_successive_halving_promotes_the_best_candidates(df: DataFrame, cache_path: str, monkeypatch):
+    candidates: list[dict[str, int]] = [{"x": x} for x in range(27)]
+    result: HalvingResult = successive_halving("Parabola", "BTCEUR", "1h", eta=3, min_budget=10,
+                                               candidates=candidates, max_workers=2, df=df)
+
+    assert result.best_settings == {"x": 13}
+    assert result.best_fitness == pytest.approx(0)
+    assert [(rung.candidates, rung.budget) for rung in result.rungs] == [(27, 10), (9, 30), (3, 90)]
+    assert result.candles_evaluated == 27 * 10 + 9 * 30 + 3 * 90
+
+    # Only the survivors of a rung are backtested on the longer history of the next one
+    assert evaluated(cache_path, df, 10) == set(range(27))
+    assert evaluated(cache_path, df, 30) == set(range(9, 18))
+    assert evaluated(cache_path, df, 90) == {12, 13, 14}
+
+    # A repeated search is answered by the fitness cache alone
+    def backtest(*args, **kwargs):
+        raise AssertionError("Backtested a cached fitness.")
+
+    monkeypatch.setattr(Parabola, "backtest", backtest)
+    repeated: HalvingResult = successive_halving("Parabola", "BTCEUR", "1h", eta=3, min_budget=10,
+                                                 candidates=candidates, max_workers=2, df=df)
+    assert (repeated.best_settings, repeated.rungs) == (result.best_settings, result.rungs)
+
+
+def test_hyperband_returns_the_best_fully_evaluated_candidate(df: DataFrame, cache_path: str):
+    result: HalvingResult = hyperband("Parabola", "BTCEUR", "1h", eta=3, min_budget=10, max_workers=2, seed=7, df=df)
+
+    # Brackets from 9 candidates on 10 candles to 3 candidates on the whole history
+    assert [(rung.candidates, rung.budget) for rung in result.rungs] == [
+        (9, 10), (3, 30), (1, 90),
+        (5, 30), (1, 90),
+        (3, 90),
+    ]
+
+    full: set[int] = evaluated(cache_path, df, 90)
+    assert 3 <= len(full) <= 5
+    assert result.best_settings["x"] in full
+    assert result.best_fitness == pytest.approx(max(-(x - 13) ** 2 / 1000 for x in full))
+    assert result.best_fitness == pytest.approx(-(result.best_settings["x"] - 13) ** 2 / 1000)
@@ -0,0 +1,116 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from pandas import DataFrame, Timestamp, date_range
+from src.services.entities.tradingComponents import SimpleMovingAverage
+from src.services.optimization import (WalkForwardResult, grid_size, iter_settings_grid, make_folds, sample_settings,
+                                       walk_forward)
+from src.services.optimization import walkForward
+
+
+def test_make_folds():
+    assert make_folds(10, train_size=4, test_size=2) == [(0, 4, 6), (2, 6, 8), (4, 8, 10)]
+    assert make_folds(10, train_size=4, test_size=2, step=3) == [(0, 4, 6), (3, 7, 9)]
+    assert make_folds(5, train_size=4, test_size=2) == []
+
+    with pytest.raises(ValueError):
+        make_folds(10, train_size=0, test_size=2)
+
+
+def test_settings_space_of_simple_moving_average():
+    assert grid_size(SimpleMovingAverage) == 41 * 51
+
+    grid = list(iter_settings_grid(SimpleMovingAverage))
+    assert grid[0] == {"short_period": 10, "long_period": 50}
+    assert grid[-1] == {"short_period": 50, "long_period": 100}
+
+    samples = sample_settings(SimpleMovingAverage, 25, seed=3)
+    assert len(samples) == 25
+    assert len({tuple(s.items()) for s in samples}) == 25
+    assert all(s in grid for s in samples)
+    assert samples == sample_settings(SimpleMovingAverage, 25, seed=3)
+
+
+class StubComponent:
+    backtests: list[dict[str, any]] = []
+
+    def __init__(self, period: int):
+        self.period: int = period
+
+    def backtest(self, df: DataFrame, partition_amount: int, sell_limit: float, buy_limit: float,
+                 warmup: int) -> list[float]:
+        self.backtests.append({"period": self.period, "start": df.index[0], "end": df.index[-1], "warmup": warmup})
+        return [1.1] + [1.0] * (partition_amount - 1)
+
+
+def test_walk_forward_scores_every_fold_in_process(monkeypatch):
+    # The close is the position of the candle, so every fold prefers the period of its last train candle
+    close: np.ndarray = np.arange(20, dtype=float)
+    df: DataFrame = DataFrame({"Open": close, "High": close, "Low": close, "Close": close, "Volume": 1.0},
+                              index=date_range("2024-01-01", periods=20, freq="1h", tz="UTC"))
+    train_windows: list[tuple[int, Timestamp, Timestamp]] = []
+
+    def backtest_fitness(tc_name: str, settings: dict[str, any], train_df: DataFrame, *args, **kwargs) -> float:
+        train_windows.append((settings["period"], train_df.index[0], train_df.index[-1]))
+        return -abs(settings["period"] - train_df["Close"].iloc[-1])
+
+    StubComponent.backtests = []
+    monkeypatch.setattr(walkForward, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(walkForward, "backtest_fitness", backtest_fitness)
+    monkeypatch.setattr(walkForward.tc_registry, "get", lambda name: StubComponent)
+
+    result: WalkForwardResult = walk_forward(
+        "StubComponent", "BTCEUR", "1h", train_size=8, test_size=4, df=df, test_partitions=2,
+        candidates=[{"period": period} for period in (7, 11, 15, 19)], use_cache=False
+    )
+
+    assert [fold.settings for fold in result.folds] == [{"period": 7}, {"period": 11}, {"period": 15}]
+    assert [fold.train_fitness for fold in result.folds] == [0, 0, 0]
+
+    # Every candidate is scored on the train candles only, which end right before the test fold
+    assert len(train_windows) == 3 * 4
+    for fold, (train_start, train_end, test_end) in zip(result.folds, [(0, 8, 12), (4, 12, 16), (8, 16, 20)]):
+        assert (fold.train_start, fold.test_start, fold.test_end) == \
+               (df.index[train_start], df.index[train_end], df.index[test_end - 1])
+        windows: set[tuple[Timestamp, Timestamp]] = {(start, end) for _, start, end in train_windows
+                                                     if start == fold.train_start}
+        assert windows == {(df.index[train_start], df.index[train_end - 1])}
+
+    # The test backtest gets the train candles as warmup in front of the test fold
+    assert sorted(StubComponent.backtests, key=lambda b: b["start"]) == [
+        {"period": 7, "start": df.index[0], "end": df.index[11], "warmup": 8},
+        {"period": 11, "start": df.index[4], "end": df.index[15], "warmup": 8},
+        {"period": 15, "start": df.index[8], "end": df.index[19], "warmup": 8},
+    ]
+    assert result.oos_equity == pytest.approx([1.1, 1.1, 1.21, 1.21, 1.331, 1.331])
+    assert result.total_return == pytest.approx(0.331)
+
+
+def test_walk_forward_runs_real_folds_in_worker_processes():
+    close: np.ndarray = 100 + 10 * np.sin(np.arange(200) / 8) + np.arange(200) / 10
+    df: DataFrame = DataFrame({"Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": 1.0},
+                              index=date_range("2024-01-01", periods=200, freq="1h", tz="UTC"))
+    candidates: list[dict[str, any]] = [
+        {"short_period": short_period, "long_period": long_period, "return_crossover_weight": False}
+        for short_period, long_period in ((10, 30), (5, 20), (3, 40))
+    ]
+
+    result: WalkForwardResult = walk_forward(
+        "SimpleMovingAverage", "BTCEUR", "1h", train_size=120, test_size=40, df=df, test_partitions=2,
+        candidates=candidates, max_workers=2, use_cache=False
+    )
+
+    # The worker processes pick and evaluate the same settings as running the folds here
+    assert len(result.folds) == 2
+    for fold, (train_start, train_end, test_end) in zip(result.folds, [(0, 120, 160), (40, 160, 200)]):
+        fitness: list[float] = [walkForward.backtest_fitness("SimpleMovingAverage", settings,
+                                                             df.iloc[train_start:train_end])
+                                for settings in candidates]
+        assert fold.settings == candidates[int(np.argmax(fitness))] == candidates[1]
+        assert fold.train_fitness == pytest.approx(max(fitness))
+        assert fold.test_net_worth_history == pytest.approx(SimpleMovingAverage(**fold.settings).backtest(
+            df.iloc[train_start:test_end], partition_amount=2, sell_limit=-0.8, buy_limit=0.8,
+            warmup=train_end - train_start))
+    assert len(result.oos_equity) == 4
+    assert result.total_return != 0
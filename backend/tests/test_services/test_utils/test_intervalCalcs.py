@@ -0,0 +1,21 @@
+import pytest
+from src.services.entities.utils.intervalCalcs import parse_interval
+
+
+@pytest.mark.parametrize("interval, seconds", [
+    ("30s", 30),
+    ("1m", 60),
+    ("15m", 15 * 60),
+    ("1h", 60 * 60),
+    ("4h", 4 * 60 * 60),
+    ("1d", 24 * 60 * 60),
+    ("1w", 7 * 24 * 60 * 60),
+    ("1M", 30 * 24 * 60 * 60),
+])
+def test_parse_interval(interval: str, seconds: int):
+    assert parse_interval(interval) == seconds
+
+
+def test_parse_interval_orders_intervals():
+    intervals: list[str] = ["1M", "1h", "1w", "15m", "1d", "4h"]
+    assert sorted(intervals, key=parse_interval) == ["15m", "1h", "4h", "1d", "1w", "1M"]